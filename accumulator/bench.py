@@ -0,0 +1,144 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .common import HashBackend
+from .factory import AbstractAccumulatorManager, AbstractProver, AbstractVerifier
+from .simple_accumulator import SimpleAccumulatorFactory
+from .smart_accumulator import SmartAccumulatorFactory
+from .multipointer_accumulator import MultipointerAccumulatorFactory
+from .multipointer_loglog import MultipointerLogLogFactory
+
+# Benchmarks comparing all the constructions. Run with:
+#
+#   python -m accumulator.bench --sizes 1000 10000 --output results.json
+#
+# For each construction and each size n, it measures the throughput of `add` while adding n elements, the latency
+# of `prove` and `verify` for randomly chosen elements (starting from the current root), and the size of the
+# witnesses. Results are written as JSON.
+
+DEFAULT_SIZES = [10**3, 10**4, 10**5, 10**6, 10**7]
+DEFAULT_P = [2, 3, 4]
+PERCENTILES = [50, 90, 99]
+
+Construction = Tuple[AbstractAccumulatorManager, AbstractProver, AbstractVerifier]
+
+
+def get_constructions(ps: Sequence[int]) -> Dict[str, Callable[[HashBackend], Construction]]:
+    """Return the constructions to benchmark, by name, each with a function creating it for a given hash backend."""
+    constructions = {
+        "simple": lambda hash_backend: SimpleAccumulatorFactory().create_accumulator(hash_backend),
+        "smart": lambda hash_backend: SmartAccumulatorFactory().create_accumulator(hash_backend),
+    }
+    for p in ps:
+        constructions[f"multipointer-{p}"] = (
+            lambda hash_backend, p=p: MultipointerAccumulatorFactory().create_accumulator(p, hash_backend)
+        )
+    constructions["loglog"] = lambda hash_backend: MultipointerLogLogFactory().create_accumulator(hash_backend)
+    return constructions
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """Return the mean, the maximum and the percentiles in PERCENTILES of a non-empty list of values."""
+    values = sorted(values)
+    result = {"mean": sum(values) / len(values), "max": values[-1]}
+    for p in PERCENTILES:
+        result[f"p{p}"] = values[min(len(values) - 1, (p * len(values)) // 100)]
+    return result
+
+
+def run_benchmark(
+    make_construction: Callable[[HashBackend], Construction],
+    n: int,
+    samples: int,
+    hash_backend: HashBackend,
+    rng: random.Random
+) -> dict:
+    """Add n elements to a new instance of a construction, then prove and verify `samples` random elements."""
+    acc, prover, verifier = make_construction(hash_backend)
+
+    elements = [hash_backend.H(k.to_bytes(8, "big")) for k in range(1, n + 1)]
+    start = time.perf_counter()
+    for x in elements:
+        acc.add(x)
+    add_seconds = time.perf_counter() - start
+
+    root = acc.get_root()
+    prove_times, verify_times, items, sizes = [], [], [], []
+    for _ in range(samples):
+        j = rng.randint(1, n)
+
+        start = time.perf_counter()
+        w = prover.prove(j)
+        prove_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        result = verifier.verify(root, n, j, w, elements[j - 1])
+        verify_times.append(time.perf_counter() - start)
+        if not result:
+            raise AssertionError(f"Verification failed for element {j} of {n}")
+
+        items.append(len(w))
+        sizes.append(sum(len(item) for item in w))
+
+    return {
+        "n": n,
+        "add": {"seconds": add_seconds, "per_second": n / add_seconds if add_seconds > 0 else None},
+        "prove_seconds": percentiles(prove_times),
+        "verify_seconds": percentiles(verify_times),
+        "witness_items": percentiles(items),
+        "witness_bytes": percentiles(sizes),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark the accumulator constructions.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="numbers of elements to add (default: 10^3 to 10^7)")
+    parser.add_argument("--p", type=int, nargs="+", default=DEFAULT_P,
+                        help="values of p for the multipointer accumulator (default: 2 3 4)")
+    parser.add_argument("--constructions", nargs="+", default=None,
+                        help="names of the constructions to run (default: all)")
+    parser.add_argument("--samples", type=int, default=100, help="number of proofs for each size (default: 100)")
+    parser.add_argument("--hash", default="sha256", help="name of the hash function (default: sha256)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for choosing the proven elements")
+    parser.add_argument("--output", default=None, help="output file (default: standard output)")
+    args = parser.parse_args(argv)
+
+    constructions = get_constructions(args.p)
+    names = args.constructions if args.constructions is not None else list(constructions)
+    for name in names:
+        if name not in constructions:
+            parser.error(f"unknown construction {name!r}; choose among: {', '.join(constructions)}")
+
+    hash_backend = HashBackend(args.hash)
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "hash": hash_backend.name,
+        "samples": args.samples,
+        "seed": args.seed,
+        "results": {},
+    }
+    for name in names:
+        rng = random.Random(args.seed)
+        results["results"][name] = []
+        for n in args.sizes:
+            print(f"{name}: n = {n}", file=sys.stderr)
+            results["results"][name].append(run_benchmark(constructions[name], n, args.samples, hash_backend, rng))
+
+    if args.output is None:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+if __name__ == "__main__":
+    main()
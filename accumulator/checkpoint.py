@@ -0,0 +1,266 @@
+import hashlib
+import os
+from typing import List, Optional, Sequence
+
+from .common import HashBackend
+from .merkle import MerkleTree
+from .storage import Store
+
+# Checkpoints of the state of the accumulator managers and of the provers, that can be restored without replaying
+# the added elements and without computing any hash.
+#
+# A checkpoint file contains:
+#   - a header: MAGIC, the format VERSION (2 bytes), the kind of the saved object, the name of the hash function,
+#     its digest size (2 bytes) and its NIL value (strings are prefixed by their length, in 1 byte);
+#   - the body, which is a sequence of integers (8 bytes, big endian) and digests written by the saved object;
+#   - the SHA-256 hash of all the preceding bytes, as a checksum.
+
+MAGIC = b"ACCUMCKP"
+VERSION = 1
+CHECKSUM_SIZE = 32
+CHUNK_SIZE = 1 << 20
+
+
+class CheckpointError(ValueError):
+    """Raised when a checkpoint is corrupted, or not compatible with the object it is restored to."""
+    pass
+
+
+def check_state_slots(k: int, S: List[Optional[bytes]]) -> None:
+    """
+    Check that the state slots S restored for a SimpleAccumulator or a GeneralizedAccumulator are consistent with the
+    counter k: there is one slot for each power of 2 smaller than k, plus the initial one, and the slot S[t] is set
+    for each t such that 2**t <= k. Raise CheckpointError otherwise.
+    """
+    expected_size = 1 if k == 0 else 2 + (k - 1).bit_length()
+    if len(S) != expected_size or any(S[t] is None for t in range(k.bit_length())):
+        raise CheckpointError(f"The state slots are not consistent with the number of elements {k}")
+
+
+class CheckpointWriter:
+    """
+    Writes a checkpoint for an object of the given `kind` to the file at `path`. The content is streamed to a
+    temporary file, together with its checksum, and the temporary file atomically replaces `path` on `save`.
+    Used as a context manager, it calls `save` at the end of the block, or `discard` if the block raises.
+    """
+    def __init__(self, path: str, kind: str, hash_backend: HashBackend):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.digest_size = hash_backend.digest_size
+        self.checksum = hashlib.sha256()
+        self.buffer = bytearray()
+        self.file = open(self.tmp_path, "wb")
+
+        self.write(MAGIC + VERSION.to_bytes(2, "big"))
+        self.string(kind)
+        self.string(hash_backend.name)
+        self.write(hash_backend.digest_size.to_bytes(2, "big"))
+        self.digest(hash_backend.NIL)
+
+    def write(self, data: bytes) -> None:
+        self.buffer += data
+        if len(self.buffer) >= CHUNK_SIZE:
+            self._flush_buffer()
+
+    def _flush_buffer(self) -> None:
+        self.checksum.update(self.buffer)
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def string(self, value: str) -> None:
+        encoded = value.encode("utf8")
+        self.write(bytes([len(encoded)]) + encoded)
+
+    def int(self, value: int) -> None:
+        self.write(value.to_bytes(8, "big"))
+
+    def digest(self, value: bytes) -> None:
+        assert len(value) == self.digest_size
+        self.write(value)
+
+    def optional_digest(self, value: Optional[bytes]) -> None:
+        """Write a digest that can be None, preceded by a flag byte."""
+        if value is None:
+            self.write(b"\x00")
+        else:
+            self.write(b"\x01")
+            self.digest(value)
+
+    def digests(self, values: Sequence[Optional[bytes]]) -> None:
+        """Write a list of digests that can be None, preceded by its length."""
+        self.int(len(values))
+        for value in values:
+            self.optional_digest(value)
+
+    def merkle_tree(self, tree: MerkleTree) -> None:
+        """Write all the nodes of a MerkleTree, so that it can be restored without computing any hash."""
+        self.int(len(tree.levels))
+        for level in tree.levels:
+            self.digests(level)
+        self.digests(tree.spine)
+
+    def store_entries(self, stores: List[Store], n: int) -> None:
+        """For each index k in [0, n] that is in the first of the `stores`, write k and the values of all the
+        stores for k (or None if missing). Must be the last part of the body."""
+        self.int(sum(1 for k in range(n + 1) if k in stores[0]))
+        for k in range(n + 1):
+            if k in stores[0]:
+                self.int(k)
+                for store in stores:
+                    self.optional_digest(bytes(store[k]) if k in store else None)
+
+    def save(self) -> None:
+        """Write the checksum, and atomically replace the file at `path`, if any, with the checkpoint."""
+        self._flush_buffer()
+        self.file.write(self.checksum.digest())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self) -> None:
+        """Remove the temporary file, leaving the file at `path` unchanged."""
+        self.file.close()
+        os.remove(self.tmp_path)
+
+    def __enter__(self) -> "CheckpointWriter":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.save()
+        else:
+            self.discard()
+
+
+class CheckpointReader:
+    """
+    Reads a checkpoint written by `CheckpointWriter` for an object of the given `kind`, after verifying its checksum,
+    its version and its hash backend. The body must then be read in the same order as it was written; the file is
+    read in chunks, and never loaded in memory as a whole.
+    Used as a context manager, it calls `close` at the end of the block, or only closes the file if the block raises.
+    """
+    def __init__(self, path: str, kind: str, hash_backend: HashBackend):
+        self.file = open(path, "rb", buffering=CHUNK_SIZE)
+        try:
+            self._verify_checksum()
+            self._read_header(kind, hash_backend)
+        except BaseException:
+            self.file.close()
+            raise
+
+    def _verify_checksum(self) -> None:
+        size = os.fstat(self.file.fileno()).st_size
+        if size < len(MAGIC) + CHECKSUM_SIZE or self.file.read(len(MAGIC)) != MAGIC:
+            raise CheckpointError("Not a checkpoint file")
+
+        self.end = size - CHECKSUM_SIZE
+        self.file.seek(0)
+        checksum = hashlib.sha256()
+        remaining = self.end
+        while remaining > 0:
+            chunk = self.file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                raise CheckpointError("Truncated checkpoint")
+            checksum.update(chunk)
+            remaining -= len(chunk)
+        if checksum.digest() != self.file.read(CHECKSUM_SIZE):
+            raise CheckpointError("Wrong checksum")
+
+        self.file.seek(len(MAGIC))
+        self.pos = len(MAGIC)
+
+    def _read_header(self, kind: str, hash_backend: HashBackend) -> None:
+        self.digest_size = hash_backend.digest_size
+        version = int.from_bytes(self.read(2), "big")
+        if version != VERSION:
+            raise CheckpointError(f"Unsupported checkpoint version {version}")
+        saved_kind = self.string()
+        if saved_kind != kind:
+            raise CheckpointError(f"The checkpoint is for a {saved_kind}, not for a {kind}")
+        name, digest_size = self.string(), int.from_bytes(self.read(2), "big")
+        if (name, digest_size) != (hash_backend.name, hash_backend.digest_size) or self.digest() != hash_backend.NIL:
+            raise CheckpointError(f"The checkpoint was written with a different hash backend: {name}, {digest_size}")
+
+    def read(self, n: int) -> bytes:
+        if self.pos + n > self.end:
+            raise CheckpointError("Truncated checkpoint")
+        self.pos += n
+        return self.file.read(n)
+
+    def string(self) -> str:
+        return self.read(self.read(1)[0]).decode("utf8")
+
+    def int(self) -> int:
+        return int.from_bytes(self.read(8), "big")
+
+    def digest(self) -> bytes:
+        return self.read(self.digest_size)
+
+    def optional_digest(self) -> Optional[bytes]:
+        flag = self.read(1)[0]
+        if flag not in (0, 1):
+            raise CheckpointError("Invalid flag")
+        return self.digest() if flag == 1 else None
+
+    def digests(self) -> List[Optional[bytes]]:
+        return [self.optional_digest() for _ in range(self.int())]
+
+    def merkle_tree(self, hash_backend: HashBackend) -> MerkleTree:
+        """Read a MerkleTree written by `CheckpointWriter.merkle_tree`."""
+        tree = MerkleTree([], hash_backend)
+        tree.levels = [self.digests() for _ in range(self.int())]
+        tree.spine = self.digests()
+        tree.size = len(tree.levels[0]) if tree.levels else 0
+        if not tree.levels:
+            tree.levels = [[]]
+        tree._update_peaks()
+        return tree
+
+    def check_store_entries(self, n_stores: int) -> None:
+        """
+        Check that the rest of the checkpoint is made of valid entries for `n_stores` stores, written by
+        `CheckpointWriter.store_entries`, without storing them; then go back to the current position. Used to
+        validate the whole checkpoint before `store_entries` modifies any store.
+        """
+        start = self.pos
+        prev_k = -1
+        for _ in range(self.int()):
+            k = self.int()
+            if k <= prev_k:
+                raise CheckpointError("Invalid index")
+            prev_k = k
+            for _ in range(n_stores):
+                self.optional_digest()
+        self._check_end()
+        self.file.seek(start)
+        self.pos = start
+
+    def store_entries(self, stores: List[Store]) -> None:
+        """Read the entries written by `CheckpointWriter.store_entries` into the given stores."""
+        for _ in range(self.int()):
+            k = self.int()
+            for store in stores:
+                value = self.optional_digest()
+                if value is not None:
+                    store[k] = value
+
+    def _check_end(self) -> None:
+        if self.pos != self.end:
+            raise CheckpointError("Unexpected data at the end of the checkpoint")
+
+    def close(self) -> None:
+        """Check that the whole checkpoint was read, and close the file."""
+        try:
+            self._check_end()
+        finally:
+            self.file.close()
+
+    def __enter__(self) -> "CheckpointReader":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.file.close()
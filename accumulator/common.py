@@ -1,7 +1,6 @@
+import functools
 import hashlib
-from typing import Union
-
-NIL = bytes([0] * 32)
+from typing import Optional, Union
 
 
 def highest_divisor_power_of_2(n: int) -> int:
@@ -10,23 +9,13 @@ def highest_divisor_power_of_2(n: int) -> int:
 
 
 def floor_lg(n: int) -> int:
-    """Return floor(log_2(n))."""
-    r = 0
-    t = 1
-    while 2 * t <= n:
-        t = 2 * t
-        r = r + 1
-    return r
+    """Return floor(log_2(n)). Return 0 if n == 0."""
+    return n.bit_length() - 1 if n > 0 else 0
 
 
 def ceil_lg(n: int) -> int:
-    """Return ceiling(log_2(n))."""
-    r = 0
-    t = 1
-    while t < n:
-        t = 2 * t
-        r = r + 1
-    return r
+    """Return ceiling(log_2(n)). Return 0 if n == 0."""
+    return (n - 1).bit_length() if n > 0 else 0
 
 
 def is_power_of_2(n: int) -> bool:
@@ -47,11 +36,7 @@ def zeros(n: int) -> int:
     """Return the number of trailing zeros in the binary representation of n.
     Return 0 if n == 0."""
 
-    result = 0
-    while n & 1 == 0:
-        n = n // 2
-        result += 1
-    return result
+    return (n & -n).bit_length() - 1 if n != 0 else 0
 
 
 def pred(n: int) -> int:
@@ -64,9 +49,14 @@ def pred(n: int) -> int:
 def rpred(n: int, m: int) -> int:
     """For integers n > m > 0, return the largest number not smaller than m that can be obtained by
     progressively zero-ing the least significant 1 digit in the binary representation of n."""
-    while pred(n) >= m:
-        n = pred(n)
-    return n
+    if n <= m:
+        return n
+    # n and m agree on all the bits above the highest bit h where they differ, which is 1 in n and 0 in m. Zeroing
+    # the bits of n below h gives a number larger than m; also zeroing the bit h gives m if m has no 1 below h,
+    # otherwise a number smaller than m.
+    h = (n ^ m).bit_length() - 1
+    r = n & -(2 << h)
+    return r if r == m else n & -(1 << h)
 
 
 def hook_index(n: int, t: int) -> int:
@@ -123,8 +113,50 @@ def iroot_ceil(k, n):
         return hi
 
 
+class HashBackend:
+    """
+    The hash function used by accumulators and Merkle trees, chosen among the ones available in `hashlib`, together
+    with the value NIL that is used in place of missing values (by default, `digest_size` zero bytes).
+    For "blake2b" and "blake2s", the output is truncated to `digest_size` bytes; other hash functions must have
+    exactly `digest_size` bytes of output.
+    """
+    def __init__(self, name: str = "sha256", digest_size: int = 32, nil: Optional[bytes] = None):
+        if name in ["blake2b", "blake2s"]:
+            self.hash_fn = functools.partial(getattr(hashlib, name), digest_size=digest_size)
+        elif hasattr(hashlib, name):
+            self.hash_fn = getattr(hashlib, name)
+        else:
+            self.hash_fn = functools.partial(hashlib.new, name)
+
+        if self.hash_fn().digest_size != digest_size:
+            raise ValueError(f"The digest size of {name} is not {digest_size}")
+
+        self.name = name
+        self.digest_size = digest_size
+        self.NIL = bytes(digest_size) if nil is None else nil
+
+        if len(self.NIL) != digest_size:
+            raise ValueError(f"NIL must have length {digest_size}")
+
+    def __repr__(self) -> str:
+        return f"HashBackend({self.name!r}, {self.digest_size})"
+
+    def H(self, x: Union[str, bytes]) -> bytes:
+        """If x an array of bytes, return the digest of it.
+        If x if a string, convert it to bytes using utf8 encoding first, then return the digest."""
+        b = x.encode("utf8") if isinstance(x, str) else x
+        return self.hash_fn(b).digest()
+
+
+SHA256 = HashBackend("sha256", 32)
+BLAKE2B = HashBackend("blake2b", 32)
+BLAKE2S = HashBackend("blake2s", 32)
+
+# The default hash backend, used unless a different one is explicitly chosen
+NIL = SHA256.NIL
+
+
 def H(x: Union[str, bytes]) -> bytes:
     """If x an array of bytes, return the sha256 digest of it.
     If x if a string, convert it to bytes using utf8 encoding first, then return the digest."""
-    b = x.encode("utf8") if isinstance(x, str) else x
-    return hashlib.sha256(b).digest()
+    return SHA256.H(x)
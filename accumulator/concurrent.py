@@ -0,0 +1,145 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .factory import AbstractAccumulatorManager, AbstractProver
+
+# Serving proofs from many threads while a single writer keeps adding elements.
+#
+# The accumulator managers and the provers are not thread-safe: while an element is being added, the counter of the
+# manager is incremented before the prover has recorded the new element, so a proof for the current root could
+# read data that is not there yet. However, once the k-th element is added and all the listeners were notified,
+# nothing that a proof starting from R_i with i <= k depends on is ever modified again. Therefore, it is enough
+# that each addition is atomic with respect to reading the pair (i, R_i) that a proof starts from; the proof itself
+# can then be computed without holding any lock.
+
+
+class RWLock:
+    """
+    A readers-writer lock: any number of readers can hold it at the same time, while a writer has exclusive access.
+    Writers have priority: new readers wait while a writer is waiting, so that writers are never starved.
+    """
+    def __init__(self):
+        self.cond = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = False
+        self.writers_waiting = 0
+
+    def acquire_read(self) -> None:
+        with self.cond:
+            while self.writer or self.writers_waiting > 0:
+                self.cond.wait()
+            self.readers += 1
+
+    def release_read(self) -> None:
+        with self.cond:
+            self.readers -= 1
+            if self.readers == 0:
+                self.cond.notify_all()
+
+    def acquire_write(self) -> None:
+        with self.cond:
+            self.writers_waiting += 1
+            while self.writer or self.readers > 0:
+                self.cond.wait()
+            self.writers_waiting -= 1
+            self.writer = True
+
+    def release_write(self) -> None:
+        with self.cond:
+            self.writer = False
+            self.cond.notify_all()
+
+    @contextmanager
+    def read_locked(self) -> Iterator[None]:
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+
+    @contextmanager
+    def write_locked(self) -> Iterator[None]:
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+
+class ConcurrentProver:
+    """
+    Wraps an accumulator manager and its prover, so that elements can be added by one thread while proofs are
+    produced by many others, or by a pool of `max_workers` threads through `submit` and `submit_from`.
+
+    All the additions must go through this object. Each addition holds the write lock of `lock` until the listeners
+    are notified; each request holds the read lock only to pin the pair (i, R_i) it starts from. Therefore, requests
+    wait for at most one addition (or one batch of `add_many`), and additions are never blocked while proofs are
+    being computed.
+    """
+    def __init__(
+        self,
+        accumulator: AbstractAccumulatorManager,
+        prover: AbstractProver,
+        max_workers: Optional[int] = None
+    ):
+        self.accumulator = accumulator
+        self.prover = prover
+        self.lock = RWLock()
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="prover")
+
+    def add(self, x: bytes) -> bytes:
+        """Insert the new element `x` into the accumulator, and return the new value of the accumulator."""
+        with self.lock.write_locked():
+            return self.accumulator.add(x)
+
+    def add_many(self, elements: Iterable[bytes]) -> bytes:
+        """Insert all the elements in `elements` into the accumulator, in order, with the `add_many` of the manager,
+        and return the new value of the accumulator. The write lock is held for the whole batch (including the
+        iteration over `elements`), and listeners are notified once, with `elements_added`."""
+        with self.lock.write_locked():
+            return self.accumulator.add_many(elements)
+
+    def pin(self) -> Tuple[int, bytes]:
+        """Return the pair (i, R_i) for the current number of elements i, and the current value R_i of the
+        accumulator."""
+        with self.lock.read_locked():
+            return len(self.accumulator), self.accumulator.get_root()
+
+    def prove(self, j: int) -> Tuple[int, bytes, List[bytes]]:
+        """
+        Pin the current pair (i, R_i), and produce a witness for the j-th element starting from it.
+        Return the triple (i, R_i, w), where w is the witness, that can be verified against R_i.
+        """
+        i, Ri = self.pin()
+        if not 1 <= j <= i:
+            raise ValueError(f"There is no element with index {j} in an accumulator with {i} elements")
+        return i, Ri, self.prover.prove_from(i, j)
+
+    def prove_from(self, i: int, j: int) -> List[bytes]:
+        """Produce a witness for the j-th element of the accumulator, starting from the root when the i-th element
+        was added; the i-th element must have already been added."""
+        with self.lock.read_locked():
+            k = len(self.accumulator)
+        if not 1 <= j <= i <= k:
+            raise ValueError(f"Invalid indices i = {i}, j = {j} for an accumulator with {k} elements")
+        return self.prover.prove_from(i, j)
+
+    def submit(self, j: int) -> "Future[Tuple[int, bytes, List[bytes]]]":
+        """Schedule `prove(j)` on the thread pool, and return its future."""
+        return self.executor.submit(self.prove, j)
+
+    def submit_from(self, i: int, j: int) -> "Future[List[bytes]]":
+        """Schedule `prove_from(i, j)` on the thread pool, and return its future."""
+        return self.executor.submit(self.prove_from, i, j)
+
+    def close(self) -> None:
+        """Wait for the scheduled requests to complete, and shut down the thread pool."""
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self) -> "ConcurrentProver":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
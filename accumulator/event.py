@@ -1,11 +1,161 @@
+import queue
+import threading
+from typing import Optional
+
+
 class Event:
+    """
+    Calls all its listeners, in order, on each `notify`. Listeners added with `+=` receive the positional arguments
+    of `notify`; listeners added with `subscribe(listener, with_info=True)` also receive the `info` argument of
+    `notify`, as an additional positional argument.
+    """
     def __init__(self):
-        self.listeners = []
+        self.listeners = []  # pairs (listener, with_info)
 
     def __iadd__(self, listener):
-        self.listeners.append(listener)
+        self.subscribe(listener)
+        return self
+
+    def subscribe(self, listener, with_info: bool = False):
+        self.listeners.append((listener, with_info))
+
+    def notify(self, *args, info=None, **kwargs):
+        for listener, with_info in self.listeners:
+            if with_info:
+                listener(*args, info, **kwargs)
+            else:
+                listener(*args, **kwargs)
+
+
+class AsyncDispatcher:
+    """
+    Calls the listeners of one or more `AsyncEvent`s from a single worker thread, in the order of the notifications
+    of all the events. Notifications wait in a queue of at most `maxsize` entries; if the queue is full,
+    `backpressure` chooses whether `notify` waits for a free entry ("block"), discards the notification ("drop",
+    counted in `dropped`), or raises `queue.Full` ("error").
+
+    The easiest way to use it is to `attach` it to an accumulator manager:
+
+        dispatcher = AsyncDispatcher().attach(acc)
+
+    which replaces both `element_added` and `elements_added` with events sharing this dispatcher, and keeping the
+    listeners that were already subscribed (like the prover created by a factory), so that the
+    latency of `add` does not depend on the listeners, while the listeners still receive all the elements in order.
+    Listeners then lag behind the manager: `flush` waits until all the previous notifications were dispatched, which
+    is necessary, for example, before proving an element that was just added. Exceptions raised by the listeners are
+    re-raised by the next `flush` or `close`.
+
+    With "drop" or "error", the manager has already added the element when the notification is discarded or
+    `queue.Full` is raised: calling `add` again would add the element twice, and with "drop" the listeners never
+    receive the dropped elements (for example, a prover cannot prove them). Only "block" is safe for provers.
+    """
+    BACKPRESSURE = ("block", "drop", "error")
+
+    def __init__(self, maxsize: int = 1024, backpressure: str = "block"):
+        if backpressure not in self.BACKPRESSURE:
+            raise ValueError(f"backpressure must be one of {', '.join(self.BACKPRESSURE)}, not {backpressure!r}")
+        self.queue = queue.Queue(maxsize)
+        self.backpressure = backpressure
+        self.dropped = 0
+        self.error = None
+        self.closed = False
+        self.worker = threading.Thread(target=self._run, name="event-dispatch", daemon=True)
+        self.worker.start()
+
+    def attach(self, accumulator) -> "AsyncDispatcher":
+        """Replace the events of an accumulator manager with `AsyncEvent`s using this dispatcher, with the same
+        listeners. Return self."""
+        for name in ["element_added", "elements_added"]:
+            event = AsyncEvent(dispatcher=self)
+            event.listeners = list(getattr(accumulator, name).listeners)
+            setattr(accumulator, name, event)
+        return self
+
+    def submit(self, event: "AsyncEvent", args: tuple, kwargs: dict, info=None) -> None:
+        """Queue a notification for the listeners of `event`."""
+        if self.closed:
+            raise RuntimeError("The dispatcher is closed")
+
+        item = (event, args, kwargs, info)
+        if self.backpressure == "block":
+            self.queue.put(item)
+            return
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            if self.backpressure == "error":
+                raise
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                event, args, kwargs, info = item
+                Event.notify(event, *args, info=info, **kwargs)
+            except Exception as e:
+                if self.error is None:
+                    self.error = e
+            finally:
+                self.queue.task_done()
+
+    def _raise_error(self):
+        error, self.error = self.error, None
+        if error is not None:
+            raise error
+
+    def flush(self):
+        """Wait until all the notifications queued so far were dispatched to the listeners."""
+        self.queue.join()
+        self._raise_error()
+
+    def close(self):
+        """Dispatch the pending notifications, and stop the worker thread. Further notifications are not allowed."""
+        if not self.closed:
+            self.closed = True
+            self.queue.put(None)
+            self.worker.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AsyncEvent(Event):
+    """
+    An `Event` whose listeners are called by the worker thread of `dispatcher`, instead of inside `notify`.
+    If no dispatcher is given, the event gets its own one, created with `maxsize` and `backpressure`.
+    Events that must be delivered in a consistent order, like the two events of an accumulator manager, must share
+    the same dispatcher (see `AsyncDispatcher.attach`).
+    """
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        backpressure: str = "block",
+        dispatcher: Optional[AsyncDispatcher] = None
+    ):
+        super().__init__()
+        self.dispatcher = AsyncDispatcher(maxsize, backpressure) if dispatcher is None else dispatcher
+
+    def notify(self, *args, info=None, **kwargs):
+        """Queue a notification for the listeners."""
+        self.dispatcher.submit(self, args, kwargs, info)
+
+    def flush(self):
+        """Wait until all the notifications queued so far to the dispatcher were dispatched."""
+        self.dispatcher.flush()
+
+    def close(self):
+        """Close the dispatcher; see `AsyncDispatcher.close`."""
+        self.dispatcher.close()
+
+    def __enter__(self):
         return self
 
-    def notify(self, *args, **kwargs):
-        for listener in self.listeners:
-            listener(*args, **kwargs)
+    def __exit__(self, *exc):
+        self.close()
@@ -1,5 +1,31 @@
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import BinaryIO, Iterable, List, NamedTuple, Optional, Tuple
+
+
+class AddInfo(NamedTuple):
+    """
+    Intermediate data computed by an accumulator manager while adding the k-th element, that is passed to the
+    listeners that subscribe with `with_info=True`, together with `(k, x, r)`, so that they do not need to recompute
+    it. Each manager populates the fields that are defined for its construction, and leaves the others as None.
+    - representatives: the indices of the accumulator values that R_k commits to, sorted by decreasing index;
+    - M: the Merkle root that R_k commits to, that is, R_k = H(x_k || M).
+    """
+    representatives: Optional[List[int]] = None
+    M: Optional[bytes] = None
+
+
+class AccumulatorSnapshot(NamedTuple):
+    """
+    An immutable view of the state of an accumulator manager after the k-th element was added.
+    - k: the number of elements;
+    - root: the value R_k of the accumulator;
+    - S: the state slots of the manager, where S[t] is the accumulator value R_i for the largest i <= k such that
+      zeros(i) == t (empty slots, if any, are None).
+    The values are shared with the manager (they are immutable `bytes`), so only the O(log k) slots are copied.
+    """
+    k: int
+    root: bytes
+    S: Tuple[Optional[bytes], ...]
 
 
 class AbstractAccumulatorManager(ABC):
@@ -9,22 +35,68 @@ class AbstractAccumulatorManager(ABC):
     accordingly.
     Does not hold enough information to produce proofs; instead, whenever a new element is added, it should signal
     to listeners that an element was added, informing them of the new value of the counter, the value of the new
-    element and the new root hash of the accumulator.
+    element and the new root hash of the accumulator. Listeners that subscribe with `with_info=True` also receive an
+    `AddInfo` with the intermediate data that was computed (or None).
+    Elements inserted in bulk with `add_many` are instead signaled once per batch, with the list of the `(k, x, r)`
+    tuples for all the elements of the batch (and, for the listeners with info, the list of the corresponding
+    `AddInfo`s).
     """
     @abstractmethod
     def add(self, element: bytes):
         pass
 
+    @abstractmethod
+    def add_many(self, elements: Iterable[bytes]):
+        """
+        Add all the `elements`, in order. The resulting state must be identical to calling `add` on each element.
+        """
+        pass
+
+    @abstractmethod
+    def snapshot(self) -> AccumulatorSnapshot:
+        """
+        Return an `AccumulatorSnapshot` of the current state, which is not affected by the elements added later.
+        Costs O(log k).
+        """
+        pass
+
+    @abstractmethod
+    def checkpoint(self, path: str) -> None:
+        """Save the state of the accumulator manager to the file at `path`."""
+        pass
+
+    @abstractmethod
+    def restore(self, path: str) -> None:
+        """
+        Replace the state of the accumulator manager with the one saved by `checkpoint` in the file at `path`.
+        Costs O(log k), without computing any hash. Raises `CheckpointError` if the file is corrupted, or was not
+        written by the same kind of accumulator manager, with the same hash backend; the state is then unchanged.
+        """
+        pass
+
 
 class AbstractProver(ABC):
     @abstractmethod
-    def element_added(self, k: int, x: bytes, r: bytes) -> None:
+    def element_added(self, k: int, x: bytes, r: bytes, info: Optional[AddInfo] = None) -> None:
         """
         Listener for events from the accumulator manager.
         Records each added element x with index k, and the corresponding accumulator value r (corresponding to R_k).
+        `info` is the intermediate data computed by the manager, if any.
         """
         pass
 
+    def elements_added(
+        self,
+        records: List[Tuple[int, bytes, bytes]],
+        infos: Optional[List[Optional[AddInfo]]] = None
+    ) -> None:
+        """
+        Listener for batch events from the accumulator manager.
+        Records all the `(k, x, r)` tuples of a batch of elements, in order, with the corresponding `infos`, if any.
+        """
+        for t, (k, x, r) in enumerate(records):
+            self.element_added(k, x, r, None if infos is None else infos[t])
+
     @abstractmethod
     def prove(self, j: int) -> List[bytes]:
         """Produce a witness for the j-th element added to the accumulator."""
@@ -38,6 +110,54 @@ class AbstractProver(ABC):
         """
         pass
 
+    @abstractmethod
+    def plan(self, i: int, j: int) -> List[int]:
+        """
+        Return the indices of the accumulator values that are visited by a witness for the j-th element, starting
+        from the root when the i-th element was added, in order; the first one is i, and the last one is j.
+        Only computed from the indices, without hashing and without using the recorded elements.
+        """
+        pass
+
+    @abstractmethod
+    def proof_size(self, i: int, j: int) -> int:
+        """
+        Return the number of items of the witness that `prove_from(i, j)` would produce.
+        Only computed from the indices, without hashing and without using the recorded elements.
+        """
+        pass
+
+    @abstractmethod
+    def checkpoint(self, path: str) -> None:
+        """Save all the data recorded by the prover to the file at `path`."""
+        pass
+
+    @abstractmethod
+    def restore(self, path: str) -> None:
+        """
+        Record all the data saved by `checkpoint` in the file at `path`. The accumulator manager of this prover must
+        be restored to the same state. Costs O(n) for n recorded elements, without computing any hash. Raises
+        `CheckpointError` if the file is corrupted, or was not written by the same kind of prover, with the same
+        hash backend; the whole checkpoint is validated before recording anything, so the prover is then unchanged.
+        The saved entries are added to the stores of the prover: entries already in the stores are overwritten if
+        they are in the checkpoint, and kept otherwise.
+        """
+        pass
+
+    @abstractmethod
+    def ingest_log(self, stream: BinaryIO, check_every: int = 0, chunk_records: int = 1 << 16) -> int:
+        """
+        Record all the elements and accumulator values in the log read from `stream` (as written by
+        `log.LogWriter`), including the ones added before this prover was created. The log is read `chunk_records`
+        records at a time, and each chunk is written directly to the stores, without recomputing the accumulator.
+        The accumulator manager must already contain all the elements in the log.
+        If `check_every` is positive, the accumulator value of one record every `check_every` is recomputed, and
+        ValueError is raised if it does not match. Each chunk is checked before it is written, so the chunks before
+        the one with the wrong record remain recorded, and nothing after them is.
+        Return the number of records.
+        """
+        pass
+
 
 class AbstractVerifier(ABC):
     @abstractmethod
@@ -48,6 +168,29 @@ class AbstractVerifier(ABC):
         """
         pass
 
+    @abstractmethod
+    def plan(self, i: int, j: int) -> List[int]:
+        """
+        Return the indices of the accumulator values that are visited when verifying a witness for the j-th element
+        against the value of the accumulator after the i-th element was added, in order; the first one is i, and the
+        last one is j.
+        """
+        pass
+
+    @abstractmethod
+    def proof_size(self, i: int, j: int) -> int:
+        """Return the number of items of a valid witness for the j-th element, given the value of the accumulator
+        after the i-th element was added."""
+        pass
+
+    def verify_batch(self, Ri: bytes, i: int, proofs: Iterable[Tuple[int, List[bytes], bytes]]) -> List[bool]:
+        """
+        Verify a batch of proofs against the same value `Ri` of the accumulator after the `i`-th element was added.
+        Each proof is a tuple `(j, w, x)`, with the same meaning as the arguments of `verify`. Return the list of the
+        results of each verification.
+        """
+        return [self.verify(Ri, i, j, w, x) for j, w, x in proofs]
+
 
 class AbstractAccumulatorFactory(ABC):
     @abstractmethod
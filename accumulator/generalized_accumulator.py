@@ -1,8 +1,29 @@
-from typing import List, Callable
+import hashlib
+from typing import BinaryIO, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from .event import Event
-from .merkle import MerkleTree, get_proof_size, merkle_proof_verify
-from .common import H, NIL, is_power_of_2, zeros
-from .factory import AbstractAccumulatorFactory, AbstractAccumulatorManager, AbstractProver, AbstractVerifier
+from .storage import Store, DictStore
+from .checkpoint import CheckpointReader, CheckpointWriter, check_state_slots
+from .log import DEFAULT_CHUNK_RECORDS, ingest_log
+from .merkle import (
+    MerkleTree,
+    get_proof_geometry,
+    get_proof_size,
+    merkle_proof,
+    merkle_root,
+    merkle_root_and_proof,
+    merkle_root_from_proof,
+    get_multiproof_size,
+    merkle_multiproof_verify,
+)
+from .common import HashBackend, SHA256, is_power_of_2, zeros
+from .factory import (
+    AbstractAccumulatorFactory,
+    AbstractAccumulatorManager,
+    AbstractProver,
+    AbstractVerifier,
+    AccumulatorSnapshot,
+    AddInfo,
+)
 
 # This module implements the generalized, parameterized variant of the simple accumulator.
 # Each new accumulator value R_k is defined as:
@@ -13,11 +34,102 @@ from .factory import AbstractAccumulatorFactory, AbstractAccumulatorManager, Abs
 # proof (or revealed) is the one corresponding to the element with the smallest index which is at least j.
 
 
+def get_next_representative(representatives: List[int], j: int) -> int:
+    """Given the representatives of some i > j, sorted by decreasing index, return the position of the smallest one
+    that is at least j, that is, the index of the leaf of M_i that is revealed in a proof for the j-th element."""
+    # binary search, with the invariant representatives[lo] >= j, and representatives[hi] < j if hi < len
+    lo, hi = 0, len(representatives)
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if representatives[mid] >= j:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def get_proof_plan(get_representatives_fn: Callable[[int], List[int]], i: int, j: int) -> List[int]:
+    """Return the indices of the accumulator values that are opened in a proof for the j-th element, starting from
+    the accumulator value R_i, in order. The result starts with i, and ends with j."""
+    assert 1 <= j <= i
+    path = [i]
+    while i > j:
+        representatives = get_representatives_fn(i)
+        i = representatives[get_next_representative(representatives, j)]
+        path.append(i)
+    return path
+
+
+def get_witness_size(get_representatives_fn: Callable[[int], List[int]], i: int, j: int) -> int:
+    """Return the number of items of a proof for the j-th element, starting from the accumulator value R_i: x_i and
+    the root of M_i for each step, plus the revealed leaf of M_i and its Merkle proof if i > j."""
+    assert 1 <= j <= i
+    size = 2
+    while i > j:
+        representatives = get_representatives_fn(i)
+        leaf_index = get_next_representative(representatives, j)
+        size += 3 + get_proof_size(len(representatives), leaf_index)
+        i = representatives[leaf_index]
+    return size
+
+
+def get_proof_tree(
+    get_representatives_fn: Callable[[int], List[int]],
+    i: int,
+    js: Iterable[int]
+) -> Dict[int, Set[int]]:
+    """
+    Return a dictionary that maps the index t of each accumulator value that is opened in a proof for all the
+    elements with indices in `js`, starting from the accumulator value R_i, to the set of the indices of the leaves
+    of the Merkle tree M_t that are opened in the proof.
+    """
+    tree = {i: set()}
+    for j in js:
+        assert 1 <= j <= i
+        t = i
+        while t > j:
+            representatives = get_representatives_fn(t)
+            leaf_index = get_next_representative(representatives, j)
+
+            tree[t].add(leaf_index)
+            t = representatives[leaf_index]
+            tree.setdefault(t, set())
+    return tree
+
+
+# indices whose representatives identify a construction that is not named, see `get_construction_id`
+FINGERPRINT_INDICES = list(range(1, 1025)) + [2**63 - t for t in range(1, 17)]
+
+
+def get_construction_id(get_representatives_fn: Callable[[int], List[int]], construction: Optional[str]) -> str:
+    """
+    Return the identifier of the construction stored in the checkpoints, so that a checkpoint can only be restored
+    with the same representatives function: `construction` if it is given (like "multipointer:2" or "loglog"),
+    otherwise a fingerprint of the representatives of the `FINGERPRINT_INDICES`.
+    """
+    if construction is not None:
+        return construction
+    fingerprint = hashlib.sha256(repr([get_representatives_fn(k) for k in FINGERPRINT_INDICES]).encode())
+    return "custom:" + fingerprint.hexdigest()[:16]
+
+
 class GeneralizedAccumulator(AbstractAccumulatorManager):
-    def __init__(self, get_representatives_fn: Callable[[int], List[int]]):
+    """
+    The accumulator manager of the generalized accumulator. `construction` names the representatives function
+    (as set by the factories), and is stored in the checkpoints; if None, a fingerprint of the function is used.
+    """
+    def __init__(
+        self,
+        get_representatives_fn: Callable[[int], List[int]],
+        hash_backend: HashBackend = SHA256,
+        construction: Optional[str] = None
+    ):
+        self.hash_backend = hash_backend
+        self.construction = construction
         self.k = 0
-        self.S = [NIL]
+        self.S = [hash_backend.NIL]
         self.element_added = Event()
+        self.elements_added = Event()
         self.get_representatives = get_representatives_fn
 
     def __len__(self):
@@ -36,44 +148,149 @@ class GeneralizedAccumulator(AbstractAccumulatorManager):
         and not greater than k.
         Return NIL if i == 0.
         """
-        return NIL if i == 0 else self.S[zeros(i)]
+        return self.hash_backend.NIL if i == 0 else self.S[zeros(i)]
 
     def get_root(self) -> bytes:
         """Return the current value of the accumulator."""
         return self.get_state(self.k)
 
-    def add(self, x: bytes) -> bytes:
-        """Insert the new element `x` into the accumulator."""
-        self.increase_counter()
+    def snapshot(self) -> AccumulatorSnapshot:
+        """Return an immutable view of the current state."""
+        return AccumulatorSnapshot(self.k, self.get_root(), tuple(self.S))
+
+    def checkpoint(self, path: str) -> None:
+        """Save the counter and the state slots to the file at `path`."""
+        with CheckpointWriter(path, self.checkpoint_kind(), self.hash_backend) as writer:
+            writer.int(self.k)
+            writer.digests(self.S)
 
-        prev_states = [self.get_state(x) for x in self.get_representatives(self.k)]
-        mt = MerkleTree(prev_states)
+    def restore(self, path: str) -> None:
+        """Restore the state saved by `checkpoint` in the file at `path`, that must be for the same construction."""
+        with CheckpointReader(path, self.checkpoint_kind(), self.hash_backend) as reader:
+            k, S = reader.int(), reader.digests()
+        check_state_slots(k, S)
+        self.k, self.S = k, S
 
-        result = H(x + mt.root)
+    def checkpoint_kind(self) -> str:
+        return f"GeneralizedAccumulator[{get_construction_id(self.get_representatives, self.construction)}]"
+
+    def add(self, x: bytes) -> bytes:
+        """Insert the new element `x` into the accumulator."""
+        representatives = self.get_representatives(self.k + 1)
+        prev_states = [self.get_state(t) for t in representatives]
+        M_k = merkle_root(prev_states, self.hash_backend)
+        result = self.hash_backend.H(x + M_k)
 
+        self.increase_counter()
         self.S[zeros(self.k)] = result
 
-        self.element_added.notify(self.k, x, result)
+        self.element_added.notify(self.k, x, result, info=AddInfo(representatives, M_k))
         return result
 
+    def add_many(self, elements: Iterable[bytes]) -> bytes:
+        """Insert all the elements in `elements` into the accumulator, in order.
+        The resulting state is identical to calling `add` on each element, but listeners are notified only once
+        through `elements_added`, with the list of `(k, x, r)` tuples of the whole batch.
+        If an exception is raised while adding an element (or by `elements`), the elements before it are completely
+        added, and notified, before the exception is propagated.
+        Return the new value of the accumulator."""
+        hash_backend = self.hash_backend
+        S = self.S
+        get_state = self.get_state
+        get_representatives = self.get_representatives
+        records, infos = [], []
+        try:
+            for x in elements:
+                k = self.k + 1
+                representatives = get_representatives(k)
+                prev_states = [get_state(t) for t in representatives]
+                M_k = merkle_root(prev_states, hash_backend)
+                result = hash_backend.H(x + M_k)
+
+                # the state is only modified once the new value is computed
+                self.increase_counter()
+                S[zeros(k)] = result
+                records.append((k, x, result))
+                infos.append(AddInfo(representatives, M_k))
+        finally:
+            if records:
+                self.elements_added.notify(records, info=infos)
+        return self.get_root()
+
 
 class GeneralizedProver(AbstractProver):
     """
     Listens to updates from a `GeneralizedAccumulator`, and stores the necessary information to create
     witnesses for any element added to the accumulator after this instance is created.
+    The added elements and the accumulator values are kept in `elements_store` and `R_store`, respectively; the roots
+    M_k received from the accumulator are kept in `M_store`, so that the Merkle roots that are not opened in a proof
+    are not recomputed. If not given, a `DictStore` is used.
     """
-    def __init__(self, get_representatives_fn: Callable[[int], List[int]], accumulator: GeneralizedAccumulator):
-        self.elements = dict([(0, NIL)])
-        self.R = dict([(0, NIL)])
+    def __init__(
+        self,
+        get_representatives_fn: Callable[[int], List[int]],
+        accumulator: GeneralizedAccumulator,
+        elements_store: Optional[Store] = None,
+        R_store: Optional[Store] = None,
+        M_store: Optional[Store] = None
+    ):
+        self.elements = DictStore() if elements_store is None else elements_store
+        self.R = DictStore() if R_store is None else R_store
+        self.M = DictStore() if M_store is None else M_store
+        self.hash_backend = accumulator.hash_backend
+        self.elements[0] = self.hash_backend.NIL
+        self.R[0] = self.hash_backend.NIL
         self.get_representatives = get_representatives_fn
         self.accumulator = accumulator
-        accumulator.element_added += self.element_added
+        accumulator.element_added.subscribe(self.element_added, with_info=True)
+        accumulator.elements_added.subscribe(self.elements_added, with_info=True)
 
-    def element_added(self, k: int, x: bytes, r: bytes):
+    def element_added(self, k: int, x: bytes, r: bytes, info: Optional[AddInfo] = None):
         """Listener for events from the accumulator.
-        Records each added element, and the corresponding accumulator value."""
+        Records each added element, the corresponding accumulator value and, if known, the root M_k."""
         self.elements[k] = x
         self.R[k] = r
+        if info is not None and info.M is not None:
+            self.M[k] = info.M
+
+    def get_M_root(self, k: int) -> bytes:
+        """Return the root M_k, recomputing it if it was not received from the accumulator."""
+        if k in self.M:
+            return bytes(self.M[k])
+        return merkle_root([bytes(self.R[t]) for t in self.get_representatives(k)], self.hash_backend)
+
+    def checkpoint(self, path: str) -> None:
+        """Save the recorded elements, accumulator values and roots M_k to the file at `path`."""
+        with CheckpointWriter(path, self.checkpoint_kind(), self.hash_backend) as writer:
+            writer.store_entries([self.elements, self.R, self.M], len(self.accumulator))
+
+    def restore(self, path: str) -> None:
+        """Record the elements, accumulator values and roots M_k saved by `checkpoint` in the file at `path`, that
+        must be for the same construction."""
+        with CheckpointReader(path, self.checkpoint_kind(), self.hash_backend) as reader:
+            reader.check_store_entries(3)
+            reader.store_entries([self.elements, self.R, self.M])
+
+    def checkpoint_kind(self) -> str:
+        construction = get_construction_id(self.get_representatives, self.accumulator.construction)
+        return f"GeneralizedProver[{construction}]"
+
+    def check_record(self, k: int, elements: Optional[Store] = None, R: Optional[Store] = None) -> Optional[bool]:
+        """Recompute R_k from the recorded values, and return whether it matches the recorded one; return None if
+        some of the values are not recorded. The values are read from `elements` and `R`, if given, instead of the
+        stores of the prover."""
+        elements = self.elements if elements is None else elements
+        R = self.R if R is None else R
+        representatives = self.get_representatives(k)
+        if not all(t in R for t in representatives + [k]) or k not in elements:
+            return None
+        M_k = merkle_root([bytes(R[t]) for t in representatives], self.hash_backend)
+        return self.hash_backend.H(bytes(elements[k]) + M_k) == bytes(R[k])
+
+    def ingest_log(self, stream: BinaryIO, check_every: int = 0, chunk_records: int = DEFAULT_CHUNK_RECORDS) -> int:
+        """Record all the elements and accumulator values in the log read from `stream`."""
+        return ingest_log(stream, self.elements, self.R, self.accumulator, self.check_record, check_every,
+                          chunk_records, self.hash_backend)
 
     def prove(self, j: int) -> List[bytes]:
         """Produce a witness for the j-th element added to the accumulator"""
@@ -84,76 +301,223 @@ class GeneralizedProver(AbstractProver):
         the i-th element was added."""
         assert j <= i
 
-        representatives = self.get_representatives(i)
+        w = []
+        while True:
+            representatives = self.get_representatives(i)
+
+            assert all(t in self.elements for t in representatives)
+
+            if i == j:
+                return w + [bytes(self.elements[i]), self.get_M_root(i)]
+
+            prev_states = [bytes(self.R[x]) for x in representatives]
+            leaf_index = get_next_representative(representatives, j)
+            if i in self.M:
+                # only the siblings of the path of the revealed leaf are computed
+                root, proof = bytes(self.M[i]), merkle_proof(prev_states, leaf_index, self.hash_backend)
+            else:
+                root, proof = merkle_root_and_proof(prev_states, leaf_index, self.hash_backend)
+            w += [bytes(self.elements[i]), root, prev_states[leaf_index]]
+            w += proof
 
-        assert all(t in self.elements for t in representatives)
+            i = representatives[leaf_index]
 
-        prev_states = [self.R[x] for x in representatives]
-        mt = MerkleTree(prev_states)
+    def plan(self, i: int, j: int) -> List[int]:
+        """Return the indices of the accumulator values visited by a proof for the j-th element, starting from i."""
+        return get_proof_plan(self.get_representatives, i, j)
 
-        w = [self.elements[i], mt.root]
+    def proof_size(self, i: int, j: int) -> int:
+        """Return the number of items of a proof for the j-th element, starting from i."""
+        return get_witness_size(self.get_representatives, i, j)
 
-        if i > j:
-            next_i = min(rep for rep in representatives if rep >= j)
-            leaf_index = next(leaf_idx for leaf_idx, val in enumerate(representatives) if val == next_i)
-            w.append(mt.get(leaf_index))
-            w += mt.prove_leaf(leaf_index)
+    def prove_many(self, i: int, js: Sequence[int]) -> List[bytes]:
+        """
+        Produce a single witness for all the elements with indices in `js`, starting from the root when the i-th
+        element was added. The witness contains each node of the union of the paths of the individual proofs only
+        once; for each node t, in decreasing order, it contains x_t and the root of M_t, followed by the values of
+        the opened leaves of M_t sorted by leaf index, and by their Merkle multiproof.
+        """
+        tree = get_proof_tree(self.get_representatives, i, js)
+
+        w = []
+        for t in sorted(tree, reverse=True):
+            representatives = self.get_representatives(t)
+
+            assert all(r in self.elements for r in representatives)
 
-            w += self.prove_from(next_i, j)
+            leaf_indices = sorted(tree[t])
+            if not leaf_indices:
+                w += [bytes(self.elements[t]), self.get_M_root(t)]
+                continue
+
+            mt = MerkleTree([bytes(self.R[r]) for r in representatives], self.hash_backend)
+            w += [bytes(self.elements[t]), mt.root]
+            w += [mt.get(leaf_index) for leaf_index in leaf_indices]
+            w += mt.prove_leaves(leaf_indices)
 
         return w
 
 
 class GeneralizedVerifier(AbstractVerifier):
-    def __init__(self, get_representatives_fn: Callable[[int], List[int]]):
+    def __init__(self, get_representatives_fn: Callable[[int], List[int]], hash_backend: HashBackend = SHA256):
         self.get_representatives = get_representatives_fn
+        self.hash_backend = hash_backend
 
     def verify(self, Ri: bytes, i: int, j: int, w: List[bytes], x: bytes) -> bool:
         """
         Verify that `w` is a valid proof that the the `j`-th element added to the accumulator is `x`,
         given that the value of the accumulator after the `i`-th element was added is `Ri`.
         """
+        return self._verify(Ri, i, j, w, x, None)
+
+    def verify_batch(self, Ri: bytes, i: int, proofs: Iterable[Tuple[int, List[bytes], bytes]]) -> List[bool]:
+        """
+        Verify a batch of proofs against the same value `Ri` of the accumulator after the `i`-th element was added.
+        Each proof is a tuple `(j, w, x)`, with the same meaning as the arguments of `verify`. Return the list of the
+        results of each verification.
+        Each distinct hash check and each distinct Merkle proof is only verified once for the whole batch.
+        """
+        checked = {}
+        return [self._verify(Ri, i, j, w, x, checked) for j, w, x in proofs]
+
+    def plan(self, i: int, j: int) -> List[int]:
+        """Return the indices of the accumulator values visited by a proof for the j-th element, starting from i."""
+        return get_proof_plan(self.get_representatives, i, j)
+
+    def proof_size(self, i: int, j: int) -> int:
+        """Return the number of items of a proof for the j-th element, starting from i."""
+        return get_witness_size(self.get_representatives, i, j)
+
+    def _verify(
+        self,
+        Ri: bytes,
+        i: int,
+        j: int,
+        w: List[bytes],
+        x: bytes,
+        checked: Optional[Dict[tuple, tuple]]
+    ) -> bool:
+        """
+        Implementation of `verify`. `checked` maps each pair `(i, R_i)` to a preimage of `R_i` that was already
+        verified, and each triple `(M_i, merkle_tree_size, leaf_index)` to a pair `(leaf, merkle_proof)` that was
+        already verified; it is None if nothing is shared with other proofs. The items of `w` are hashed and
+        compared as they are (for example, as `memoryview`s); they are only copied to `bytes` to be used as keys of
+        `checked`.
+        """
         assert j <= i
 
-        representatives = self.get_representatives(i)
+        pos = 0  # position in w of the data for the current index i
+        while True:
+            if len(w) < pos + 2:
+                print("Witness too short")
+                return False
 
-        if len(w) < 2:
-            print("Witness too short")
-            return False
+            x_i, mt_root = preimage = tuple(w[pos:pos + 2])
 
-        x_i, mt_root = w[0:2]
+            # verify that the hash of x_i concatenated to all the representatives equals Ri
+            key = None if checked is None else (i, bytes(Ri))
+            if key is None or checked.get(key) != preimage:
+                if self.hash_backend.H(b"".join(preimage)) != Ri:
+                    print("Hash did not match")
+                    return False
+                if key is not None:
+                    checked[key] = preimage
 
-        # verify that the hash of x_i concatenated to all the representatives equals Ri
-        if H(x_i + mt_root) != Ri:
-            print("Hash did not match")
-            return False
+            if i == j:
+                return x_i == x
 
-        if i == j:
-            return x_i == x
-        else:  # i > j
+            # i > j
             # find the index of the smallest representative that is >= j
             representatives = self.get_representatives(i)
-            next_repr_index = 0
-            while next_repr_index < len(representatives) - 1 and representatives[next_repr_index+1] >= j:
-                next_repr_index += 1
+            next_repr_index = get_next_representative(representatives, j)
 
             merkle_tree_size = len(representatives)
-            merkle_proof_size = get_proof_size(merkle_tree_size, next_repr_index)
+            merkle_proof_size, directions = get_proof_geometry(merkle_tree_size, next_repr_index)
 
-            leaf = w[2]
-            merkle_proof = w[3:3 + merkle_proof_size]
-            w_rest = w[3 + merkle_proof_size:]
+            if len(w) < pos + 3 + merkle_proof_size:
+                print("Witness too short")
+                return False
+
+            leaf = w[pos + 2]
+            merkle_proof = w[pos + 3:pos + 3 + merkle_proof_size]
+
+            opening = (leaf, tuple(merkle_proof))
+            opening_key = None if checked is None else (bytes(mt_root), merkle_tree_size, next_repr_index)
+            if opening_key is None or checked.get(opening_key) != opening:
+                if merkle_root_from_proof(leaf, directions, merkle_proof, self.hash_backend) != mt_root:
+                    print("Merkle proof failed")
+                    return False
+                if opening_key is not None:
+                    checked[opening_key] = opening
+
+            Ri, i = leaf, representatives[next_repr_index]
+            pos += 3 + merkle_proof_size
+
+    def verify_many(self, Ri: bytes, i: int, js: Sequence[int], w: List[bytes], xs: Sequence[bytes]) -> bool:
+        """
+        Verify that `w` is a valid proof, as produced by `GeneralizedProver.prove_many`, that for each index t, the
+        `js[t]`-th element added to the accumulator is `xs[t]`, given that the value of the accumulator after the
+        `i`-th element was added is `Ri`.
+        """
+        assert len(js) == len(xs)
 
-            if not merkle_proof_verify(mt_root, merkle_tree_size, leaf, next_repr_index, merkle_proof):
-                print("Merkle proof failed")
+        tree = get_proof_tree(self.get_representatives, i, js)
+
+        R = {i: Ri}  # the accumulator values that are known to be correct
+        x = {}  # the verified elements
+        pos = 0
+        for t in sorted(tree, reverse=True):
+            if len(w) < pos + 2:
+                print("Witness too short")
+                return False
+
+            x_t, mt_root = w[pos:pos + 2]
+            pos += 2
+
+            # verify that the hash of x_t concatenated to all the representatives equals R_t
+            if self.hash_backend.H(b"".join((x_t, mt_root))) != R[t]:
+                print("Hash did not match")
                 return False
 
-            return self.verify(leaf, representatives[next_repr_index], j, w_rest, x)
+            x[t] = x_t
+
+            leaf_indices = sorted(tree[t])
+            if leaf_indices:
+                representatives = self.get_representatives(t)
+                merkle_tree_size = len(representatives)
+                merkle_proof_size = get_multiproof_size(merkle_tree_size, leaf_indices)
+                if len(w) < pos + len(leaf_indices) + merkle_proof_size:
+                    print("Witness too short")
+                    return False
+
+                leaves = dict(zip(leaf_indices, w[pos:pos + len(leaf_indices)]))
+                pos += len(leaf_indices)
+                merkle_proof = w[pos:pos + merkle_proof_size]
+                pos += merkle_proof_size
+
+                if not merkle_multiproof_verify(mt_root, merkle_tree_size, leaves, merkle_proof, self.hash_backend):
+                    print("Merkle proof failed")
+                    return False
+
+                for leaf_index, leaf in leaves.items():
+                    if R.setdefault(representatives[leaf_index], leaf) != leaf:
+                        print("Inconsistent accumulator values")
+                        return False
+
+        if pos != len(w):
+            print("Wrong witness size")
+            return False
+
+        return all(x[j] == x_j for j, x_j in zip(js, xs))
 
 
 class GeneralizedAccumulatorFactory(AbstractAccumulatorFactory):
-    def create_accumulator(self, get_representatives_fn: Callable[[int], List[int]],):
-        accumulator_manager = GeneralizedAccumulator(get_representatives_fn)
+    def create_accumulator(
+        self,
+        get_representatives_fn: Callable[[int], List[int]],
+        hash_backend: HashBackend = SHA256
+    ):
+        accumulator_manager = GeneralizedAccumulator(get_representatives_fn, hash_backend)
         prover = GeneralizedProver(get_representatives_fn, accumulator_manager)
-        verifier = GeneralizedVerifier(get_representatives_fn)
+        verifier = GeneralizedVerifier(get_representatives_fn, hash_backend)
         return accumulator_manager, prover, verifier
@@ -0,0 +1,229 @@
+import functools
+import sys
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from . import generalized_accumulator, merkle, simple_accumulator, smart_accumulator
+from .common import HashBackend
+
+# Opt-in instrumentation of the number of hashes and other basic operations performed by accumulators, provers and
+# verifiers.
+#
+# While an `instrument()` context is active, the hash function of all the `HashBackend`s, the construction of Merkle
+# trees, `MerkleTree.fix_up`, the functions computing each step of a proof and the public entry points of the
+# accumulator managers, provers and verifiers are replaced by counting wrappers; the original functions are restored
+# when the context exits. Therefore, there is no cost at all when instrumentation is not active.
+# Functions are listed below at their definition site; every module of this package that imported them is patched as
+# well, so that calls through the imported names are counted too.
+#
+# Instrumentation is global and not thread-safe: it should only be used while a single thread is running operations.
+
+ENTRY_POINTS = [
+    (simple_accumulator.SimpleAccumulator, ["add", "add_many"]),
+    (simple_accumulator.SimpleProver, ["prove", "prove_from", "prove_many"]),
+    (simple_accumulator.SimpleVerifier, ["verify", "verify_batch", "verify_many"]),
+    (smart_accumulator.SmartAccumulator, ["add", "add_many"]),
+    (smart_accumulator.SmartProver, ["prove", "prove_from"]),
+    (smart_accumulator.SmartVerifier, ["verify", "verify_batch"]),
+    (generalized_accumulator.GeneralizedAccumulator, ["add", "add_many"]),
+    (generalized_accumulator.GeneralizedProver, ["prove", "prove_from", "prove_many"]),
+    (generalized_accumulator.GeneralizedVerifier, ["verify", "verify_batch", "verify_many"]),
+]
+
+# functions computing a Merkle tree, its root, or a proof, from a list of leaves; each outermost call is one tree
+MERKLE_TREE_FUNCTIONS = [
+    (merkle, "make_tree"),
+    (merkle.MerkleTree, "_build"),
+    (merkle, "merkle_root"),
+    (merkle, "merkle_root_and_proof"),
+    (merkle, "merkle_proof"),
+]
+
+# functions computing the next node of the path of a proof; each call is one level of depth
+STEP_FUNCTIONS = [
+    (simple_accumulator, "get_next_index"),
+    (smart_accumulator, "get_next_index"),
+    (generalized_accumulator, "get_next_representative"),
+]
+
+# functions that only compute the shape of a proof (for `plan` and `proof_size`); their steps are not counted
+SHAPE_FUNCTIONS = [
+    (simple_accumulator, "get_proof_plan"),
+    (simple_accumulator, "get_witness_size"),
+    (smart_accumulator, "get_proof_plan"),
+    (smart_accumulator, "get_witness_size"),
+    (generalized_accumulator, "get_proof_plan"),
+    (generalized_accumulator, "get_witness_size"),
+]
+
+
+class Counters:
+    """
+    Counts of the basic operations performed:
+    - hashes: number of invocations of the hash function;
+    - bytes_hashed: total length of the hashed inputs;
+    - merkle_trees: number of Merkle trees built from a list of leaves, or whose root or proof was computed from a
+      list of leaves;
+    - fix_ups: number of invocations of `MerkleTree.fix_up`, that is, of updates of a path of a Merkle tree;
+    - depth: number of levels of proofs that were traversed, either to produce or to verify them. For a single proof,
+      it is the depth of the recursion in the definition of the witness.
+    """
+    FIELDS = ["hashes", "bytes_hashed", "merkle_trees", "fix_ups", "depth"]
+
+    def __init__(self):
+        self.hashes = 0
+        self.bytes_hashed = 0
+        self.merkle_trees = 0
+        self.fix_ups = 0
+        self.depth = 0
+
+    def __repr__(self) -> str:
+        return "Counters(" + ", ".join(f"{field}={getattr(self, field)}" for field in self.FIELDS) + ")"
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Counters) and all(getattr(self, f) == getattr(other, f) for f in self.FIELDS)
+
+
+class Instrumentation:
+    """
+    The state of an active instrumentation context.
+    `total` counts all the operations performed while the context is active; `last` is the pair (name, counters) for
+    the last completed operation, where the name is of the form "ClassName.method".
+    Only outermost operations are reported: for example, the work done by `prove_from` when called by `prove` is only
+    reported as part of `prove`.
+    """
+    def __init__(self, callback: Optional[Callable[[str, Counters], None]] = None):
+        self.callback = callback
+        self.total = Counters()
+        self.last: Optional[Tuple[str, Counters]] = None
+        self.current: Optional[Counters] = None
+        self.patches: List[Tuple[object, str, object]] = []
+        self.tree_nesting = 0  # calls to MERKLE_TREE_FUNCTIONS in progress
+        self.shape_nesting = 0  # calls to SHAPE_FUNCTIONS in progress
+
+    def count(self, field: str, amount: int = 1) -> None:
+        setattr(self.total, field, getattr(self.total, field) + amount)
+        if self.current is not None:
+            setattr(self.current, field, getattr(self.current, field) + amount)
+
+    def patch(self, owner: object, name: str, make_wrapper: Callable[[Callable], Callable]) -> None:
+        """Replace the attribute `name` of `owner` with `make_wrapper(original)`. If `owner` is a module, also replace
+        all the attributes of the modules of this package that refer to the same original function."""
+        original = owner.__dict__[name]
+        wrapper = functools.wraps(original)(make_wrapper(original))
+        owners = [(owner, name)]
+        if not isinstance(owner, type):
+            owners += [(module, attr) for module, attr in self.aliases.get(id(original), []) if module is not owner]
+        for target, attr in owners:
+            self.patches.append((target, attr, original))
+            setattr(target, attr, wrapper)
+
+    def install(self) -> None:
+        # the attributes of the modules of this package that refer to functions, indexed by the id of the function
+        self.aliases: Dict[int, List[Tuple[object, str]]] = {}
+        package = __name__.rpartition(".")[0]
+        for module_name, module in list(sys.modules.items()):
+            if module_name.startswith(package + "."):
+                for attr, value in vars(module).items():
+                    if callable(value):
+                        self.aliases.setdefault(id(value), []).append((module, attr))
+
+        def wrap_hash(original):
+            def H(backend, x):
+                self.count("hashes")
+                self.count("bytes_hashed", len(x.encode("utf8") if isinstance(x, str) else x))
+                return original(backend, x)
+            return H
+        self.patch(HashBackend, "H", wrap_hash)
+
+        def wrap_make_tree(original):
+            def make_tree(*args, **kwargs):
+                if self.tree_nesting == 0:
+                    self.count("merkle_trees")
+                self.tree_nesting += 1
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.tree_nesting -= 1
+            return make_tree
+        for owner, name in MERKLE_TREE_FUNCTIONS:
+            self.patch(owner, name, wrap_make_tree)
+
+        def wrap_fix_up(original):
+            def fix_up(*args, **kwargs):
+                self.count("fix_ups")
+                return original(*args, **kwargs)
+            return fix_up
+        self.patch(merkle.MerkleTree, "fix_up", wrap_fix_up)
+
+        def wrap_step(original):
+            def step(*args, **kwargs):
+                if self.shape_nesting == 0:
+                    self.count("depth")
+                return original(*args, **kwargs)
+            return step
+        for module, name in STEP_FUNCTIONS:
+            self.patch(module, name, wrap_step)
+
+        def wrap_shape(original):
+            def shape(*args, **kwargs):
+                self.shape_nesting += 1
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    self.shape_nesting -= 1
+            return shape
+        for module, name in SHAPE_FUNCTIONS:
+            self.patch(module, name, wrap_shape)
+
+        for cls, methods in ENTRY_POINTS:
+            for method in methods:
+                self.patch(cls, method, functools.partial(self.wrap_operation, f"{cls.__name__}.{method}"))
+
+    def wrap_operation(self, name: str, original: Callable) -> Callable:
+        def operation(*args, **kwargs):
+            if self.current is not None:
+                return original(*args, **kwargs)  # nested operation, counted as part of the outermost one
+
+            self.current = counters = Counters()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.current = None
+                self.last = (name, counters)
+                if self.callback is not None:
+                    self.callback(name, counters)
+        return operation
+
+    def uninstall(self) -> None:
+        for owner, name, original in reversed(self.patches):
+            setattr(owner, name, original)
+        self.patches = []
+
+
+_active: Optional[Instrumentation] = None
+
+
+@contextmanager
+def instrument(callback: Optional[Callable[[str, Counters], None]] = None) -> Iterator[Instrumentation]:
+    """
+    Context manager that enables the instrumentation while it is active, and yields the `Instrumentation` object with
+    the counters. If `callback` is given, it is called as `callback(name, counters)` after each operation.
+
+    Example:
+        with instrument() as stats:
+            prover.prove(j)
+        print(stats.last)  # ("SimpleProver.prove", Counters(hashes=0, ...))
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("Instrumentation is already active")
+
+    instrumentation = Instrumentation(callback)
+    instrumentation.install()
+    _active = instrumentation
+    try:
+        yield instrumentation
+    finally:
+        _active = None
+        instrumentation.uninstall()
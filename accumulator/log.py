@@ -0,0 +1,129 @@
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .common import HashBackend, SHA256
+from .factory import AbstractAccumulatorManager
+from .storage import Store
+
+# Logs of the elements added to an accumulator, that allow a new prover to record all the elements that were added
+# before it was created, without recomputing the accumulator.
+#
+# A log is a sequence of fixed-width records, one for each added element, in the order they were added. Each record
+# is the index k (8 bytes, big endian), followed by the element x_k and by the accumulator value R_k. Therefore, only
+# elements with the same size as the digests of the hash function can be logged.
+
+DEFAULT_CHUNK_RECORDS = 1 << 16
+
+
+class LogWriter:
+    """
+    Listens to an accumulator manager, and appends a record to `stream` for each added element.
+    Raises ValueError if an element does not have the size of a digest, without writing anything for it (or for
+    any element of its batch); the manager has already added the element, so the log cannot be completed anymore.
+    """
+    def __init__(self, stream: BinaryIO, accumulator: AbstractAccumulatorManager):
+        self.stream = stream
+        self.digest_size = accumulator.hash_backend.digest_size
+        accumulator.element_added += self.element_added
+        accumulator.elements_added += self.elements_added
+
+    def check_element(self, k: int, x: bytes) -> None:
+        if len(x) != self.digest_size:
+            raise ValueError(f"Cannot log the element with index {k}: it has {len(x)} bytes instead of "
+                             f"{self.digest_size}")
+
+    def element_added(self, k: int, x: bytes, r: bytes) -> None:
+        self.check_element(k, x)
+        self.stream.write(k.to_bytes(8, "big") + x + r)
+
+    def elements_added(self, records: List[Tuple[int, bytes, bytes]]) -> None:
+        for k, x, _ in records:
+            self.check_element(k, x)
+        self.stream.write(b"".join(k.to_bytes(8, "big") + x + r for k, x, r in records))
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def read_log(
+    stream: BinaryIO,
+    digest_size: int = 32,
+    chunk_records: int = DEFAULT_CHUNK_RECORDS
+) -> Iterator[List[Tuple[int, bytes, bytes]]]:
+    """Read the records of a log from `stream`, reading `chunk_records` records at a time. Yield the list of the
+    `(k, x, r)` tuples of each chunk. Raise ValueError if the log ends with an incomplete record."""
+    record_size = 8 + 2 * digest_size
+    while True:
+        data = stream.read(chunk_records * record_size)
+        if not data:
+            return
+        if len(data) % record_size != 0:
+            raise ValueError("Truncated log")
+        yield [
+            (
+                int.from_bytes(data[pos:pos + 8], "big"),
+                data[pos + 8:pos + 8 + digest_size],
+                data[pos + 8 + digest_size:pos + record_size]
+            )
+            for pos in range(0, len(data), record_size)
+        ]
+
+
+class StoreOverlay(Store):
+    """
+    A read-only view of `store`, where the values in `values` take precedence. Used to check the records of a chunk
+    of a log before writing them to the store.
+    """
+    def __init__(self, store: Store, values: Dict[int, bytes]):
+        self.store = store
+        self.values = values
+
+    def __getitem__(self, k: int) -> bytes:
+        value = self.values.get(k)
+        return self.store[k] if value is None else value
+
+    def __setitem__(self, k: int, value: bytes) -> None:
+        raise TypeError("StoreOverlay is read-only")
+
+    def __contains__(self, k: int) -> bool:
+        return k in self.values or k in self.store
+
+
+def ingest_log(
+    stream: BinaryIO,
+    elements: Store,
+    R: Store,
+    accumulator: AbstractAccumulatorManager,
+    check_record: Callable[[int, Store, Store], Optional[bool]],
+    check_every: int = 0,
+    chunk_records: int = DEFAULT_CHUNK_RECORDS,
+    hash_backend: HashBackend = SHA256
+) -> int:
+    """
+    Implementation of `ingest_log` for the provers, that record the elements and the accumulator values in the stores
+    `elements` and `R`, respectively. `check_record(k, elements, R)` recomputes R_k from the values in the given
+    stores, and returns whether it matches, or None if some of the values it depends on are missing. The sampled
+    records of each chunk are checked before the chunk is written.
+    Return the number of ingested records.
+    """
+    n = len(accumulator)
+    count = 0
+    for chunk in read_log(stream, hash_backend.digest_size, chunk_records):
+        for k, _, r in chunk:
+            if not 1 <= k <= n:
+                raise ValueError(f"Invalid index {k} for an accumulator with {n} elements")
+            if k == n and r != accumulator.get_root():
+                raise ValueError(f"Wrong accumulator value for the element with index {k}")
+
+        chunk_elements = {k: x for k, x, _ in chunk}
+        chunk_R = {k: r for k, _, r in chunk}
+        if check_every > 0:
+            elements_view, R_view = StoreOverlay(elements, chunk_elements), StoreOverlay(R, chunk_R)
+            for t in range((-count) % check_every, len(chunk), check_every):
+                k = chunk[t][0]
+                if check_record(k, elements_view, R_view) is False:
+                    raise ValueError(f"Wrong accumulator value for the element with index {k}")
+
+        elements.update(chunk_elements.items())
+        R.update(chunk_R.items())
+        count += len(chunk)
+    return count
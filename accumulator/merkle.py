@@ -1,5 +1,6 @@
-from .common import H, NIL, is_power_of_2, ceil_lg, largest_power_of_2_less_than
-from typing import List
+from .common import HashBackend, SHA256, is_power_of_2, largest_power_of_2_less_than
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
 
 
 # root is the only node with parent == None
@@ -11,10 +12,10 @@ class Node:
         self.parent = parent
         self.value = value
 
-    def recompute_value(self):
+    def recompute_value(self, hash_backend: HashBackend = SHA256):
         assert self.left is not None
         assert self.right is not None
-        self.value = H(self.left.value + self.right.value)
+        self.value = hash_backend.H(self.left.value + self.right.value)
 
     def sibling(self):
         if self.parent is None:
@@ -28,8 +29,8 @@ class Node:
             raise IndexError("Invalid state: not a child of his parent.")
 
 
-def make_tree(leaves: List[Node], begin: int, size: int) -> Node:
-    """Given a list of nodes, builds the left-complete Merkle tree on top of it.
+def make_tree(leaves: List[Node], begin: int, size: int, hash_backend: HashBackend = SHA256) -> Node:
+    """Given a list of nodes, builds the left-complete Merkle tree on top of it, using the given hash function.
     The nodes in `leaves` are modified by setting their `parent` field appropriately.
     It returns the root of the newly built tree.
     """
@@ -39,10 +40,10 @@ def make_tree(leaves: List[Node], begin: int, size: int) -> Node:
 
     lchild_size = largest_power_of_2_less_than(size)
 
-    lchild = make_tree(leaves, begin, lchild_size)
-    rchild = make_tree(leaves, begin + lchild_size, size - lchild_size)
+    lchild = make_tree(leaves, begin, lchild_size, hash_backend)
+    rchild = make_tree(leaves, begin + lchild_size, size - lchild_size, hash_backend)
     root = Node(lchild, rchild, None, None)
-    root.recompute_value()
+    root.recompute_value(hash_backend)
     lchild.parent = rchild.parent = root
     return root
 
@@ -60,66 +61,124 @@ class MerkleTree:
     - There are always n - 1 internal nodes; all the internal nodes have exactly two children.
     - If a subtree has n > 1 leaves, then the left subchild is a complete subtree with p leaves, where p is the largest
       power of 2 smaller than n.
+
+    Equivalently, if n = 2^h_0 + 2^h_1 + ... + 2^h_(m-1) with h_0 > h_1 > ... > h_(m-1), the tree is made of m complete
+    subtrees (the "peaks") with 2^h_0, ..., 2^h_(m-1) leaves, from left to right, joined by a "spine" of m - 1 nodes:
+    the t-th node of the spine has the t-th peak as its left child, and the (t+1)-th node of the spine as its right
+    child (or the last peak, for the last node of the spine).
+
+    No node objects are stored: `levels[h]` is the list of the values of all the complete subtrees with 2^h leaves
+    (the i-th one has the leaves with indices in [i * 2^h, (i + 1) * 2^h)), and `spine` is the list of the values of
+    the nodes of the spine. The children of the i-th node of `levels[h]` are the nodes 2i and 2i + 1 of
+    `levels[h - 1]`, so navigating the tree only requires index arithmetic.
+
+    The hash function is the one of `hash_backend`; the root of the empty tree is its NIL value.
     """
-    def __init__(self, elements: List[bytes] = []):
+    def __init__(self, elements: List[bytes] = [], hash_backend: HashBackend = SHA256):
+        self.hash_backend = hash_backend
+        self.size = 0
+        self.levels = [[]]
+        self.spine = []
+        self.peaks = []  # heights of the peaks, in decreasing order
         if elements:
-            self.leaves = [Node(None, None, None, el) for el in elements]
-            self.root_node = make_tree(self.leaves, 0, len(elements))
-            self.depth = ceil_lg(len(elements))
+            self._build(elements)
+
+    def _build(self, elements: List[bytes]) -> None:
+        """Compute all the nodes of the tree with the given leaves, all at once."""
+        self.extend(elements)
+
+    def _update_peaks(self) -> None:
+        """Recompute the heights h_0 > h_1 > ... of the peaks, after the number of leaves changed."""
+        self.peaks = [h for h in range(self.size.bit_length() - 1, -1, -1) if (self.size >> h) & 1]
+
+    def _peak(self, h: int) -> bytes:
+        """Return the value of the peak of height h."""
+        return self.levels[h][(self.size >> h) - 1]
+
+    def _compute_spine(self, t: int) -> None:
+        """Recompute the nodes of the spine with index up to `t`, that is, the ones that are ancestors of the t-th
+        peak."""
+        peaks, spine, levels, size = self.peaks, self.spine, self.levels, self.size
+        if len(spine) != len(peaks) - 1:
+            spine = self.spine = [None] * (len(peaks) - 1)
+        if len(spine) == 0:
+            return
+
+        H = self.hash_backend.H
+        if t + 1 < len(spine):
+            right = spine[t + 1]
         else:
-            self.leaves = []
-            self.root_node = None
-            self.depth = None
+            t = len(spine) - 1
+            right = levels[peaks[-1]][(size >> peaks[-1]) - 1]
+        for s in range(t, -1, -1):
+            h = peaks[s]
+            right = spine[s] = H(levels[h][(size >> h) - 1] + right)
 
     def __len__(self) -> int:
         """Return the total number of leaves in the tree."""
-        return len(self.leaves)
+        return self.size
 
     @property
     def root(self) -> bytes:
-        """Return the Merkle root, or None if the tree is empty."""
-        return NIL if self.root_node is None else self.root_node.value
+        """Return the Merkle root, or NIL if the tree is empty."""
+        if self.size == 0:
+            return self.hash_backend.NIL
+        elif len(self.spine) > 0:
+            return self.spine[0]
+        else:
+            return self._peak(self.peaks[0])
 
     def copy(self):
         """Return an identical copy of this Merkle tree."""
-        return MerkleTree([leaf.value for leaf in self.leaves])
+        result = MerkleTree([], self.hash_backend)
+        result.size = self.size
+        result.levels = [list(level) for level in self.levels]
+        result.spine = list(self.spine)
+        result.peaks = list(self.peaks)
+        return result
 
     def add(self, x: bytes) -> None:
         """Add an element as new leaf, and recompute the tree accordingly. Cost O(log n)."""
-
-        new_leaf = Node(None, None, None, x)
-        self.leaves.append(new_leaf)
-        if len(self.leaves) == 1:
-            self.root_node = new_leaf
-            self.depth = 0
+        levels = self.levels
+        levels[0].append(x)
+        self.size += 1
+
+        # compute the new complete subtrees, that is, the ones whose last leaf is the new one
+        h = 1
+        while self.size & ((1 << h) - 1) == 0:
+            if h == len(levels):
+                levels.append([])
+            prev = levels[h - 1]
+            levels[h].append(self.hash_backend.H(prev[-2] + prev[-1]))
+            h += 1
+
+        # the peaks changed, therefore all the spine needs to be recomputed
+        self._update_peaks()
+        self._compute_spine(len(self.peaks) - 1)
+
+    def extend(self, values: Iterable[bytes]) -> None:
+        """
+        Add all the given values as new leaves, and recompute the tree accordingly. Each new internal node is computed
+        exactly once, so the cost is O(k + log n) hashes for k new leaves, instead of O(k log n) for k calls to `add`.
+        """
+        H, levels = self.hash_backend.H, self.levels
+        old_size = self.size
+        levels[0].extend(values)
+        self.size = len(levels[0])
+        if self.size == old_size:
             return
 
-        # add a new leaf
-        if self.depth == 0:
-            ltree_size = 0
-        else:
-            ltree_size = 1 << (self.depth - 1)  # number of leaves of the left subtree of cur_root
-
-        cur_root = self.root_node
-        cur_root_size = len(self.leaves) - 1
-
-        while not is_power_of_2(cur_root_size):
-            cur_root = cur_root.right
-            cur_root_size -= ltree_size
-            ltree_size /= 2
-
-        new_node = Node(cur_root, new_leaf, cur_root.parent, None)  # node value will be computed later
-        if cur_root.parent is None:
-            # replacing the root
-            self.depth += 1
-            self.root_node = new_node
-        else:
-            assert cur_root.parent.right == cur_root
-            cur_root.parent.right = new_node
-        cur_root.parent = new_node
-        new_leaf.parent = new_node
+        h = 1
+        while self.size >> h > 0:
+            if h == len(levels):
+                levels.append([])
+            prev, level = levels[h - 1], levels[h]
+            for i in range(old_size >> h, self.size >> h):
+                level.append(H(prev[2 * i] + prev[2 * i + 1]))
+            h += 1
 
-        self.fix_up(new_node)
+        self._update_peaks()
+        self._compute_spine(len(self.peaks) - 1)
 
     def set(self, index: int, x: bytes) -> None:
         """
@@ -128,87 +187,434 @@ class MerkleTree:
 
         Cost: Worst case O(log n).
         """
-        assert 0 <= index <= len(self.leaves)
+        assert 0 <= index <= self.size
 
-        if index == len(self.leaves):
+        if index == self.size:
             self.add(x)
         else:
-            self.leaves[index].value = x
-            self.fix_up(self.leaves[index].parent)
+            self.levels[0][index] = x
+            self.fix_up(index)
+
+    def set_many(self, values: Dict[int, bytes]) -> None:
+        """
+        Set the value of the leaf at position `index` to `values[index]` for each key `index` of `values`, where
+        0 <= index < len(self), recomputing the tree accordingly.
+        The ancestors of all the changed leaves are recomputed in a single pass, so each of them is computed exactly
+        once, even if it is an ancestor of several of the changed leaves.
+        """
+        if len(values) == 0:
+            return
 
-    def fix_up(self, node: Node):
-        while node is not None:
-            node.recompute_value()
-            node = node.parent
+        H, levels, size = self.hash_backend.H, self.levels, self.size
+        for index, x in values.items():
+            assert 0 <= index < size
+            levels[0][index] = x
+
+        # the dirty nodes of each level are the parents of the dirty nodes of the level below, as long as they are
+        # in a complete subtree
+        dirty = set(values)
+        for h in range(1, len(levels)):
+            level, prev = levels[h], levels[h - 1]
+            dirty = {i >> 1 for i in dirty if i >> 1 < len(level)}
+            if len(dirty) == 0:
+                break
+            for i in dirty:
+                level[i] = H(prev[2 * i] + prev[2 * i + 1])
+
+        if len(self.spine) > 0:
+            # the leaf with the largest index is in the rightmost changed peak
+            index = max(values)
+            self._compute_spine(bin(size >> (size ^ index).bit_length()).count("1"))
+
+    def fix_up(self, index: int) -> None:
+        """Recompute the values of all the ancestors of the leaf with index `index`."""
+        H, levels, size = self.hash_backend.H, self.levels, self.size
+        h = (size ^ index).bit_length() - 1  # height of the peak containing the leaf
+        for level in range(1, h + 1):
+            i = index >> level
+            prev = levels[level - 1]
+            levels[level][i] = H(prev[2 * i] + prev[2 * i + 1])
+        if len(self.spine) > 0:
+            self._compute_spine(bin(size >> (h + 1)).count("1"))
 
     def get(self, i: int) -> bytes:
         """Return the value of the leaf with index `i`, where 0 <= i < len(self)."""
-        return self.leaves[i].value
+        assert 0 <= i < self.size
+        return self.levels[0][i]
 
     def prove_leaf(self, index: int) -> List[bytes]:
         """Produce a proof of membership for the leaf with index `i`, where 0 <= i < len(self)."""
-        node = self.leaves[index]
+        assert 0 <= index < self.size
+
+        levels, size = self.levels, self.size
+
+        # siblings inside the peak of height h that contains the leaf
+        h = (size ^ index).bit_length() - 1
         proof = []
-        while node.parent is not None:
-            sibling = node.sibling()
-            assert sibling is not None
+        for level in range(h):
+            proof.append(levels[level][(index >> level) ^ 1])
+
+        # siblings in the spine; the peak is the t-th one
+        spine = self.spine
+        if len(spine) > 0:
+            peaks = self.peaks
+            t = bin(size >> (h + 1)).count("1")
+            if t + 1 < len(spine):
+                proof.append(spine[t + 1])
+            elif t < len(spine):
+                proof.append(levels[peaks[-1]][(size >> peaks[-1]) - 1])
+            for s in range(t - 1, -1, -1):
+                proof.append(levels[peaks[s]][(size >> peaks[s]) - 1])
+
+        return proof
+
+    def _subtree_value(self, begin: int, size: int) -> bytes:
+        """Return the value of the subtree containing the leaves in [begin, begin + size); it must be either a
+        complete subtree, or the subtree rooted at a node of the spine."""
+        if is_power_of_2(size) and begin % size == 0:
+            h = size.bit_length() - 1
+            return self.levels[h][begin >> h]
+        else:
+            return self.spine[bin(begin).count("1")]
 
-            proof.append(sibling.value)
+    def prove_leaves(self, indices: Iterable[int]) -> List[bytes]:
+        """
+        Produce a proof of membership for all the leaves with the given indices (a multiproof). The proof contains
+        the values of the minimal set of nodes that are needed to recompute the root from the leaves, that is, the
+        maximal subtrees that contain none of the leaves, sorted from left to right.
+        """
+        indices = sorted(set(indices))
+        assert len(indices) > 0 and 0 <= indices[0] and indices[-1] < self.size
 
-            node = node.parent
+        proof = []
 
+        def visit(begin: int, size: int, lo: int, hi: int):
+            # indices[lo:hi] are the indices of the leaves in the subtree with the leaves in [begin, begin + size)
+            if lo == hi:
+                proof.append(self._subtree_value(begin, size))
+            elif size > 1:
+                lchild_size = largest_power_of_2_less_than(size)
+                mid = bisect_left(indices, begin + lchild_size, lo, hi)
+                visit(begin, lchild_size, lo, mid)
+                visit(begin + lchild_size, size - lchild_size, mid, hi)
+
+        visit(0, self.size, 0, len(indices))
         return proof
 
 
-def get_directions(size: int, index: int) -> List[bool]:
+class PersistentMerkleTree:
     """
-    Returns an array of booleans indicating the directions of tree edges in the path from the root to the node with
-    the given index in a Merkle tree of the given size.
+    An immutable version of `MerkleTree`, with the same shape and the same root and proofs for the same leaves.
+    Updating a leaf returns a new tree and leaves the original unchanged; the two trees share all the nodes except
+    the O(log n) nodes in the path from the root to the updated leaf, which are the only ones that are recomputed.
+    Nodes of a persistent tree never have their `parent` field set.
     """
+    def __init__(self, elements: List[bytes] = [], hash_backend: HashBackend = SHA256):
+        self.hash_backend = hash_backend
+        if elements:
+            leaves = [Node(None, None, None, el) for el in elements]
+            self.root_node = make_tree(leaves, 0, len(elements), hash_backend)
+            self._clear_parents(self.root_node)
+        else:
+            self.root_node = None
+        self.size = len(elements)
+
+    @classmethod
+    def _clear_parents(cls, node: Node):
+        if node.left is not None:
+            node.left.parent = node.right.parent = None
+            cls._clear_parents(node.left)
+            cls._clear_parents(node.right)
+
+    @classmethod
+    def _from_root(cls, root_node: Node, size: int, hash_backend: HashBackend):
+        result = cls([], hash_backend)
+        result.root_node = root_node
+        result.size = size
+        return result
 
-    assert size > 0
-    assert 0 <= index < size
+    def __len__(self) -> int:
+        """Return the total number of leaves in the tree."""
+        return self.size
 
-    directions = []
-    if size == 1:
-        return directions
+    @property
+    def root(self) -> bytes:
+        """Return the Merkle root, or NIL if the tree is empty."""
+        return self.hash_backend.NIL if self.root_node is None else self.root_node.value
 
-    while size > 1:
-        depth = ceil_lg(size)
+    def set(self, index: int, x: bytes):
+        """
+        Return a new tree where the leaf at position `index` has value `x`. If `index` equals the current number of
+        leaves, then the new tree has `x` as a new leaf. Cost: O(log n).
+        """
+        assert 0 <= index <= self.size
+
+        return PersistentMerkleTree._from_root(
+            self._set(self.root_node, self.size, index, x),
+            self.size + 1 if index == self.size else self.size,
+            self.hash_backend
+        )
+
+    def _set(self, node: Node, size: int, index: int, x: bytes) -> Node:
+        """Return the root of a copy of the subtree rooted at `node` with `size` leaves, where the leaf at position
+        `index` is replaced with (or, if `index == size`, extended with) a new leaf with value `x`."""
+        if index == size and (size == 0 or is_power_of_2(size)):
+            new_leaf = Node(None, None, None, x)
+            if size == 0:
+                return new_leaf
+            new_node = Node(node, new_leaf, None, None)
+        elif size == 1:
+            return Node(None, None, None, x)
+        else:
+            lchild_size = largest_power_of_2_less_than(size)
+            if index < lchild_size:
+                new_node = Node(self._set(node.left, lchild_size, index, x), node.right, None, None)
+            else:
+                new_right = self._set(node.right, size - lchild_size, index - lchild_size, x)
+                new_node = Node(node.left, new_right, None, None)
+        new_node.recompute_value(self.hash_backend)
+        return new_node
+
+    def _path(self, index: int) -> List[Node]:
+        """Return the list of nodes from the root to the leaf with index `index`."""
+        assert 0 <= index < self.size
+
+        node = self.root_node
+        size = self.size
+        path = [node]
+        while size > 1:
+            lchild_size = largest_power_of_2_less_than(size)
+            if index < lchild_size:
+                node, size = node.left, lchild_size
+            else:
+                node, size, index = node.right, size - lchild_size, index - lchild_size
+            path.append(node)
+        return path
+
+    def get(self, index: int) -> bytes:
+        """Return the value of the leaf with index `index`, where 0 <= index < len(self)."""
+        return self._path(index)[-1].value
 
-        # bitmask of the direction from the current node; also the number of leaves of the left subtree
-        mask = 1 << (depth - 1)
+    def prove_leaf(self, index: int) -> List[bytes]:
+        """Produce a proof of membership for the leaf with index `index`, where 0 <= index < len(self).
+        No hash is computed."""
+        path = self._path(index)
+        proof = []
+        for parent, child in zip(reversed(path[:-1]), reversed(path[1:])):
+            proof.append(parent.right.value if parent.left is child else parent.left.value)
+        return proof
 
-        right_child = index & mask != 0
-        directions.append(right_child)
 
-        if right_child:
-            size -= mask
-            index -= mask
-        else:
-            size = mask
-        mask //= 2
+def get_proof_geometry(size: int, index: int) -> Tuple[int, int]:
+    """
+    Return the pair `(proof_size, directions)` for the leaf with the given index in a Merkle tree of the given size,
+    where `proof_size` is the length of the path from the leaf to the root, and bit t of `directions` is 1 if the
+    t-th node of that path (starting from the leaf) is a right child; that is, if the t-th element of a proof of
+    membership for the leaf is the left sibling.
+    Cost: O(1) (computed in closed form).
+    """
+    assert size > 0
+    assert 0 <= index < size
 
-    return directions
+    # the leaf is in the complete subtree with 2^h leaves that corresponds to the h-th bit of size, which is the
+    # highest bit where size and index differ; t is the number of larger complete subtrees on its left
+    h = (size ^ index).bit_length() - 1
+    t = bin(size >> (h + 1)).count("1")
+    # unless it is the last complete subtree, the root of the complete subtree is a left child
+    s = 1 if size & ((1 << h) - 1) != 0 else 0
 
+    return h + s + t, (index & ((1 << h) - 1)) | (((1 << t) - 1) << (h + s))
 
-def get_proof_size(size: int, index: int):
-    return len(get_directions(size, index))
 
+def get_directions(size: int, index: int) -> List[bool]:
+    """
+    Returns an array of booleans indicating the directions of tree edges in the path from the root to the node with
+    the given index in a Merkle tree of the given size.
+    """
+    proof_size, directions = get_proof_geometry(size, index)
+    return [directions & (1 << t) != 0 for t in range(proof_size - 1, -1, -1)]
+
+
+def get_proof_size(size: int, index: int) -> int:
+    return get_proof_geometry(size, index)[0]
 
-def merkle_proof_verify(root: bytes, size: int, element: bytes, index: int, proof: List[bytes]) -> bool:
+
+def merkle_root_from_proof(
+    element: bytes,
+    directions: int,
+    proof: List[bytes],
+    hash_backend: HashBackend = SHA256
+) -> bytes:
+    """Return the root computed from a leaf with value `element` and its proof of membership `proof`, where
+    `directions` is as returned by `get_proof_geometry`."""
+    cur_hash = element
+    for h in proof:
+        if directions & 1 == 0:
+            cur_hash = hash_backend.H(b"".join((cur_hash, h)))
+        else:
+            cur_hash = hash_backend.H(b"".join((h, cur_hash)))
+        directions >>= 1
+    return cur_hash
+
+
+def merkle_proof_verify(
+    root: bytes,
+    size: int,
+    element: bytes,
+    index: int,
+    proof: List[bytes],
+    hash_backend: HashBackend = SHA256
+) -> bool:
     """Verify that `proof` is a valid membership proof for the statement that the leaf with
     index `index` is equal to `element` in the tree with the given Merkle `root`."""
-    cur_hash = element
-    directions = get_directions(size, index)
+    proof_size, directions = get_proof_geometry(size, index)
 
-    if len(proof) != len(directions):
+    if len(proof) != proof_size:
         return False  # wrong proof size
 
-    for h in proof:
-        if directions.pop() is False:
-            cur_hash = H(cur_hash + h)
+    return merkle_root_from_proof(element, directions, proof, hash_backend) == root
+
+
+def merkle_root(leaves: List[bytes], hash_backend: HashBackend = SHA256) -> bytes:
+    """Return the root of the Merkle tree with the given leaves (NIL for an empty list), which is the same as the
+    root of `MerkleTree(leaves)`, without building a tree: only the roots of the O(log n) complete subtrees that are
+    not finished yet are kept."""
+    if len(leaves) == 0:
+        return hash_backend.NIL
+
+    H = hash_backend.H
+    stack = []  # roots of the complete subtrees computed so far, by decreasing size
+    for pos, value in enumerate(leaves):
+        # the new leaf completes a subtree for each trailing zero of pos + 1
+        m = pos + 1
+        while m & 1 == 0:
+            value = H(stack.pop() + value)
+            m >>= 1
+        stack.append(value)
+
+    # join the complete subtrees, from right to left
+    value = stack.pop()
+    while stack:
+        value = H(stack.pop() + value)
+    return value
+
+
+def merkle_root_and_proof(
+    leaves: List[bytes],
+    index: int,
+    hash_backend: HashBackend = SHA256
+) -> Tuple[bytes, List[bytes]]:
+    """
+    Return the pair `(root, proof)`, where `root` is the root of the Merkle tree with the given (non-empty) leaves,
+    and `proof` is the proof of membership of the leaf with index `index`, as returned by
+    `MerkleTree(leaves).prove_leaf(index)`; no tree is built, like in `merkle_root`.
+    """
+    size = len(leaves)
+    assert 0 <= index < size
+
+    H = hash_backend.H
+    proof = []
+    stack = []
+    for pos, value in enumerate(leaves):
+        m, h = pos + 1, 0
+        while m & 1 == 0:
+            # joining the subtrees with numbers (pos >> h) - 1 and pos >> h among the ones with 2^h leaves
+            left = stack.pop()
+            if index >> h == pos >> h:
+                proof.append(left)
+            elif index >> h == (pos >> h) - 1:
+                proof.append(value)
+            value = H(left + value)
+            m >>= 1
+            h += 1
+        stack.append(value)
+
+    # the leaf is in the t-th complete subtree; see get_proof_geometry
+    t = bin(size >> (size ^ index).bit_length()).count("1")
+    value = stack[-1]
+    for s in range(len(stack) - 2, -1, -1):
+        if s == t:
+            proof.append(value)
+        elif s < t:
+            proof.append(stack[s])
+        value = H(stack[s] + value)
+
+    return value, proof
+
+
+def merkle_proof(leaves: List[bytes], index: int, hash_backend: HashBackend = SHA256) -> List[bytes]:
+    """
+    Return the proof of membership of the leaf with index `index` in the Merkle tree with the given (non-empty)
+    leaves, as returned by `MerkleTree(leaves).prove_leaf(index)`. Only the roots of the siblings of the nodes in the
+    path from the leaf to the root are computed, that is, n - 1 - len(proof) hashes for n leaves; use it instead of
+    `merkle_root_and_proof` if the root is already known.
+    """
+    assert 0 <= index < len(leaves)
+
+    proof = []  # top-down
+    begin, size = 0, len(leaves)
+    while size > 1:
+        lchild_size = 1 << ((size - 1).bit_length() - 1)  # the largest power of 2 smaller than size
+        if index < begin + lchild_size:
+            proof.append(merkle_root(leaves[begin + lchild_size:begin + size], hash_backend))
+            size = lchild_size
         else:
-            cur_hash = H(h + cur_hash)
+            proof.append(merkle_root(leaves[begin:begin + lchild_size], hash_backend))
+            begin, size = begin + lchild_size, size - lchild_size
+    proof.reverse()
+    return proof
+
+
+def get_multiproof_size(size: int, indices: Iterable[int]) -> int:
+    """Return the number of elements of a multiproof for the leaves with the given `indices` in a Merkle tree of the
+    given size."""
+    indices = sorted(set(indices))
+
+    def count(begin: int, size: int, lo: int, hi: int) -> int:
+        if lo == hi:
+            return 1
+        elif size == 1:
+            return 0
+        lchild_size = largest_power_of_2_less_than(size)
+        mid = bisect_left(indices, begin + lchild_size, lo, hi)
+        return count(begin, lchild_size, lo, mid) + count(begin + lchild_size, size - lchild_size, mid, hi)
+
+    return count(0, size, 0, len(indices))
+
+
+def merkle_multiproof_verify(
+    root: bytes,
+    size: int,
+    leaves: Dict[int, bytes],
+    proof: List[bytes],
+    hash_backend: HashBackend = SHA256
+) -> bool:
+    """Verify that `proof` is a valid multiproof for the statement that, for each `index` in `leaves`, the leaf with
+    index `index` is equal to `leaves[index]` in the tree with the given Merkle `root`."""
+    indices = sorted(leaves)
+    if len(indices) == 0 or indices[0] < 0 or indices[-1] >= size:
+        return False
+
+    pos = 0
+
+    def compute(begin: int, size: int, lo: int, hi: int) -> bytes:
+        nonlocal pos
+        if lo == hi:
+            if pos == len(proof):
+                raise IndexError("Proof too short")
+            pos += 1
+            return proof[pos - 1]
+        elif size == 1:
+            return leaves[begin]
+        lchild_size = largest_power_of_2_less_than(size)
+        mid = bisect_left(indices, begin + lchild_size, lo, hi)
+        left = compute(begin, lchild_size, lo, mid)
+        right = compute(begin + lchild_size, size - lchild_size, mid, hi)
+        return hash_backend.H(b"".join((left, right)))
+
+    try:
+        result = compute(0, size, 0, len(indices))
+    except IndexError:
+        return False  # wrong proof size
 
-    return cur_hash == root
+    return pos == len(proof) and result == root
@@ -1,5 +1,6 @@
-from .common import NIL, H
-from typing import List
+from .common import HashBackend, SHA256
+from bisect import bisect_left
+from typing import Dict, Iterable, List
 
 # LEGACY CODE: the Merkle trees in .merkle are more efficient, as they will sometimes have shorter proofs.
 
@@ -28,9 +29,10 @@ class MerkleTree:
     power of 2 and is enough to contain all the leaves; for example, if 13 leaves have been added,
     16 nodes are reserved for leaves; leaves for missing values contain NIL. The value of each
     internal node is the hash of the values of the left child, concatenated to the value of the
-    right child.
+    right child. The hash function and the NIL value are the ones of `hash_backend`.
     """
-    def __init__(self, elements: List[bytes] = []):
+    def __init__(self, elements: List[bytes] = [], hash_backend: HashBackend = SHA256):
+        self.hash_backend = hash_backend
         self.k = len(elements)
 
         # set current capacity to the smallest power of 2 that is at least len(elements)
@@ -38,7 +40,7 @@ class MerkleTree:
         while self.capacity < self.k:
             self.capacity = self.capacity * 2
 
-        self.nodes = [NIL] * (2 * self.capacity - 1)
+        self.nodes = [hash_backend.NIL] * (2 * self.capacity - 1)
         for i in range(len(elements)):
             self.nodes[self.first_leaf + i] = elements[i]
         self.recompute_internal_nodes()
@@ -55,7 +57,7 @@ class MerkleTree:
     def fix_node(self, i: int) -> None:
         """Set the value of the node with index `i` to the hash of the concatenation of the
         two children of i."""
-        self.nodes[i] = H(self.nodes[left_child(i)] + self.nodes[right_child(i)])
+        self.nodes[i] = self.hash_backend.H(self.nodes[left_child(i)] + self.nodes[right_child(i)])
 
     def fix_up(self, i: int) -> None:
         """For each node in the ancestry of `i` (not including `i`), execute fix_node."""
@@ -75,7 +77,7 @@ class MerkleTree:
         initial_first_leaf = self.first_leaf
         self.capacity *= 2
 
-        self.nodes += [NIL] * (2 * initial_capacity)
+        self.nodes += [self.hash_backend.NIL] * (2 * initial_capacity)
         for j in range(initial_capacity):
             self.nodes[self.first_leaf + j] = self.nodes[initial_first_leaf + j]
 
@@ -113,7 +115,7 @@ class MerkleTree:
 
     def copy(self):
         """Return an identical copy of this Merkle tree."""
-        result = MerkleTree()
+        result = MerkleTree([], self.hash_backend)
         result.k = self.k
         result.capacity = self.capacity
         result.nodes = self.nodes.copy()
@@ -140,17 +142,111 @@ class MerkleTree:
 
         return proof
 
+    def prove_leaves(self, indices: Iterable[int]) -> List[bytes]:
+        """
+        Produce a proof of membership for all the leaves with the given indices (a multiproof), where
+        0 <= index < capacity for each index. The proof contains the values of the minimal set of nodes that are
+        needed to recompute the root from the leaves, that is, the maximal subtrees that contain none of the leaves,
+        sorted from left to right.
+        """
+        indices = sorted(set(indices))
+        assert len(indices) > 0 and 0 <= indices[0] and indices[-1] < self.capacity
 
-def merkle_proof_verify(root: bytes, size: int, element: bytes, index: int, proof: List[bytes]) -> bool:
+        proof = []
+
+        def visit(i: int, begin: int, width: int, lo: int, hi: int):
+            # indices[lo:hi] are the indices of the leaves in the subtree of node i, with the leaves in
+            # [begin, begin + width)
+            if lo == hi:
+                proof.append(self.nodes[i])
+            elif width > 1:
+                mid = bisect_left(indices, begin + width // 2, lo, hi)
+                visit(left_child(i), begin, width // 2, lo, mid)
+                visit(right_child(i), begin + width // 2, width // 2, mid, hi)
+
+        visit(0, 0, self.capacity, 0, len(indices))
+        return proof
+
+
+def merkle_proof_verify(
+    root: bytes,
+    size: int,
+    element: bytes,
+    index: int,
+    proof: List[bytes],
+    hash_backend: HashBackend = SHA256
+) -> bool:
     """Verify that `proof` is a valid membership proof for the statement that the leaf with
     index `index` is equal to `element` in the tree with the given Merkle `root`."""
     cur_hash = element
     for h in proof:
         if index % 2 == 0:
-            cur_hash = H(cur_hash + h)
+            cur_hash = hash_backend.H(cur_hash + h)
         else:
-            cur_hash = H(h + cur_hash)
+            cur_hash = hash_backend.H(h + cur_hash)
 
         index = index // 2
 
     return cur_hash == root
+
+
+def get_capacity(size: int) -> int:
+    """Return the capacity of a tree with `size` leaves, that is, the smallest power of 2 that is at least `size`."""
+    capacity = 1
+    while capacity < size:
+        capacity = capacity * 2
+    return capacity
+
+
+def get_multiproof_size(size: int, indices: Iterable[int]) -> int:
+    """Return the number of elements of a multiproof for the leaves with the given `indices` in a Merkle tree with
+    `size` leaves."""
+    indices = sorted(set(indices))
+
+    def count(begin: int, width: int, lo: int, hi: int) -> int:
+        if lo == hi:
+            return 1
+        elif width == 1:
+            return 0
+        mid = bisect_left(indices, begin + width // 2, lo, hi)
+        return count(begin, width // 2, lo, mid) + count(begin + width // 2, width // 2, mid, hi)
+
+    return count(0, get_capacity(size), 0, len(indices))
+
+
+def merkle_multiproof_verify(
+    root: bytes,
+    size: int,
+    leaves: Dict[int, bytes],
+    proof: List[bytes],
+    hash_backend: HashBackend = SHA256
+) -> bool:
+    """Verify that `proof` is a valid multiproof for the statement that, for each `index` in `leaves`, the leaf with
+    index `index` is equal to `leaves[index]` in the tree with `size` leaves and the given Merkle `root`."""
+    indices = sorted(leaves)
+    capacity = get_capacity(size)
+    if len(indices) == 0 or indices[0] < 0 or indices[-1] >= capacity:
+        return False
+
+    pos = 0
+
+    def compute(begin: int, width: int, lo: int, hi: int) -> bytes:
+        nonlocal pos
+        if lo == hi:
+            if pos == len(proof):
+                raise IndexError("Proof too short")
+            pos += 1
+            return proof[pos - 1]
+        elif width == 1:
+            return leaves[begin]
+        mid = bisect_left(indices, begin + width // 2, lo, hi)
+        left = compute(begin, width // 2, lo, mid)
+        right = compute(begin + width // 2, width // 2, mid, hi)
+        return hash_backend.H(left + right)
+
+    try:
+        result = compute(0, capacity, 0, len(indices))
+    except IndexError:
+        return False  # wrong proof size
+
+    return pos == len(proof) and result == root
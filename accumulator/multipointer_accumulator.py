@@ -1,10 +1,13 @@
-from .common import pred, iroot_ceil, floor_lg
+from typing import Set
+
+from .common import HashBackend, SHA256, pred, iroot_ceil, floor_lg
 from .generalized_accumulator import (
     GeneralizedAccumulatorFactory,
     GeneralizedAccumulator,
     GeneralizedProver,
     GeneralizedVerifier,
 )
+from .representatives import RepresentativeEngine
 
 # Implementation of the generalized accumulator with p "evenly spaced" back-pointers.
 
@@ -12,14 +15,8 @@ from .generalized_accumulator import (
 # Proof size: O((log n)^(1 + 1/p))
 
 
-def get_representatives(k: int, p: int):
-    if k == 1:
-        return []
-
-    # if k is even, we also add k - 1
-    result = [k - 1] if k % 2 == 0 else []
-
-    l = floor_lg(k)  # k has l + 1 bits
+def get_exponents(l: int, p: int) -> Set[int]:
+    """Return the set of values c such that pred^c(k) is a representative of k, for each k with l + 1 bits."""
     d = iroot_ceil(p, l)  # d = ceil(floor(log n)^(1/p))
 
     # computes all the powers of d that are not bigger than l
@@ -29,6 +26,18 @@ def get_representatives(k: int, p: int):
         while t <= l and d > 1:
             exponents.add(t)
             t *= d
+    return exponents
+
+
+def get_representatives(k: int, p: int):
+    if k == 1:
+        return []
+
+    # if k is even, we also add k - 1
+    result = [k - 1] if k % 2 == 0 else []
+
+    l = floor_lg(k)  # k has l + 1 bits
+    exponents = get_exponents(l, p)
 
     t = pred(k)
     c = 1  # count of how many bits are zeroed
@@ -42,11 +51,14 @@ def get_representatives(k: int, p: int):
 
 
 class MultipointerAccumulatorFactory(GeneralizedAccumulatorFactory):
-    def create_accumulator(self, p: int):
-        def get_representatives_p(n: int):
-            return get_representatives(n, p)
+    def create_accumulator(self, p: int, hash_backend: HashBackend = SHA256):
+        def get_exponents_p(l: int):
+            return get_exponents(l, p)
 
-        accumulator_manager = GeneralizedAccumulator(get_representatives_p)
-        prover = GeneralizedProver(get_representatives_p, accumulator_manager)
-        verifier = GeneralizedVerifier(get_representatives_p)
+        # each party has its own engine: the accumulator manager computes the representatives of consecutive indices
+        accumulator_manager = GeneralizedAccumulator(
+            RepresentativeEngine(get_exponents_p), hash_backend, construction=f"multipointer:{p}"
+        )
+        prover = GeneralizedProver(RepresentativeEngine(get_exponents_p), accumulator_manager)
+        verifier = GeneralizedVerifier(RepresentativeEngine(get_exponents_p), hash_backend)
         return accumulator_manager, prover, verifier
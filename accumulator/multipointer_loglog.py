@@ -1,10 +1,13 @@
-from .common import is_power_of_2, pred
+from typing import List
+
+from .common import HashBackend, SHA256, is_power_of_2, pred
 from .generalized_accumulator import (
     GeneralizedAccumulatorFactory,
     GeneralizedAccumulator,
     GeneralizedProver,
     GeneralizedVerifier,
 )
+from .representatives import RepresentativeEngine
 
 # Implementation of the generalized accumulator with about log log n "evenly spaced" back-pointers.
 
@@ -12,6 +15,12 @@ from .generalized_accumulator import (
 # Proof size: O(log n log log n log log log n)
 
 
+def get_exponents(l: int) -> List[int]:
+    """Return the values c such that pred^c(k) is a representative of k, for each k with l + 1 bits: all the powers
+    of 2 that are not bigger than l."""
+    return [1 << e for e in range(l.bit_length())] if l > 0 else [1]
+
+
 def get_representatives(k: int):
     if k == 1:
         return []
@@ -30,8 +39,9 @@ def get_representatives(k: int):
 
 
 class MultipointerLogLogFactory(GeneralizedAccumulatorFactory):
-    def create_accumulator(self):
-        accumulator_manager = GeneralizedAccumulator(get_representatives)
-        prover = GeneralizedProver(get_representatives, accumulator_manager)
-        verifier = GeneralizedVerifier(get_representatives)
+    def create_accumulator(self, hash_backend: HashBackend = SHA256):
+        # each party has its own engine: the accumulator manager computes the representatives of consecutive indices
+        accumulator_manager = GeneralizedAccumulator(RepresentativeEngine(get_exponents), hash_backend, "loglog")
+        prover = GeneralizedProver(RepresentativeEngine(get_exponents), accumulator_manager)
+        verifier = GeneralizedVerifier(RepresentativeEngine(get_exponents), hash_backend)
         return accumulator_manager, prover, verifier
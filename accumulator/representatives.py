@@ -0,0 +1,83 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Tuple
+
+# Fast computation of the representatives for the generalized accumulators where, for each k > 1, the list of
+# representatives of k contains k - 1 if k is even, followed by pred^c(k) for each c in a set of exponents that only
+# depends on floor_lg(k), as long as pred^c(k) > 0. This is the case for both the multipointer and the loglog
+# constructions.
+#
+# If b_0 < b_1 < ... < b_(m-1) are the positions of the bits of k that are equal to 1, then pred^c(k) is obtained by
+# zeroing the bits b_0, ..., b_(c-1) of k, and it is positive if and only if c < m.
+
+
+class RepresentativeEngine:
+    """
+    Callable computing the representatives of k, sorted by decreasing index, for the set of exponents returned by
+    `get_exponents(floor_lg(k))`.
+
+    The sorted exponents are computed once for each value of floor_lg(k); the positions of the bits of k are derived
+    from the ones of k - 1 when the previous call was for k - 1, which is the case when elements are added to an
+    accumulator; the results for the most recent `cache_size` values of k are kept in an LRU cache.
+    Calls are thread-safe.
+    """
+    def __init__(self, get_exponents: Callable[[int], Iterable[int]], cache_size: int = 1024):
+        self.get_exponents = get_exponents
+        self.cache_size = cache_size
+        self.exponents = {}  # floor_lg(k) => sorted tuple of exponents
+        self.cache = OrderedDict()  # k => tuple of representatives of k
+        self.last = (0, [])  # last k whose bits were computed, and the positions of its bits equal to 1
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_bits(self, k: int) -> List[int]:
+        """Return the positions of the bits of k that are equal to 1, in increasing order."""
+        last_k, last_bits = self.last
+        if k == last_k + 1 and k > 1:
+            # adding 1 zeroes the trailing 1s of k - 1, and sets the following bit
+            tz = (k & -k).bit_length() - 1
+            bits = [tz] + last_bits[tz:]
+        else:
+            bits = [b for b in range(k.bit_length()) if (k >> b) & 1]
+        self.last = (k, bits)
+        return bits
+
+    def compute(self, k: int) -> Tuple[int, ...]:
+        """Compute the representatives of k, without using the LRU cache."""
+        if k <= 1:
+            return ()
+
+        bits = self.get_bits(k)
+
+        l = k.bit_length() - 1  # floor_lg(k)
+        exponents = self.exponents.get(l)
+        if exponents is None:
+            exponents = self.exponents[l] = tuple(sorted(set(self.get_exponents(l))))
+
+        result = [k - 1] if k % 2 == 0 else []
+        for c in exponents:
+            if c >= len(bits):
+                break
+            result.append(k & -(2 << bits[c - 1]))
+        return tuple(result)
+
+    def __call__(self, k: int) -> List[int]:
+        with self.lock:
+            cache = self.cache
+            result = cache.get(k)
+            if result is None:
+                self.misses += 1
+                result = cache[k] = self.compute(k)
+                if len(cache) > self.cache_size:
+                    cache.popitem(last=False)
+            else:
+                self.hits += 1
+                cache.move_to_end(k)
+        return list(result)
+
+    def cache_clear(self) -> None:
+        """Empty the LRU cache."""
+        with self.lock:
+            self.cache.clear()
+            self.hits = self.misses = 0
@@ -1,7 +1,17 @@
-from typing import List
+from typing import BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple
 from .event import Event
-from .common import H, NIL, highest_divisor_power_of_2 as d, is_power_of_2, zeros, pred
-from .factory import AbstractAccumulatorFactory, AbstractAccumulatorManager, AbstractProver, AbstractVerifier
+from .storage import Store, DictStore
+from .checkpoint import CheckpointReader, CheckpointWriter, check_state_slots
+from .log import DEFAULT_CHUNK_RECORDS, ingest_log
+from .common import HashBackend, SHA256, highest_divisor_power_of_2 as d, is_power_of_2, zeros, pred
+from .factory import (
+    AbstractAccumulatorFactory,
+    AbstractAccumulatorManager,
+    AbstractProver,
+    AbstractVerifier,
+    AccumulatorSnapshot,
+    AddInfo,
+)
 
 # This module implements the simplest variant of the accumulator.
 # Each new accumulator value R_k is defined as:
@@ -11,11 +21,48 @@ from .factory import AbstractAccumulatorFactory, AbstractAccumulatorManager, Abs
 # Proof size: O((log n)^2)
 
 
+def get_next_index(i: int, j: int) -> int:
+    """For i > j, return the index of the accumulator value that follows R_i in the path of a proof for the j-th
+    element: pred(i) if it is not smaller than j, or i - 1 otherwise."""
+    return pred(i) if pred(i) >= j else i - 1
+
+
+def get_proof_plan(i: int, j: int) -> List[int]:
+    """Return the indices of the accumulator values that are opened in a proof for the j-th element, starting from
+    the accumulator value R_i, in order. The result starts with i, and ends with j."""
+    assert 1 <= j <= i
+    path = [i]
+    while i > j:
+        i = get_next_index(i, j)
+        path.append(i)
+    return path
+
+
+def get_witness_size(i: int, j: int) -> int:
+    """Return the number of items of a proof for the j-th element, starting from the accumulator value R_i."""
+    return 3 * len(get_proof_plan(i, j))
+
+
+def get_proof_nodes(i: int, js: Iterable[int]) -> List[int]:
+    """Return the indices of all the accumulator values that are opened in a proof for all the elements with indices
+    in `js`, starting from the accumulator value R_i. The result is sorted in decreasing order, and starts with i."""
+    nodes = set([i])
+    for j in js:
+        assert 1 <= j <= i
+        t = i
+        while t > j:
+            t = get_next_index(t, j)
+            nodes.add(t)
+    return sorted(nodes, reverse=True)
+
+
 class SimpleAccumulator(AbstractAccumulatorManager):
-    def __init__(self):
+    def __init__(self, hash_backend: HashBackend = SHA256):
+        self.hash_backend = hash_backend
         self.k = 0
-        self.S = [NIL]
+        self.S = [hash_backend.NIL]
         self.element_added = Event()
+        self.elements_added = Event()
 
     def __len__(self):
         """Returns `k`, the total number of elements in this accumulator."""
@@ -33,45 +80,133 @@ class SimpleAccumulator(AbstractAccumulatorManager):
         and not greater than k.
         Return NIL if i == 0.
         """
-        return NIL if i == 0 else self.S[zeros(i)]
+        return self.hash_backend.NIL if i == 0 else self.S[zeros(i)]
 
     def get_root(self) -> bytes:
         """Return the current value of the accumulator."""
         return self.get_state(self.k)
 
+    def snapshot(self) -> AccumulatorSnapshot:
+        """Return an immutable view of the current state."""
+        return AccumulatorSnapshot(self.k, self.get_root(), tuple(self.S))
+
+    def checkpoint(self, path: str) -> None:
+        """Save the counter and the state slots to the file at `path`."""
+        with CheckpointWriter(path, "SimpleAccumulator", self.hash_backend) as writer:
+            writer.int(self.k)
+            writer.digests(self.S)
+
+    def restore(self, path: str) -> None:
+        """Restore the state saved by `checkpoint` in the file at `path`."""
+        with CheckpointReader(path, "SimpleAccumulator", self.hash_backend) as reader:
+            k, S = reader.int(), reader.digests()
+        check_state_slots(k, S)
+        self.k, self.S = k, S
+
     def add(self, x: bytes) -> bytes:
         """Insert the new element `x` into the accumulator."""
-        self.increase_counter()
-
-        prev_state = self.get_state(self.k - 1)
-        other_state = self.get_state(self.k - d(self.k))
+        k = self.k + 1
+        other = k - d(k)
+        prev_state = self.get_state(k - 1)
+        other_state = self.get_state(other)
 
         data = x + prev_state + other_state
-        result = H(data)
+        result = self.hash_backend.H(data)
 
+        self.increase_counter()
         self.S[zeros(self.k)] = result
 
-        self.element_added.notify(self.k, x, result)
+        self.element_added.notify(self.k, x, result, info=AddInfo(representatives=[self.k - 1, other]))
         return result
 
+    def add_many(self, elements: Iterable[bytes]) -> bytes:
+        """Insert all the elements in `elements` into the accumulator, in order.
+        The resulting state is identical to calling `add` on each element, but listeners are notified only once
+        through `elements_added`, with the list of `(k, x, r)` tuples of the whole batch.
+        If an exception is raised while adding an element (or by `elements`), the elements before it are completely
+        added, and notified, before the exception is propagated.
+        Return the new value of the accumulator."""
+        H = self.hash_backend.H
+        NIL = self.hash_backend.NIL
+        S = self.S
+        k = self.k
+        records, infos = [], []
+        try:
+            for x in elements:
+                prev_state = NIL if k == 0 else S[zeros(k)]
+                other = (k + 1) - d(k + 1)
+                other_state = NIL if other == 0 else S[zeros(other)]
+                result = H(x + prev_state + other_state)
+
+                # the state is only modified once the new value is computed
+                if is_power_of_2(k):
+                    S.append(None)
+                k += 1
+                S[zeros(k)] = result
+                records.append((k, x, result))
+                infos.append(AddInfo(representatives=[k - 1, other]))
+        finally:
+            self.k = k
+            if records:
+                self.elements_added.notify(records, info=infos)
+        return self.get_root()
+
 
 class SimpleProver(AbstractProver):
     """
     Listens to updates from a `SimpleAccumulator`, and stores the necessary information to create
     witnesses for any element added to the accumulator after this instance is created.
+    The added elements and the accumulator values are kept in `elements_store` and `R_store`, respectively; if not
+    given, a `DictStore` is used.
     """
-    def __init__(self, accumulator: SimpleAccumulator):
-        self.elements = dict([(0, NIL)])
-        self.R = dict([(0, NIL)])
+    def __init__(
+        self,
+        accumulator: SimpleAccumulator,
+        elements_store: Optional[Store] = None,
+        R_store: Optional[Store] = None
+    ):
+        self.elements = DictStore() if elements_store is None else elements_store
+        self.R = DictStore() if R_store is None else R_store
+        self.hash_backend = accumulator.hash_backend
+        self.elements[0] = self.hash_backend.NIL
+        self.R[0] = self.hash_backend.NIL
         self.accumulator = accumulator
-        accumulator.element_added += self.element_added
+        accumulator.element_added.subscribe(self.element_added, with_info=True)
+        accumulator.elements_added.subscribe(self.elements_added, with_info=True)
 
-    def element_added(self, k: int, x: bytes, r: bytes):
+    def element_added(self, k: int, x: bytes, r: bytes, info: Optional[AddInfo] = None):
         """Listener for events from the accumulator.
         Records each added element, and the corresponding accumulator value."""
         self.elements[k] = x
         self.R[k] = r
 
+    def checkpoint(self, path: str) -> None:
+        """Save the recorded elements and accumulator values to the file at `path`."""
+        with CheckpointWriter(path, "SimpleProver", self.hash_backend) as writer:
+            writer.store_entries([self.elements, self.R], len(self.accumulator))
+
+    def restore(self, path: str) -> None:
+        """Record the elements and accumulator values saved by `checkpoint` in the file at `path`."""
+        with CheckpointReader(path, "SimpleProver", self.hash_backend) as reader:
+            reader.check_store_entries(2)
+            reader.store_entries([self.elements, self.R])
+
+    def check_record(self, k: int, elements: Optional[Store] = None, R: Optional[Store] = None) -> Optional[bool]:
+        """Recompute R_k from the recorded values, and return whether it matches the recorded one; return None if
+        some of the values are not recorded. The values are read from `elements` and `R`, if given, instead of the
+        stores of the prover."""
+        elements = self.elements if elements is None else elements
+        R = self.R if R is None else R
+        if not all(t in R for t in [k, k - 1, pred(k)]) or k not in elements:
+            return None
+        data = bytes(elements[k]) + bytes(R[k - 1]) + bytes(R[pred(k)])
+        return self.hash_backend.H(data) == bytes(R[k])
+
+    def ingest_log(self, stream: BinaryIO, check_every: int = 0, chunk_records: int = DEFAULT_CHUNK_RECORDS) -> int:
+        """Record all the elements and accumulator values in the log read from `stream`."""
+        return ingest_log(stream, self.elements, self.R, self.accumulator, self.check_record, check_every,
+                          chunk_records, self.hash_backend)
+
     def prove(self, j: int) -> List[bytes]:
         """Produce a witness for the j-th element added to the accumulator"""
         return self.prove_from(len(self.accumulator), j)
@@ -80,48 +215,140 @@ class SimpleProver(AbstractProver):
         """Produce a witness for the j-th element of the accumulator, starting from the root when
         the i-th element was added."""
         assert j <= i
-        assert i in self.elements and i - 1 in self.R and pred(i) in self.R
 
-        w = [self.elements[i], self.R[i - 1], self.R[pred(i)]]
-        if i > j:
-            if pred(i) >= j:
-                w += self.prove_from(pred(i), j)
-            else:
-                w += self.prove_from(i - 1, j)
+        w = []
+        while True:
+            assert i in self.elements and i - 1 in self.R and pred(i) in self.R
+
+            w += [bytes(self.elements[i]), bytes(self.R[i - 1]), bytes(self.R[pred(i)])]
+            if i == j:
+                return w
 
+            i = get_next_index(i, j)
+
+    def plan(self, i: int, j: int) -> List[int]:
+        """Return the indices of the accumulator values visited by a proof for the j-th element, starting from i."""
+        return get_proof_plan(i, j)
+
+    def proof_size(self, i: int, j: int) -> int:
+        """Return the number of items of a proof for the j-th element, starting from i."""
+        return get_witness_size(i, j)
+
+    def prove_many(self, i: int, js: Sequence[int]) -> List[bytes]:
+        """Produce a single witness for all the elements with indices in `js`, starting from the root when the i-th
+        element was added. The witness contains each node of the union of the paths of the individual proofs only
+        once; for each node t, in decreasing order, it contains x_t, R_(t - 1) and R_pred(t)."""
+        w = []
+        for t in get_proof_nodes(i, js):
+            assert t in self.elements and t - 1 in self.R and pred(t) in self.R
+            w += [bytes(self.elements[t]), bytes(self.R[t - 1]), bytes(self.R[pred(t)])]
         return w
 
 
 class SimpleVerifier(AbstractVerifier):
+    def __init__(self, hash_backend: HashBackend = SHA256):
+        self.hash_backend = hash_backend
+
     def verify(self, Ri: bytes, i: int, j: int, w: List[bytes], x: bytes) -> bool:
         """
         Verify that `w` is a valid proof that the the `j`-th element added to the accumulator is `x`,
         given that the value of the accumulator after the `i`-th element was added is `Ri`.
         """
+        return self._verify(Ri, i, j, w, x, None)
+
+    def verify_batch(self, Ri: bytes, i: int, proofs: Iterable[Tuple[int, List[bytes], bytes]]) -> List[bool]:
+        """
+        Verify a batch of proofs against the same value `Ri` of the accumulator after the `i`-th element was added.
+        Each proof is a tuple `(j, w, x)`, with the same meaning as the arguments of `verify`. Return the list of the
+        results of each verification.
+        Each distinct hash check, identified by the index, the accumulator value and its preimage, is only computed
+        once for the whole batch.
+        """
+        checked = {}
+        return [self._verify(Ri, i, j, w, x, checked) for j, w, x in proofs]
+
+    def plan(self, i: int, j: int) -> List[int]:
+        """Return the indices of the accumulator values visited by a proof for the j-th element, starting from i."""
+        return get_proof_plan(i, j)
+
+    def proof_size(self, i: int, j: int) -> int:
+        """Return the number of items of a proof for the j-th element, starting from i."""
+        return get_witness_size(i, j)
+
+    def _verify(
+        self,
+        Ri: bytes,
+        i: int,
+        j: int,
+        w: List[bytes],
+        x: bytes,
+        checked: Optional[Dict[Tuple[int, bytes], Tuple[bytes, ...]]]
+    ) -> bool:
+        """Implementation of `verify`; `checked` maps each pair `(i, R_i)` to a preimage of `R_i` that was already
+        verified, or is None if nothing is shared with other proofs. The items of `w` are hashed and compared as they
+        are (for example, as `memoryview`s); they are only copied to `bytes` to be used as keys of `checked`."""
         assert j <= i
-        if len(w) < 3:
-            print("Witness too short")
-            return False
 
-        x_i, R_prev, R_pred = w[0:3]
+        pos = 0  # position in w of the data for the current index i
+        while True:
+            if len(w) < pos + 3:
+                print("Witness too short")
+                return False
 
-        # verify that H(x_i||R_prev||R_pred) == Ri
-        if H(x_i + R_prev + R_pred) != Ri:
-            print("Hash did not match")
+            x_i, R_prev, R_pred = preimage = tuple(w[pos:pos + 3])
+
+            # verify that H(x_i||R_prev||R_pred) == Ri
+            key = None if checked is None else (i, bytes(Ri))
+            if key is None or checked.get(key) != preimage:
+                if self.hash_backend.H(b"".join(preimage)) != Ri:
+                    print("Hash did not match")
+                    return False
+                if key is not None:
+                    checked[key] = preimage
+
+            if i == j:
+                return x_i == x
+
+            # i > j
+            i_next = get_next_index(i, j)
+            Ri, i = (R_pred if i_next == pred(i) else R_prev), i_next
+            pos += 3
+
+    def verify_many(self, Ri: bytes, i: int, js: Sequence[int], w: List[bytes], xs: Sequence[bytes]) -> bool:
+        """
+        Verify that `w` is a valid proof, as produced by `SimpleProver.prove_many`, that for each index t, the
+        `js[t]`-th element added to the accumulator is `xs[t]`, given that the value of the accumulator after the
+        `i`-th element was added is `Ri`.
+        """
+        assert len(js) == len(xs)
+
+        nodes = get_proof_nodes(i, js)
+        if len(w) != 3 * len(nodes):
+            print("Wrong witness size")
             return False
 
-        if i == j:
-            return x_i == x
-        else:  # i > j
-            if pred(i) >= j:
-                return self.verify(R_pred, pred(i), j, w[3:], x)
-            else:
-                return self.verify(R_prev, i - 1, j, w[3:], x)
+        R = {i: Ri}  # the accumulator values that are known to be correct
+        x = {}  # the verified elements
+        for pos, t in enumerate(nodes):
+            x_t, R_prev, R_pred = w[3 * pos:3 * pos + 3]
+
+            # verify that H(x_t||R_prev||R_pred) == R_t
+            if self.hash_backend.H(b"".join((x_t, R_prev, R_pred))) != R[t]:
+                print("Hash did not match")
+                return False
+
+            x[t] = x_t
+            for child, R_child in [(t - 1, R_prev), (pred(t), R_pred)]:
+                if R.setdefault(child, R_child) != R_child:
+                    print("Inconsistent accumulator values")
+                    return False
+
+        return all(x[j] == x_j for j, x_j in zip(js, xs))
 
 
 class SimpleAccumulatorFactory(AbstractAccumulatorFactory):
-    def create_accumulator(self):
-        accumulator_manager = SimpleAccumulator()
+    def create_accumulator(self, hash_backend: HashBackend = SHA256):
+        accumulator_manager = SimpleAccumulator(hash_backend)
         prover = SimpleProver(accumulator_manager)
-        verifier = SimpleVerifier()
+        verifier = SimpleVerifier(hash_backend)
         return accumulator_manager, prover, verifier
@@ -1,8 +1,25 @@
-from typing import List
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple
 from .event import Event
-from .factory import AbstractAccumulatorFactory, AbstractAccumulatorManager, AbstractProver, AbstractVerifier
-from .common import H, NIL, zeros, pred, rpred, hook_index, floor_lg
-from .merkle import MerkleTree, merkle_proof_verify, get_proof_size
+from .storage import Store, DictStore
+from .checkpoint import CheckpointReader, CheckpointWriter
+from .log import DEFAULT_CHUNK_RECORDS, ingest_log
+from .factory import (
+    AbstractAccumulatorFactory,
+    AbstractAccumulatorManager,
+    AbstractProver,
+    AbstractVerifier,
+    AccumulatorSnapshot,
+    AddInfo,
+)
+from .common import HashBackend, SHA256, zeros, rpred, hook_index, floor_lg
+from .merkle import (
+    MerkleTree,
+    PersistentMerkleTree,
+    get_proof_geometry,
+    get_proof_size,
+    merkle_root,
+    merkle_root_from_proof,
+)
 
 # This module implements the second construction of the accumulator.
 # Each new accumulator value R_k is defined as:
@@ -13,11 +30,42 @@ from .merkle import MerkleTree, merkle_proof_verify, get_proof_size
 # Proof size: O(log n log log n)
 
 
+def get_next_index(i: int, j: int) -> int:
+    """For i > j, return the index of the accumulator value that follows R_i in the path of a proof for the j-th
+    element. It is the index of a leaf of M_(i - 1), computed using rpred."""
+    return rpred(i - 1, j)
+
+
+def get_proof_plan(i: int, j: int) -> List[int]:
+    """Return the indices of the accumulator values that are opened in a proof for the j-th element, starting from
+    the accumulator value R_i, in order. The result starts with i, and ends with j."""
+    assert 1 <= j <= i
+    path = [i]
+    while i > j:
+        i = get_next_index(i, j)
+        path.append(i)
+    return path
+
+
+def get_witness_size(i: int, j: int) -> int:
+    """Return the number of items of a proof for the j-th element, starting from the accumulator value R_i: x_i and
+    the root of M_(i - 1) for each step, plus the revealed leaf of M_(i - 1) and its Merkle proof if i > j."""
+    assert 1 <= j <= i
+    size = 2
+    while i > j:
+        i_next = get_next_index(i, j)
+        size += 3 + get_proof_size(1 + floor_lg(i - 1), zeros(i_next))
+        i = i_next
+    return size
+
+
 class SmartAccumulator(AbstractAccumulatorManager):
-    def __init__(self):
+    def __init__(self, hash_backend: HashBackend = SHA256):
+        self.hash_backend = hash_backend
         self.k = 0
-        self.S = MerkleTree()
+        self.S = MerkleTree([], hash_backend)
         self.element_added = Event()
+        self.elements_added = Event()
 
     def __len__(self):
         """Returns `k`, the total number of elements in this accumulator."""
@@ -30,12 +78,28 @@ class SmartAccumulator(AbstractAccumulatorManager):
         Return NIL if i == 0.
         """
 
-        return NIL if i == 0 else self.S.get(zeros(i))
+        return self.hash_backend.NIL if i == 0 else self.S.get(zeros(i))
 
     def get_root(self) -> bytes:
         """Return the current value of the accumulator."""
         return self.get_state(self.k)
 
+    def snapshot(self) -> AccumulatorSnapshot:
+        """Return an immutable view of the current state; the slots are the leaves of the Merkle tree S."""
+        return AccumulatorSnapshot(self.k, self.get_root(), tuple(self.S.get(t) for t in range(len(self.S))))
+
+    def checkpoint(self, path: str) -> None:
+        """Save the counter and all the nodes of the Merkle tree of the state to the file at `path`."""
+        with CheckpointWriter(path, "SmartAccumulator", self.hash_backend) as writer:
+            writer.int(self.k)
+            writer.merkle_tree(self.S)
+
+    def restore(self, path: str) -> None:
+        """Restore the state saved by `checkpoint` in the file at `path`."""
+        with CheckpointReader(path, "SmartAccumulator", self.hash_backend) as reader:
+            k, S = reader.int(), reader.merkle_tree(self.hash_backend)
+        self.k, self.S = k, S
+
     def add(self, x: bytes) -> bytes:
         """
         Insert the new element `x` into the accumulator.
@@ -43,34 +107,150 @@ class SmartAccumulator(AbstractAccumulatorManager):
 
         M_k_1 = self.S.root
 
-        self.k += 1
+        result = self.hash_backend.H(x + M_k_1)
 
-        result = H(x + M_k_1)
+        self.k += 1
 
         self.S.set(zeros(self.k), result)
 
-        self.element_added.notify(self.k, x, result)
+        self.element_added.notify(self.k, x, result, info=AddInfo(M=M_k_1))
         return result
 
+    def add_many(self, elements: Iterable[bytes]) -> bytes:
+        """
+        Insert all the elements in `elements` into the accumulator, in order.
+        The resulting state is identical to calling `add` on each element, but listeners are notified only once
+        through `elements_added`, with the list of `(k, x, r)` tuples of the whole batch.
+        If an exception is raised while adding an element (or by `elements`), the elements before it are completely
+        added, and notified, before the exception is propagated.
+        Return the new value of the accumulator.
+        """
+
+        H = self.hash_backend.H
+        S = self.S
+        k = self.k
+        records, infos = [], []
+        try:
+            for x in elements:
+                M_k_1 = S.root
+                result = H(x + M_k_1)
+                k += 1
+                S.set(zeros(k), result)
+                records.append((k, x, result))
+                infos.append(AddInfo(M=M_k_1))
+        finally:
+            self.k = k
+            if records:
+                self.elements_added.notify(records, info=infos)
+        return self.get_root()
+
 
 class SmartProver(AbstractProver):
     """
     Listens to updates from a `SmartAccumulator`, and stores the necessary information to create
     witnesses for any element added to the accumulator after this instance is created.
+    The added elements and the accumulator values are kept in `elements_store` and `R_store`, respectively; if not
+    given, a `DictStore` is used.
+
+    By default, the Merkle trees of the state are recomputed when a proof is requested. If `precompute` is True,
+    the prover instead keeps its own copy of the state of the accumulator as a `PersistentMerkleTree`, and stores
+    the version M_k for each k; since consecutive versions share all but O(log log n) nodes, this costs O(log log n)
+    hashes and space per added element, and proofs are produced without computing any hash.
     """
-    def __init__(self, accumulator: SmartAccumulator):
-        self.elements = dict([(0, NIL)])
-        self.R = dict([(0, NIL)])
+    def __init__(
+        self,
+        accumulator: SmartAccumulator,
+        elements_store: Optional[Store] = None,
+        R_store: Optional[Store] = None,
+        precompute: bool = False
+    ):
+        self.elements = DictStore() if elements_store is None else elements_store
+        self.R = DictStore() if R_store is None else R_store
+        self.hash_backend = accumulator.hash_backend
+        self.elements[0] = self.hash_backend.NIL
+        self.R[0] = self.hash_backend.NIL
         self.accumulator = accumulator
         self.initial_k = accumulator.k
         self.initial_S = accumulator.S.copy()
-        accumulator.element_added += self.element_added
-
-    def element_added(self, k: int, x: bytes, r: bytes):
+        self.precompute = precompute
+        if precompute:
+            initial_leaves = [self.initial_S.get(t) for t in range(len(self.initial_S))]
+            self.M = {self.initial_k: PersistentMerkleTree(initial_leaves, self.hash_backend)}
+        accumulator.element_added.subscribe(self.element_added, with_info=True)
+        accumulator.elements_added.subscribe(self.elements_added, with_info=True)
+
+    def element_added(self, k: int, x: bytes, r: bytes, info: Optional[AddInfo] = None):
         """Listener for events from the accumulator.
         Records each added element, and the corresponding accumulator value."""
         self.elements[k] = x
         self.R[k] = r
+        if self.precompute:
+            self.M[k] = self.M[k - 1].set(zeros(k), r)
+
+    def checkpoint(self, path: str) -> None:
+        """Save the state of the accumulator when this prover was created, and the recorded elements and
+        accumulator values, to the file at `path`."""
+        with CheckpointWriter(path, "SmartProver", self.hash_backend) as writer:
+            writer.int(self.initial_k)
+            writer.merkle_tree(self.initial_S)
+            writer.store_entries([self.elements, self.R], len(self.accumulator))
+
+    def restore(self, path: str) -> None:
+        """
+        Restore the data saved by `checkpoint` in the file at `path`.
+        If `precompute` is True, the versions of the Merkle tree are not saved, and they are recomputed instead.
+        """
+        with CheckpointReader(path, "SmartProver", self.hash_backend) as reader:
+            initial_k, initial_S = reader.int(), reader.merkle_tree(self.hash_backend)
+            reader.check_store_entries(2)
+            reader.store_entries([self.elements, self.R])
+        self.initial_k, self.initial_S = initial_k, initial_S
+
+        if self.precompute:
+            initial_leaves = [self.initial_S.get(t) for t in range(len(self.initial_S))]
+            self.M = {self.initial_k: PersistentMerkleTree(initial_leaves, self.hash_backend)}
+            for k in range(self.initial_k + 1, len(self.accumulator) + 1):
+                self.M[k] = self.M[k - 1].set(zeros(k), bytes(self.R[k]))
+
+    def check_record(self, k: int, elements: Optional[Store] = None, R: Optional[Store] = None) -> Optional[bool]:
+        """Recompute R_k from the recorded values, and return whether it matches the recorded one; return None if
+        some of the values are not recorded. The values are read from `elements` and `R`, if given, instead of the
+        stores of the prover."""
+        elements = self.elements if elements is None else elements
+        R = self.R if R is None else R
+        if k not in elements or k not in R:
+            return None
+        leaves = []
+        for idx in self.make_tree_indexes(k - 1):
+            if idx in R:
+                leaves.append(bytes(R[idx]))
+            elif k - 1 >= self.initial_k:
+                leaves.append(self.initial_S.get(zeros(idx)))
+            else:
+                return None
+        M_prev_root = merkle_root(leaves, self.hash_backend)
+        return self.hash_backend.H(bytes(elements[k]) + M_prev_root) == bytes(R[k])
+
+    def ingest_log(self, stream: BinaryIO, check_every: int = 0, chunk_records: int = DEFAULT_CHUNK_RECORDS) -> int:
+        """
+        Record all the elements and accumulator values in the log read from `stream`.
+        If the log contains all the elements up to `initial_k`, the prover can then prove any element; if `precompute`
+        is True, the versions of the Merkle tree for the new elements are computed.
+        """
+        count = ingest_log(stream, self.elements, self.R, self.accumulator, self.check_record, check_every,
+                           chunk_records, self.hash_backend)
+
+        if self.initial_k > 0 and all(k in self.R for k in range(1, self.initial_k + 1)):
+            self.initial_k = 0
+            self.initial_S = MerkleTree([], self.hash_backend)
+            if self.precompute:
+                self.M[0] = PersistentMerkleTree([], self.hash_backend)
+
+        if self.precompute:
+            for k in range(self.initial_k + 1, len(self.accumulator) + 1):
+                if k not in self.M and k - 1 in self.M and k in self.R:
+                    self.M[k] = self.M[k - 1].set(zeros(k), bytes(self.R[k]))
+        return count
 
     @classmethod
     def make_tree_indexes(cls, n: int):
@@ -88,17 +268,20 @@ class SmartProver(AbstractProver):
         return result
 
     def make_tree(self, n: int):
-        """Constructs the Merkle tree M_n"""
+        """Constructs the Merkle tree M_n, or returns the precomputed one if `precompute` is enabled."""
+        if self.precompute:
+            return self.M[n]
+
         S = []
         for idx in self.make_tree_indexes(n):
             if idx > self.initial_k:
                 # we have seen the value since the creation of this Prover
-                S.append(self.R[idx])
+                S.append(bytes(self.R[idx]))
             else:
                 # unchanged since the creation of this Prover; copy value from the initial_S
-                S.append(self.initial_S[zeros(idx)])
+                S.append(self.initial_S.get(zeros(idx)))
 
-        return MerkleTree(S)
+        return MerkleTree(S, self.hash_backend)
 
     def prove(self, j: int) -> List[bytes]:
         """Produce a witness for the j-th element added to the accumulator"""
@@ -111,65 +294,134 @@ class SmartProver(AbstractProver):
         """
 
         assert self.initial_k <= j <= i
-        assert i in self.elements and i - 1 in self.R and pred(i) in self.R
-
-        # Build the Merkle tree for i - 1
-        M_prev = self.make_tree(i - 1)
-        w = [self.elements[i], M_prev.root]
-        if i > j:
-            # make the correct proof using rpred
-            i_next = rpred(i - 1, j)
+
+        w = []
+        while True:
+            assert i in self.elements
+
+            # Build the Merkle tree for i - 1
+            M_prev = self.make_tree(i - 1)
+            w += [bytes(self.elements[i]), M_prev.root]
+            if i == j:
+                return w
+
+            i_next = get_next_index(i, j)
             leaf_index = zeros(i_next)
 
             w.append(M_prev.get(leaf_index))
             w += M_prev.prove_leaf(leaf_index)
 
-            w += self.prove_from(i_next, j)
+            i = i_next
+
+    def plan(self, i: int, j: int) -> List[int]:
+        """Return the indices of the accumulator values visited by a proof for the j-th element, starting from i."""
+        return get_proof_plan(i, j)
 
-        return w
+    def proof_size(self, i: int, j: int) -> int:
+        """Return the number of items of a proof for the j-th element, starting from i."""
+        return get_witness_size(i, j)
 
 
 class SmartVerifier(AbstractVerifier):
+    def __init__(self, hash_backend: HashBackend = SHA256):
+        self.hash_backend = hash_backend
+
     def verify(self, Ri: bytes, i: int, j: int, w: List[bytes], x: bytes) -> bool:
         """
         Verify that `w` is a valid proof that the the `j`-th element added to the accumulator is `x`,
         given that the value of the accumulator after the `i`-th element was added is `Ri`.
         """
 
+        return self._verify(Ri, i, j, w, x, None)
+
+    def verify_batch(self, Ri: bytes, i: int, proofs: Iterable[Tuple[int, List[bytes], bytes]]) -> List[bool]:
+        """
+        Verify a batch of proofs against the same value `Ri` of the accumulator after the `i`-th element was added.
+        Each proof is a tuple `(j, w, x)`, with the same meaning as the arguments of `verify`. Return the list of the
+        results of each verification.
+        Each distinct hash check and each distinct Merkle proof is only verified once for the whole batch.
+        """
+
+        checked = {}
+        return [self._verify(Ri, i, j, w, x, checked) for j, w, x in proofs]
+
+    def plan(self, i: int, j: int) -> List[int]:
+        """Return the indices of the accumulator values visited by a proof for the j-th element, starting from i."""
+        return get_proof_plan(i, j)
+
+    def proof_size(self, i: int, j: int) -> int:
+        """Return the number of items of a proof for the j-th element, starting from i."""
+        return get_witness_size(i, j)
+
+    def _verify(
+        self,
+        Ri: bytes,
+        i: int,
+        j: int,
+        w: List[bytes],
+        x: bytes,
+        checked: Optional[Dict[tuple, tuple]]
+    ) -> bool:
+        """
+        Implementation of `verify`. `checked` maps each pair `(i, R_i)` to a preimage of `R_i` that was already
+        verified, and each triple `(M_(i - 1), merkle_tree_size, leaf_index)` to a pair `(leaf, merkle_proof)` that
+        was already verified; it is None if nothing is shared with other proofs. The items of `w` are hashed and
+        compared as they are (for example, as `memoryview`s); they are only copied to `bytes` to be used as keys of
+        `checked`.
+        """
+
         assert 1 <= j <= i
-        if len(w) < 2:
-            print("Witness too short")
-            return False
 
-        x_i, M_prev_root = w[0:2]
+        pos = 0  # position in w of the data for the current index i
+        while True:
+            if len(w) < pos + 2:
+                print("Witness too short")
+                return False
+
+            x_i, M_prev_root = preimage = tuple(w[pos:pos + 2])
+
+            # verify that H(x_i||M_prev_root) == Ri
+            key = None if checked is None else (i, bytes(Ri))
+            if key is None or checked.get(key) != preimage:
+                if self.hash_backend.H(b"".join(preimage)) != Ri:
+                    print("Hash did not match")
+                    return False
+                if key is not None:
+                    checked[key] = preimage
 
-        # verify that H(x_i||M_prev_root) == Ri
-        if H(x_i + M_prev_root) != Ri:
-            print("Hash did not match")
-            return False
+            if i == j:
+                return x_i == x
 
-        if i == j:
-            return x_i == x
-        else:  # i > j
-            i_next = rpred(i - 1, j)
+            # i > j
+            i_next = get_next_index(i, j)
             leaf_index = zeros(i_next)
-            leaf = w[2]
 
             merkle_tree_size = 1 + floor_lg(i - 1)
-            merkle_proof_size = get_proof_size(merkle_tree_size, leaf_index)
-            merkle_proof = w[3:3 + merkle_proof_size]
-            w_rest = w[3 + merkle_proof_size:]
+            merkle_proof_size, directions = get_proof_geometry(merkle_tree_size, leaf_index)
 
-            if not merkle_proof_verify(M_prev_root, merkle_tree_size, leaf, leaf_index, merkle_proof):
-                print("Merkle proof failed")
+            if len(w) < pos + 3 + merkle_proof_size:
+                print("Witness too short")
                 return False
 
-            return self.verify(leaf, i_next, j, w_rest, x)
+            leaf = w[pos + 2]
+            merkle_proof = w[pos + 3:pos + 3 + merkle_proof_size]
+
+            opening = (leaf, tuple(merkle_proof))
+            opening_key = None if checked is None else (bytes(M_prev_root), merkle_tree_size, leaf_index)
+            if opening_key is None or checked.get(opening_key) != opening:
+                if merkle_root_from_proof(leaf, directions, merkle_proof, self.hash_backend) != M_prev_root:
+                    print("Merkle proof failed")
+                    return False
+                if opening_key is not None:
+                    checked[opening_key] = opening
+
+            Ri, i = leaf, i_next
+            pos += 3 + merkle_proof_size
 
 
 class SmartAccumulatorFactory(AbstractAccumulatorFactory):
-    def create_accumulator(self):
-        accumulator_manager = SmartAccumulator()
+    def create_accumulator(self, hash_backend: HashBackend = SHA256):
+        accumulator_manager = SmartAccumulator(hash_backend)
         prover = SmartProver(accumulator_manager)
-        verifier = SmartVerifier()
+        verifier = SmartVerifier(hash_backend)
         return accumulator_manager, prover, verifier
@@ -0,0 +1,145 @@
+import mmap
+import os
+from abc import ABC, abstractmethod
+from typing import Iterable, Tuple
+
+# Storage backends for the data that provers record for each added element (the elements x_k and the accumulator
+# values R_k), indexed by the counter k.
+
+
+class Store(ABC):
+    """
+    A mapping from non-negative integer indices to values of type `bytes`. Each index is written once, as the
+    corresponding element is added to the accumulator.
+    """
+    @abstractmethod
+    def __getitem__(self, k: int) -> bytes:
+        pass
+
+    @abstractmethod
+    def __setitem__(self, k: int, value: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def __contains__(self, k: int) -> bool:
+        pass
+
+    def update(self, items: Iterable[Tuple[int, bytes]]) -> None:
+        """Write all the `(k, value)` pairs in `items`."""
+        for k, value in items:
+            self[k] = value
+
+
+class DictStore(dict, Store):
+    """The default store, keeping all the values in a Python dictionary."""
+    pass
+
+
+class MmapStore(Store):
+    """
+    Append-only store backed by a memory-mapped file of fixed-width records, where the record for index k is at
+    offset k * (width + 1). Each record is a flag byte (1 if the record is present, 0 otherwise) followed by the
+    value. All the values must have exactly `width` bytes.
+
+    The content of the file persists across restarts: opening an existing file makes all its records available.
+    Indexes that are never written do not occupy disk space on file systems that support sparse files.
+    """
+    def __init__(self, path: str, width: int = 32, initial_capacity: int = 1024):
+        self.path = path
+        self.width = width
+        self.record_size = width + 1
+
+        self.file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        size = os.fstat(self.file.fileno()).st_size
+        if size < initial_capacity * self.record_size:
+            size = initial_capacity * self.record_size
+            self.file.truncate(size)
+        self.mm = mmap.mmap(self.file.fileno(), size)
+
+    @property
+    def capacity(self) -> int:
+        """Return the number of records that fit in the currently mapped file."""
+        return len(self.mm) // self.record_size
+
+    def __getitem__(self, k: int) -> bytes:
+        if k not in self:
+            raise KeyError(k)
+        offset = k * self.record_size + 1
+        return self.mm[offset:offset + self.width]
+
+    def __setitem__(self, k: int, value: bytes) -> None:
+        if len(value) != self.width:
+            raise ValueError(f"Values must have length {self.width}, not {len(value)}")
+        if k < 0:
+            raise KeyError(k)
+
+        if k >= self.capacity:
+            # at least double the capacity, so that appending is amortized O(1)
+            self.mm.resize(max(2 * self.capacity, k + 1) * self.record_size)
+
+        offset = k * self.record_size
+        self.mm[offset] = 1
+        self.mm[offset + 1:offset + self.record_size] = value
+
+    def __contains__(self, k: int) -> bool:
+        return 0 <= k < self.capacity and self.mm[k * self.record_size] == 1
+
+    def flush(self) -> None:
+        """Write all the changes to disk."""
+        self.mm.flush()
+
+    def close(self) -> None:
+        """Flush the changes and close the underlying file."""
+        self.mm.flush()
+        self.mm.close()
+        self.file.close()
+
+
+class ArrayStore(Store):
+    """
+    In-memory store keeping the values in contiguous fixed-width slots. The slots are allocated in chunks of
+    `chunk_size` slots (a power of 2); each chunk is a `bytearray` that is never resized, together with a bitmap of
+    the slots that are present. Chunks are only allocated when one of their slots is written.
+    All the values must have exactly `width` bytes, and reads return a `memoryview` of the slot, without copying.
+
+    Memory usage is `width` bytes plus one bit per slot of each allocated chunk; that is, 32.125 bytes per index for
+    the default width, or about 64.25 bytes per element for a prover, which keeps both the elements and the
+    accumulator values.
+    """
+    def __init__(self, width: int = 32, chunk_size: int = 4096):
+        assert chunk_size >= 8 and chunk_size & (chunk_size - 1) == 0
+        self.width = width
+        self.chunk_size = chunk_size
+        self.chunk_bits = chunk_size.bit_length() - 1
+        self.chunks = []  # each chunk is either None, or a pair (values, bitmap)
+
+    def __getitem__(self, k: int) -> memoryview:
+        if k not in self:
+            raise KeyError(k)
+        values, _ = self.chunks[k >> self.chunk_bits]
+        offset = (k & (self.chunk_size - 1)) * self.width
+        return memoryview(values)[offset:offset + self.width]
+
+    def __setitem__(self, k: int, value: bytes) -> None:
+        if len(value) != self.width:
+            raise ValueError(f"Values must have length {self.width}, not {len(value)}")
+        if k < 0:
+            raise KeyError(k)
+
+        chunk_index = k >> self.chunk_bits
+        if chunk_index >= len(self.chunks):
+            self.chunks.extend([None] * (chunk_index + 1 - len(self.chunks)))
+        if self.chunks[chunk_index] is None:
+            self.chunks[chunk_index] = (bytearray(self.chunk_size * self.width), bytearray(self.chunk_size // 8))
+
+        values, bitmap = self.chunks[chunk_index]
+        slot = k & (self.chunk_size - 1)
+        values[slot * self.width:(slot + 1) * self.width] = value
+        bitmap[slot >> 3] |= 1 << (slot & 7)
+
+    def __contains__(self, k: int) -> bool:
+        chunk_index = k >> self.chunk_bits
+        if k < 0 or chunk_index >= len(self.chunks) or self.chunks[chunk_index] is None:
+            return False
+        slot = k & (self.chunk_size - 1)
+        return self.chunks[chunk_index][1][slot >> 3] & (1 << (slot & 7)) != 0
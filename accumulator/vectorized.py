@@ -0,0 +1,46 @@
+from typing import Union
+
+import numpy as np
+
+# NumPy versions of the index arithmetic in `common`, computing the result for each element of an array of uint64
+# indices at once. They are meant for offline tools working on millions of indices, and require numpy, which is an
+# optional dependency of this package.
+#
+# The arithmetic below relies on the wrap-around of uint64; NumPy does not warn about it for arrays, but it does for
+# scalars (including plain int arguments), so it is done with overflow warnings disabled.
+
+ArrayLike = Union[np.ndarray, int]
+
+_ONE = np.uint64(1)
+
+
+def _as_uint64(n: ArrayLike) -> np.ndarray:
+    return np.asarray(n, dtype=np.uint64)
+
+
+def pred(n: ArrayLike) -> np.ndarray:
+    """Vectorized `common.pred`: zero the least significant 1 digit of each element of n. Return 0 for 0."""
+    n = _as_uint64(n)
+    with np.errstate(over="ignore"):
+        return n & (n - _ONE)  # for n == 0, n - 1 wraps around, and the result is still 0
+
+
+def zeros(n: ArrayLike) -> np.ndarray:
+    """Vectorized `common.zeros`: the number of trailing zeros of each element of n. Return 0 for 0."""
+    n = _as_uint64(n)
+    with np.errstate(over="ignore"):
+        lowest = n & (~n + _ONE)  # the lowest 1 bit, by the two's complement identity -n == ~n + 1
+    # powers of 2 are exactly representable as float64, and frexp(2**t) == (0.5, t + 1)
+    _, exponents = np.frexp(lowest.astype(np.float64))
+    return np.where(n == 0, 0, exponents - 1).astype(np.uint64)
+
+
+def hook_index(n: ArrayLike, t: ArrayLike) -> np.ndarray:
+    """Vectorized `common.hook_index`, for arrays of indices n and of numbers of zeros t (which are broadcast
+    together). For each pair, return the largest number not greater than n that has exactly t trailing zeros."""
+    n = _as_uint64(n)
+    d = np.left_shift(_ONE, _as_uint64(t))
+    with np.errstate(over="ignore"):
+        mask = ~(d - _ONE)
+        r = n & mask
+        return np.where(n & d != 0, r, (r - _ONE) & mask)
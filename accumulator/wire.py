@@ -0,0 +1,92 @@
+import struct
+from collections.abc import Sequence
+from typing import Iterator, List, NamedTuple, Tuple, Union
+
+# Binary encoding of witnesses.
+# A witness is encoded as a fixed-size header, followed by all the items of the witness packed one after the other.
+# All the items must have the same length, equal to the digest size of the hash function (which requires the
+# accumulated elements to have that length, too).
+#
+# Header (big-endian):
+#   construction id: 1 byte (one of the constants below)
+#   parameter:       1 byte (the parameter p for MULTIPOINTER, 0 for the other constructions)
+#   i:               8 bytes
+#   j:               8 bytes
+#   item count:      4 bytes
+
+SIMPLE = 1
+SMART = 2
+GENERALIZED = 3
+MULTIPOINTER = 4
+MULTIPOINTER_LOGLOG = 5
+
+HEADER = struct.Struct(">BBQQI")
+
+
+class WitnessHeader(NamedTuple):
+    construction: int
+    param: int
+    i: int
+    j: int
+    count: int
+
+
+class WitnessView(Sequence):
+    """
+    Read-only view of the items of a witness in an encoded buffer. Items are returned as `memoryview` slices of the
+    buffer, therefore no data is copied; slicing a `WitnessView` returns another `WitnessView` on the same buffer.
+    Instances can be passed to the verifiers in place of the list of the items of the witness.
+    """
+    def __init__(self, buf: memoryview, item_size: int, start: int = 0, count: int = 0):
+        self.buf = buf
+        self.item_size = item_size
+        self.start = start
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[memoryview, "WitnessView"]:
+        if isinstance(index, slice):
+            begin, end, step = index.indices(self.count)
+            if step != 1:
+                raise ValueError("Slices of a WitnessView must have step 1")
+            return WitnessView(self.buf, self.item_size, self.start + begin, max(0, end - begin))
+
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("WitnessView index out of range")
+        offset = (self.start + index) * self.item_size
+        return self.buf[offset:offset + self.item_size]
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for index in range(self.count):
+            yield self[index]
+
+
+def encode_witness(construction: int, i: int, j: int, w: List[bytes], param: int = 0, digest_size: int = 32) -> bytes:
+    """Return the binary encoding of the witness `w` for the `j`-th element, starting from the root when the `i`-th
+    element was added, produced by a prover for the given construction."""
+    for item in w:
+        if len(item) != digest_size:
+            raise ValueError(f"All the items of the witness must have length {digest_size}, not {len(item)}")
+
+    return HEADER.pack(construction, param, i, j, len(w)) + b"".join(w)
+
+
+def decode_witness(
+    buf: Union[bytes, bytearray, memoryview],
+    digest_size: int = 32
+) -> Tuple[WitnessHeader, WitnessView]:
+    """Decode a witness encoded with `encode_witness`, without copying its content.
+    Return the header and a `WitnessView` of the items of the witness."""
+    buf = memoryview(buf).cast("B")
+    if len(buf) < HEADER.size:
+        raise ValueError("Buffer too short")
+
+    header = WitnessHeader(*HEADER.unpack_from(buf))
+    if len(buf) != HEADER.size + header.count * digest_size:
+        raise ValueError("Wrong buffer size for the declared number of items")
+
+    return header, WitnessView(buf[HEADER.size:], digest_size, 0, header.count)
@@ -14,5 +14,6 @@ setup(
    url="https://github.com/bigspider/accumulator",
    packages=['accumulator'],
    install_requires=[],
+   extras_require={"numpy": ["numpy"]},
    scripts=[]
 )
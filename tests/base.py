@@ -1,6 +1,12 @@
+import io
+import os
+import tempfile
 from typing import Tuple
+from unittest import mock
 from accumulator.common import H, NIL
 from accumulator.factory import AbstractAccumulatorManager, AbstractProver, AbstractVerifier
+from accumulator.instrumentation import instrument
+from accumulator.log import LogWriter
 
 
 # pylint: disable=no-member
@@ -70,3 +76,221 @@ class BaseAccumulatorTestSuite:
 
             result = verifier.verify(acc.get_root(), len(acc), j, w, elements[j-1])
             self.assertTrue(result)
+
+    def test_add_many(self):
+        # Adding elements in bulk must produce the same roots as adding them one at a time
+        acc1, _, __ = self.get_instances()
+        acc2, prover, verifier = self.get_instances()
+
+        batches = []
+        acc2.elements_added += batches.append
+        infos = []
+        acc2.elements_added.subscribe(lambda records, batch_infos: infos.extend(batch_infos), with_info=True)
+
+        events, event_infos = [], []
+        acc1.element_added += lambda k, x, r: events.append((k, x, r))
+        acc1.element_added.subscribe(lambda k, x, r, info: event_infos.append(info), with_info=True)
+
+        roots = []
+        for el in elements:
+            acc1.add(el)
+            roots.append(acc1.get_root())
+
+        self.assertEqual(acc2.add_many(elements[:2]), roots[1])
+        self.assertEqual(acc2.add_many([]), roots[1])
+        self.assertEqual(acc2.add_many(iter(elements[2:])), roots[-1])
+        self.assertEqual(len(acc2), len(elements))
+
+        # listeners get a single event per non-empty batch
+        self.assertEqual(len(batches), 2)
+        self.assertEqual(
+            batches[0] + batches[1],
+            [(k, elements[k - 1], roots[k - 1]) for k in range(1, len(elements) + 1)]
+        )
+        self.assertEqual(batches[0] + batches[1], events)
+        # the intermediate data is the same as for single additions
+        self.assertEqual(infos, event_infos)
+
+        for j in range(1, len(elements) + 1):
+            w = prover.prove(j)
+            self.assertTrue(verifier.verify(acc2.get_root(), len(acc2), j, w, elements[j-1]))
+
+    def test_snapshot(self):
+        acc, _, __ = self.get_instances()
+        snapshots = [acc.snapshot()]
+        for el in elements:
+            acc.add(el)
+            snapshots.append(acc.snapshot())
+
+        self.assertEqual(snapshots[0].k, 0)
+        for k, snapshot in enumerate(snapshots):
+            self.assertEqual(snapshot.k, k)
+
+            # the same as the snapshot of a fresh accumulator with the same elements
+            acc2, _, __ = self.get_instances()
+            acc2.add_many(elements[:k])
+            self.assertEqual(acc2.snapshot(), snapshot)
+            self.assertEqual(snapshot.root, acc2.get_root())
+
+        self.assertEqual(snapshots[-1].root, acc.get_root())
+        with self.assertRaises(TypeError):
+            snapshots[-1].S[0] = NIL
+
+    def test_checkpoint(self):
+        acc, prover, verifier = self.get_instances()
+        many_elements = [H(str(t)) for t in range(1, 41)]
+        acc.add_many(many_elements[:30])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            acc_path, prover_path = os.path.join(tmpdir, "acc"), os.path.join(tmpdir, "prover")
+            acc.checkpoint(acc_path)
+            prover.checkpoint(prover_path)
+
+            acc2, prover2, _ = self.get_instances()
+            with instrument() as stats:
+                acc2.restore(acc_path)
+                prover2.restore(prover_path)
+            if not getattr(prover2, "precompute", False):
+                self.assertEqual(stats.total.hashes, 0)
+
+        self.assertEqual(acc2.snapshot(), acc.snapshot())
+        for j in range(1, 31):
+            self.assertEqual(prover2.prove(j), prover.prove(j))
+
+        # the restored instances keep working after more additions
+        acc.add_many(many_elements[30:])
+        acc2.add_many(many_elements[30:])
+        self.assertEqual(acc2.snapshot(), acc.snapshot())
+        for j in range(1, 41):
+            w = prover2.prove(j)
+            self.assertEqual(w, prover.prove(j))
+            self.assertTrue(verifier.verify(acc2.get_root(), len(acc2), j, w, many_elements[j - 1]))
+
+    def test_ingest_log(self):
+        acc, prover, verifier = self.get_instances()
+        log = io.BytesIO()
+        LogWriter(log, acc)
+        many_elements = [H(str(t)) for t in range(1, 41)]
+        acc.add_many(many_elements[:25])
+        for x in many_elements[25:]:
+            acc.add(x)
+
+        # a prover that did not receive any element
+        acc2, prover2, _ = self.get_instances()
+        acc2.element_added.listeners.clear()
+        acc2.elements_added.listeners.clear()
+        acc2.add_many(many_elements)
+
+        log.seek(0)
+        self.assertEqual(prover2.ingest_log(log, check_every=3, chunk_records=7), len(many_elements))
+        for j in range(1, 41):
+            w = prover2.prove(j)
+            self.assertEqual(w, prover.prove(j))
+            self.assertTrue(verifier.verify(acc2.get_root(), len(acc2), j, w, many_elements[j - 1]))
+
+    def test_plan(self):
+        acc, prover, verifier = self.get_instances()
+        acc.add_many([H(str(t)) for t in range(1, 71)])
+
+        for i in range(1, 71):
+            for j in range(1, i + 1):
+                with instrument() as stats:
+                    path = prover.plan(i, j)
+                    size = prover.proof_size(i, j)
+                self.assertEqual(stats.total.hashes, 0)
+
+                self.assertEqual(path[0], i)
+                self.assertEqual(path[-1], j)
+                self.assertTrue(all(a > b for a, b in zip(path, path[1:])))
+                self.assertEqual(verifier.plan(i, j), path)
+
+                self.assertEqual(size, len(prover.prove_from(i, j)))
+                self.assertEqual(verifier.proof_size(i, j), size)
+
+        # no recorded data is needed
+        self.assertEqual(prover.plan(10**12, 1234), verifier.plan(10**12, 1234))
+        self.assertGreater(prover.proof_size(10**12, 1234), len(prover.plan(10**12, 1234)))
+
+    def test_add_errors(self):
+        acc, prover, verifier = self.get_instances()
+        acc.add_many(elements[:3])
+
+        with self.assertRaises(TypeError):
+            acc.add("not bytes")
+        self.assertEqual(len(acc), 3)
+
+        # the elements before the failing one are completely added and notified
+        with self.assertRaises(TypeError):
+            acc.add_many([elements[3], "not bytes", elements[4]])
+        expected, _, __ = self.get_instances()
+        expected.add_many(elements[:4])
+        self.assertEqual(acc.snapshot(), expected.snapshot())
+        w = prover.prove(4)
+        self.assertTrue(verifier.verify(acc.get_root(), len(acc), 4, w, elements[3]))
+
+        def failing_iterable():
+            yield elements[4]
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            acc.add_many(failing_iterable())
+        acc.add_many(elements[5:])
+        expected.add_many(elements[4:])
+        self.assertEqual(acc.snapshot(), expected.snapshot())
+        for j in range(1, len(elements) + 1):
+            w = prover.prove(j)
+            self.assertTrue(verifier.verify(acc.get_root(), len(acc), j, w, elements[j - 1]))
+
+    def test_verify_batch(self):
+        acc, prover, verifier = self.get_instances()
+        many_elements = [H(str(t)) for t in range(1, 41)]
+        acc.add_many(many_elements)
+        i = len(acc)
+        Ri = acc.get_root()
+
+        proofs = [(j, prover.prove(j), many_elements[j - 1]) for j in range(1, i + 1)]
+        proofs.append((3, prover.prove(3), H("wrong")))
+        proofs.append((4, prover.prove(5), many_elements[3]))
+
+        self.assertEqual(verifier.verify_batch(Ri, i, proofs), [True] * i + [False, False])
+
+        # count the hashes computed by the verifier
+        with mock.patch.object(verifier.hash_backend, "H", wraps=verifier.hash_backend.H) as mock_H:
+            for j, w, x in proofs[:i]:
+                verifier.verify(Ri, i, j, w, x)
+            individual_hashes = mock_H.call_count
+
+            mock_H.reset_mock()
+            verifier.verify_batch(Ri, i, proofs[:i])
+            self.assertLess(mock_H.call_count, individual_hashes)
+
+
+class BaseMultiProofTestSuite:
+    """Contains the tests for accumulators whose provers support proofs for multiple elements."""
+
+    def test_prove_many_verify_many(self):
+        acc, prover, verifier = self.get_instances()
+        many_elements = [H(str(t)) for t in range(1, 41)]
+        acc.add_many(many_elements)
+        i = len(acc)
+        Ri = acc.get_root()
+
+        for js in [[i], [1], [5, 3], [1, 2, 3, 4, 5, 6], [40, 20, 33, 7, 7], list(range(1, 41))]:
+            xs = [many_elements[j - 1] for j in js]
+            w = prover.prove_many(i, js)
+            self.assertTrue(verifier.verify_many(Ri, i, js, w, xs))
+
+            # the witness is never larger than the individual witnesses put together
+            self.assertLessEqual(len(w), sum(len(prover.prove_from(i, j)) for j in set(js)))
+
+            # wrong elements
+            self.assertFalse(verifier.verify_many(Ri, i, js, w, xs[:-1] + [H("wrong")]))
+
+            # tampered or truncated witnesses
+            self.assertFalse(verifier.verify_many(Ri, i, js, w[:-1], xs))
+            self.assertFalse(verifier.verify_many(Ri, i, js, w + [NIL], xs))
+            self.assertFalse(verifier.verify_many(Ri, i, js, [NIL] + w[1:], xs))
+
+        # proofs sharing most of the path are much smaller than the individual proofs
+        w = prover.prove_many(i, [1, 2])
+        self.assertLess(len(w), len(prover.prove_from(i, 1)) + len(prover.prove_from(i, 2)))
@@ -0,0 +1,48 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from accumulator import bench
+
+
+class BenchTestSuite(unittest.TestCase):
+    """Tests for the benchmark script, on small sizes."""
+
+    def test_output(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "results.json")
+            with contextlib.redirect_stderr(io.StringIO()):
+                bench.main(["--sizes", "10", "33", "--p", "2", "--samples", "5", "--output", path])
+            with open(path) as f:
+                results = json.load(f)
+
+        self.assertEqual(results["hash"], "sha256")
+        self.assertEqual(list(results["results"]), ["simple", "smart", "multipointer-2", "loglog"])
+        for runs in results["results"].values():
+            self.assertEqual([run["n"] for run in runs], [10, 33])
+            for run in runs:
+                self.assertGreater(run["add"]["seconds"], 0)
+                for key in ["prove_seconds", "verify_seconds", "witness_items", "witness_bytes"]:
+                    self.assertEqual(set(run[key]), {"mean", "max", "p50", "p90", "p99"})
+                self.assertEqual(run["witness_bytes"]["max"], 32 * run["witness_items"]["max"])
+
+    def test_stdout(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(io.StringIO()):
+            results = bench.main(["--sizes", "8", "--constructions", "simple", "--samples", "2", "--hash", "blake2b"])
+        self.assertEqual(json.loads(out.getvalue()), results)
+        self.assertEqual(results["hash"], "blake2b")
+
+    def test_percentiles(self):
+        result = bench.percentiles(list(range(100, 0, -1)))
+        self.assertEqual(result["mean"], 50.5)
+        self.assertEqual(result["max"], 100)
+        self.assertEqual(result["p50"], 51)
+        self.assertEqual(result["p99"], 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
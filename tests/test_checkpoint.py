@@ -0,0 +1,214 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from accumulator import checkpoint
+from accumulator.checkpoint import CheckpointError, CheckpointReader, CheckpointWriter
+from accumulator.common import BLAKE2B, H, SHA256
+from accumulator.generalized_accumulator import GeneralizedAccumulatorFactory
+from accumulator.merkle import MerkleTree
+from accumulator.multipointer_accumulator import MultipointerAccumulatorFactory, get_representatives
+from accumulator.multipointer_loglog import MultipointerLogLogFactory
+from accumulator.simple_accumulator import SimpleAccumulator, SimpleProver
+from accumulator.smart_accumulator import SmartAccumulator, SmartAccumulatorFactory, SmartProver
+from accumulator.storage import ArrayStore
+
+elements = [H(str(t)) for t in range(1, 21)]
+
+
+class CheckpointTestSuite(unittest.TestCase):
+    """Tests for the checkpoint format."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "checkpoint")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        for chunk_size in [7, checkpoint.CHUNK_SIZE]:  # also split the data in many small chunks
+            with mock.patch.object(checkpoint, "CHUNK_SIZE", chunk_size):
+                with CheckpointWriter(self.path, "Test", SHA256) as writer:
+                    writer.int(2**64 - 1)
+                    writer.digests([H("a"), None])
+                    for size in [0, 1, 6, 13]:
+                        writer.merkle_tree(MerkleTree(elements[:size]))
+
+                with CheckpointReader(self.path, "Test", SHA256) as reader:
+                    self.assertEqual(reader.int(), 2**64 - 1)
+                    self.assertEqual(reader.digests(), [H("a"), None])
+                    for size in [0, 1, 6, 13]:
+                        tree = reader.merkle_tree(SHA256)
+                        expected = MerkleTree(elements[:size])
+                        self.assertEqual((len(tree), tree.root, tree.peaks), (size, expected.root, expected.peaks))
+                        if size > 0:
+                            self.assertEqual(tree.prove_leaf(size - 1), expected.prove_leaf(size - 1))
+            self.assertEqual(os.listdir(self.tmpdir.name), ["checkpoint"])
+
+    def test_discard(self):
+        SimpleAccumulator().checkpoint(self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        with self.assertRaises(KeyError):
+            with CheckpointWriter(self.path, "SimpleAccumulator", SHA256) as writer:
+                writer.int(1)
+                raise KeyError()
+        with open(self.path, "rb") as f:
+            self.assertEqual(f.read(), data)  # the previous checkpoint is unchanged
+        self.assertEqual(os.listdir(self.tmpdir.name), ["checkpoint"])
+
+    def test_errors(self):
+        acc = SimpleAccumulator()
+        acc.add_many(elements)
+        acc.checkpoint(self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        with self.assertRaisesRegex(CheckpointError, "not for a"):
+            SmartAccumulator().restore(self.path)
+        with self.assertRaisesRegex(CheckpointError, "hash backend"):
+            SimpleAccumulator(BLAKE2B).restore(self.path)
+
+        def check_error(content: bytes, message: str):
+            with open(self.path, "wb") as f:
+                f.write(content)
+            restored = SimpleAccumulator()
+            with self.assertRaisesRegex(CheckpointError, message):
+                restored.restore(self.path)
+            self.assertEqual(len(restored), 0)  # unchanged
+
+        check_error(data[:-1] + bytes([data[-1] ^ 1]), "checksum")
+        check_error(data[:40] + bytes([data[40] ^ 1]) + data[41:], "checksum")
+        check_error(b"something else", "Not a checkpoint")
+
+        # valid checksum, but a different version
+        with mock.patch.object(checkpoint, "VERSION", 2):
+            with CheckpointWriter(self.path, "SimpleAccumulator", SHA256):
+                pass
+        with self.assertRaisesRegex(CheckpointError, "version"):
+            SimpleAccumulator().restore(self.path)
+
+        # valid checksum, but missing or extra data
+        with CheckpointWriter(self.path, "SimpleAccumulator", SHA256) as writer:
+            writer.int(1)
+        with self.assertRaisesRegex(CheckpointError, "Truncated"):
+            SimpleAccumulator().restore(self.path)
+
+        with CheckpointWriter(self.path, "SimpleAccumulator", SHA256) as writer:
+            writer.int(1)
+            writer.digests([SHA256.NIL])
+            writer.int(0)
+        with self.assertRaisesRegex(CheckpointError, "end of the checkpoint"):
+            SimpleAccumulator().restore(self.path)
+
+    def test_inconsistent_state(self):
+        for k, S in [(3, [H("a")] * 3), (5, [H("a")] * 2 + [None] * 3), (0, [])]:
+            with CheckpointWriter(self.path, "SimpleAccumulator", SHA256) as writer:
+                writer.int(k)
+                writer.digests(S)
+            restored = SimpleAccumulator()
+            with self.assertRaisesRegex(CheckpointError, "not consistent"):
+                restored.restore(self.path)
+            self.assertEqual(len(restored), 0)
+
+    def test_generalized_construction(self):
+        acc, prover, _ = MultipointerAccumulatorFactory().create_accumulator(2)
+        acc.add_many(elements)
+        acc.checkpoint(self.path)
+        prover_path = self.path + ".prover"
+        prover.checkpoint(prover_path)
+
+        for acc2, prover2 in [
+            MultipointerLogLogFactory().create_accumulator()[:2],
+            MultipointerAccumulatorFactory().create_accumulator(3)[:2],
+            GeneralizedAccumulatorFactory().create_accumulator(lambda k: get_representatives(k, 2))[:2],
+        ]:
+            with self.assertRaisesRegex(CheckpointError, "not for a"):
+                acc2.restore(self.path)
+            with self.assertRaisesRegex(CheckpointError, "not for a"):
+                prover2.restore(prover_path)
+            self.assertEqual((len(acc2), list(prover2.R.keys())), (0, [0]))
+
+        acc2, prover2, _ = MultipointerAccumulatorFactory().create_accumulator(2)
+        acc2.restore(self.path)
+        prover2.restore(prover_path)
+        self.assertEqual(acc2.get_root(), acc.get_root())
+
+        # without a name, the constructions are identified by the representatives they compute
+        def reps_p2(k):
+            return get_representatives(k, 2)
+
+        def reps_p3(k):
+            return get_representatives(k, 3)
+
+        acc, _, _ = GeneralizedAccumulatorFactory().create_accumulator(reps_p2)
+        acc.add_many(elements)
+        acc.checkpoint(self.path)
+        GeneralizedAccumulatorFactory().create_accumulator(lambda k: get_representatives(k, 2))[0].restore(self.path)
+        with self.assertRaisesRegex(CheckpointError, "not for a"):
+            GeneralizedAccumulatorFactory().create_accumulator(reps_p3)[0].restore(self.path)
+
+    def test_prover_errors(self):
+        acc = SimpleAccumulator()
+        prover = SimpleProver(acc)
+        acc.add_many(elements)
+        prover.checkpoint(self.path)
+
+        def check_error(write_body, message: str):
+            with CheckpointWriter(self.path, "SimpleProver", SHA256) as writer:
+                write_body(writer)
+            prover2 = SimpleProver(SimpleAccumulator())
+            with self.assertRaisesRegex(CheckpointError, message):
+                prover2.restore(self.path)
+            self.assertEqual(list(prover2.elements.keys()), [0])  # nothing recorded
+            self.assertEqual(list(prover2.R.keys()), [0])
+
+        def extra_data(writer):
+            writer.store_entries([prover.elements, prover.R], len(acc))
+            writer.int(0)
+
+        def wrong_order(writer):
+            writer.int(2)
+            for k in [2, 1]:
+                writer.int(k)
+                writer.optional_digest(elements[k - 1])
+                writer.optional_digest(None)
+
+        def truncated(writer):
+            writer.int(len(acc) + 2)
+            for k in range(len(acc) + 1):
+                writer.int(k)
+                writer.optional_digest(bytes(prover.elements[k]))
+                writer.optional_digest(bytes(prover.R[k]))
+
+        check_error(extra_data, "end of the checkpoint")
+        check_error(wrong_order, "Invalid index")
+        check_error(truncated, "Truncated")
+
+    def test_smart_prover_created_late(self):
+        acc, _, verifier = SmartAccumulatorFactory().create_accumulator()
+        acc.add_many(elements[:7])
+        prover = SmartProver(acc, elements_store=ArrayStore(), R_store=ArrayStore())
+        acc.add_many(elements[7:])
+
+        acc.checkpoint(self.path)
+        prover_path = self.path + ".prover"
+        prover.checkpoint(prover_path)
+
+        acc2 = SmartAccumulator()
+        prover2 = SmartProver(acc2, elements_store=ArrayStore(), R_store=ArrayStore())
+        acc2.restore(self.path)
+        prover2.restore(prover_path)
+
+        self.assertEqual(prover2.initial_k, 7)
+        for j in range(8, len(elements) + 1):
+            w = prover2.prove(j)
+            self.assertEqual(w, prover.prove(j))
+            self.assertTrue(verifier.verify(acc2.get_root(), len(acc2), j, w, elements[j - 1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
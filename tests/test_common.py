@@ -6,6 +6,9 @@ from accumulator.common import (
     highest_divisor_power_of_2,
     iroot,
     iroot_ceil,
+    pred,
+    rpred,
+    zeros,
 )
 
 import unittest
@@ -62,6 +65,35 @@ class CommonTestSuite(unittest.TestCase):
         self.assertEqual(ceil_lg(16), 4)
         self.assertEqual(ceil_lg(17), 5)
 
+    def test_floor_ceil_lg_large(self):
+        for t in range(1, 200):
+            self.assertEqual(floor_lg(2**t - 1), t - 1)
+            self.assertEqual(floor_lg(2**t), t)
+            self.assertEqual(ceil_lg(2**t), t)
+            self.assertEqual(ceil_lg(2**t + 1), t + 1)
+
+    def test_zeros(self):
+        self.assertEqual(zeros(0), 0)
+        self.assertEqual(zeros(1), 0)
+        self.assertEqual(zeros(2), 1)
+        self.assertEqual(zeros(3), 0)
+        self.assertEqual(zeros(12), 2)
+        self.assertEqual(zeros(0b11000101010100101001000), 3)
+        self.assertEqual(zeros(2**100), 100)
+        self.assertEqual(zeros(3 * 2**100), 100)
+
+    def test_rpred(self):
+        for n in range(1, 300):
+            for m in range(1, n + 1):
+                # reference: zero the least significant 1 digit while the result is at least m
+                expected = n
+                while pred(expected) >= m:
+                    expected = pred(expected)
+                self.assertEqual(rpred(n, m), expected)
+
+        self.assertEqual(rpred(0b11000101010100101001000, 0b11000101010100000000001), 0b11000101010100100000000)
+        self.assertEqual(rpred(0b11000101010100101001000, 0b11000101010100000000000), 0b11000101010100000000000)
+
     def test_highest_divisor_power_of_2(self):
         self.assertEqual(highest_divisor_power_of_2(0), 0)
         self.assertEqual(highest_divisor_power_of_2(1), 1)
@@ -0,0 +1,135 @@
+import random
+import threading
+import time
+import unittest
+
+from accumulator.common import H
+from accumulator.concurrent import ConcurrentProver, RWLock
+from accumulator.multipointer_loglog import MultipointerLogLogFactory
+from accumulator.simple_accumulator import SimpleAccumulatorFactory
+from accumulator.smart_accumulator import SmartAccumulatorFactory
+
+
+class RWLockTestSuite(unittest.TestCase):
+    """Tests for the readers-writer lock."""
+
+    def test_readers_share(self):
+        lock = RWLock()
+        with lock.read_locked():
+            with lock.read_locked():
+                self.assertEqual(lock.readers, 2)
+        self.assertEqual(lock.readers, 0)
+
+    def test_writer_excludes_readers(self):
+        lock = RWLock()
+        events = []
+
+        def reader():
+            with lock.read_locked():
+                events.append("read")
+
+        with lock.write_locked():
+            thread = threading.Thread(target=reader)
+            thread.start()
+            time.sleep(0.05)
+            events.append("write")
+        thread.join()
+        self.assertEqual(events, ["write", "read"])
+
+    def test_waiting_writer_has_priority(self):
+        lock = RWLock()
+        events = []
+
+        def writer():
+            with lock.write_locked():
+                events.append("write")
+
+        def reader():
+            with lock.read_locked():
+                events.append("read")
+
+        with lock.read_locked():
+            writer_thread = threading.Thread(target=writer)
+            writer_thread.start()
+            while lock.writers_waiting == 0:
+                time.sleep(0.001)
+            reader_thread = threading.Thread(target=reader)
+            reader_thread.start()
+            time.sleep(0.05)
+            self.assertEqual(events, [])
+        writer_thread.join()
+        reader_thread.join()
+        self.assertEqual(events, ["write", "read"])
+
+
+class ConcurrentProverTestSuite(unittest.TestCase):
+    """Tests for proofs produced while elements are being added."""
+
+    def check_concurrent(self, factory):
+        acc, prover, verifier = factory.create_accumulator()
+        elements = [H(str(t)) for t in range(1, 401)]
+
+        with ConcurrentProver(acc, prover, max_workers=4) as concurrent_prover:
+            concurrent_prover.add(elements[0])
+
+            def write():
+                concurrent_prover.add_many(elements[1:])
+
+            writer = threading.Thread(target=write)
+            writer.start()
+
+            rng = random.Random(0)
+            futures = []
+            while writer.is_alive() or len(futures) < 50:
+                i, _ = concurrent_prover.pin()
+                j = rng.randint(1, i)
+                futures.append((j, concurrent_prover.submit(j)))
+            writer.join()
+
+            for j, future in futures:
+                i, Ri, w = future.result()
+                self.assertTrue(j <= i <= len(elements))
+                self.assertTrue(verifier.verify(Ri, i, j, w, elements[j - 1]))
+
+            i, Ri = concurrent_prover.pin()
+            self.assertEqual((i, Ri), (len(elements), acc.get_root()))
+            w = concurrent_prover.submit_from(200, 17).result()
+            self.assertEqual(w, prover.prove_from(200, 17))
+
+    def test_simple(self):
+        self.check_concurrent(SimpleAccumulatorFactory())
+
+    def test_smart(self):
+        self.check_concurrent(SmartAccumulatorFactory())
+
+    def test_loglog(self):
+        self.check_concurrent(MultipointerLogLogFactory())
+
+    def test_invalid_indices(self):
+        acc, prover, _ = SimpleAccumulatorFactory().create_accumulator()
+        with ConcurrentProver(acc, prover) as concurrent_prover:
+            self.assertEqual(concurrent_prover.add_many([]), acc.get_root())
+            concurrent_prover.add_many([H("a"), H("b")])
+            with self.assertRaises(ValueError):
+                concurrent_prover.prove(3)
+            with self.assertRaises(ValueError):
+                concurrent_prover.prove_from(3, 1)
+            with self.assertRaises(ValueError):
+                concurrent_prover.submit_from(2, 0).result()
+
+    def test_add_many_batch(self):
+        acc, prover, _ = SimpleAccumulatorFactory().create_accumulator()
+        batches, single = [], []
+        acc.elements_added += lambda records: batches.append(
+            (concurrent_prover.lock.writer, [k for k, _, __ in records])
+        )
+        acc.element_added += lambda k, x, r: single.append(k)
+        with ConcurrentProver(acc, prover) as concurrent_prover:
+            root = concurrent_prover.add_many([H("a"), H("b"), H("c")])
+        self.assertEqual(root, acc.get_root())
+        self.assertEqual(batches, [(True, [1, 2, 3])])  # one batch, notified while holding the write lock
+        self.assertEqual(single, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
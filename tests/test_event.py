@@ -0,0 +1,155 @@
+import io
+import queue
+import threading
+import time
+import unittest
+
+from accumulator.common import H
+from accumulator.event import AsyncDispatcher, AsyncEvent, Event
+from accumulator.log import LogWriter, read_log
+from accumulator.multipointer_loglog import MultipointerLogLogFactory
+from accumulator.simple_accumulator import SimpleAccumulator, SimpleProver, SimpleVerifier
+from accumulator.smart_accumulator import SmartAccumulator, SmartProver
+
+
+class EventTestSuite(unittest.TestCase):
+    """Tests for the synchronous and the asynchronous events."""
+
+    def test_event(self):
+        event = Event()
+        calls = []
+        event += lambda *args, **kwargs: calls.append((args, kwargs))
+        event.notify(1, 2, a=3)
+        self.assertEqual(calls, [((1, 2), {"a": 3})])
+
+        # listeners subscribed with info also receive the info argument
+        event.subscribe(lambda *args, **kwargs: calls.append((args, kwargs)), with_info=True)
+        calls.clear()
+        event.notify(1, info="info")
+        self.assertEqual(calls, [((1,), {}), ((1, "info"), {})])
+
+    def test_async_event(self):
+        gate = threading.Event()
+        calls = []
+
+        def listener(value):
+            gate.wait()
+            calls.append(value)
+
+        with AsyncEvent() as event:
+            event += listener
+            start = time.perf_counter()
+            for value in range(100):
+                event.notify(value)
+            self.assertLess(time.perf_counter() - start, 1)  # notify does not wait for the listener
+            self.assertEqual(calls, [])
+
+            gate.set()
+            event.flush()
+            self.assertEqual(calls, list(range(100)))
+
+    def check_full_queue(self, backpressure: str):
+        gate = threading.Event()
+        event = AsyncEvent(maxsize=2, backpressure=backpressure)
+        event += lambda value: gate.wait()
+        event.notify(0)  # taken by the worker, which waits
+        while event.dispatcher.queue.qsize() > 0:
+            time.sleep(0.001)
+        event.notify(1)
+        event.notify(2)
+        return event, gate
+
+    def test_backpressure_drop(self):
+        event, gate = self.check_full_queue("drop")
+        event.notify(3)
+        self.assertEqual(event.dispatcher.dropped, 1)
+        gate.set()
+        event.close()
+
+    def test_backpressure_error(self):
+        event, gate = self.check_full_queue("error")
+        with self.assertRaises(queue.Full):
+            event.notify(3)
+        gate.set()
+        event.close()
+
+    def test_backpressure_block(self):
+        event, gate = self.check_full_queue("block")
+        threading.Timer(0.05, gate.set).start()
+        event.notify(3)  # waits until the worker frees an entry
+        event.close()
+        self.assertEqual(event.dispatcher.dropped, 0)
+
+    def test_invalid_backpressure(self):
+        with self.assertRaises(ValueError):
+            AsyncEvent(backpressure="wait")
+
+    def test_listener_error(self):
+        def listener(value):
+            if value == 1:
+                raise ValueError(value)
+
+        event = AsyncEvent()
+        event += listener
+        for value in range(3):
+            event.notify(value)
+        with self.assertRaises(ValueError):
+            event.flush()
+        event.flush()  # the error is only reported once
+
+        event.close()
+        with self.assertRaises(RuntimeError):
+            event.notify(4)
+
+    def test_accumulator(self):
+        acc = SimpleAccumulator()
+        with AsyncDispatcher().attach(acc) as dispatcher:
+            prover = SimpleProver(acc)
+            verifier = SimpleVerifier()
+
+            elements = [H(str(t)) for t in range(1, 51)]
+            for x in elements[:25]:
+                acc.add(x)
+            acc.add_many(elements[25:])
+            dispatcher.flush()
+
+            for j in range(1, len(elements) + 1):
+                w = prover.prove(j)
+                self.assertTrue(verifier.verify(acc.get_root(), len(acc), j, w, elements[j - 1]))
+
+    def test_attach_keeps_listeners(self):
+        # the prover created by the factory, which subscribes with info, is still notified after attaching
+        acc, prover, verifier = MultipointerLogLogFactory().create_accumulator()
+        with AsyncDispatcher().attach(acc) as dispatcher:
+            elements = [H(str(t)) for t in range(1, 21)]
+            acc.add(elements[0])
+            acc.add_many(elements[1:])
+            dispatcher.flush()
+
+            self.assertEqual(sorted(prover.M), list(range(1, len(elements) + 1)))
+            for j in range(1, len(elements) + 1):
+                w = prover.prove(j)
+                self.assertTrue(verifier.verify(acc.get_root(), len(acc), j, w, elements[j - 1]))
+
+    def test_shared_dispatcher_order(self):
+        # single and batch notifications of the same manager are delivered in order
+        acc = SmartAccumulator()
+        gate = threading.Event()
+        with AsyncDispatcher().attach(acc) as dispatcher:
+            acc.element_added += lambda *args: gate.wait()  # delays the first notification
+            log = io.BytesIO()
+            LogWriter(log, acc)
+            prover = SmartProver(acc, precompute=True)
+
+            acc.add(H("x1"))
+            acc.add_many([H("x2"), H("x3")])
+            gate.set()
+            dispatcher.flush()
+
+        log.seek(0)
+        self.assertEqual([k for chunk in read_log(log) for k, _, __ in chunk], [1, 2, 3])
+        self.assertEqual(sorted(prover.M), [0, 1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import hashlib
+import unittest
+
+from accumulator.common import H, NIL, HashBackend, SHA256, BLAKE2B, BLAKE2S
+from accumulator import merkle, merkle_amortized
+from accumulator.simple_accumulator import SimpleAccumulatorFactory, SimpleVerifier
+from accumulator.smart_accumulator import SmartAccumulatorFactory
+from accumulator.multipointer_accumulator import MultipointerAccumulatorFactory
+from accumulator.multipointer_loglog import MultipointerLogLogFactory
+
+plain_elements = ["some", "small", "list", "of", "distinct", "elements"]
+elements = [H(el) for el in plain_elements]
+
+
+class HashBackendTestSuite(unittest.TestCase):
+    """Tests for pluggable hash functions."""
+
+    def test_default(self):
+        self.assertEqual(SHA256.H(b"abc"), hashlib.sha256(b"abc").digest())
+        self.assertEqual(SHA256.H("abc"), H("abc"))
+        self.assertEqual(SHA256.NIL, NIL)
+
+    def test_blake2(self):
+        self.assertEqual(BLAKE2B.H(b"abc"), hashlib.blake2b(b"abc", digest_size=32).digest())
+        self.assertEqual(BLAKE2S.H(b"abc"), hashlib.blake2s(b"abc").digest())
+
+        blake2b_512 = HashBackend("blake2b", 64)
+        self.assertEqual(blake2b_512.H(b"abc"), hashlib.blake2b(b"abc").digest())
+        self.assertEqual(blake2b_512.NIL, bytes(64))
+
+    def test_custom_nil(self):
+        backend = HashBackend("sha256", 32, nil=b"\xff" * 32)
+        self.assertEqual(backend.NIL, b"\xff" * 32)
+        self.assertEqual(merkle.MerkleTree([], backend).root, backend.NIL)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            HashBackend("sha256", 64)
+        with self.assertRaises(ValueError):
+            HashBackend("sha256", 32, nil=bytes(31))
+
+    def test_merkle_trees(self):
+        for module in [merkle, merkle_amortized]:
+            mt = module.MerkleTree(elements, BLAKE2S)
+            self.assertNotEqual(mt.root, module.MerkleTree(elements).root)
+            for i in range(len(elements)):
+                p = mt.prove_leaf(i)
+                self.assertTrue(module.merkle_proof_verify(mt.root, len(elements), elements[i], i, p, BLAKE2S))
+                self.assertFalse(module.merkle_proof_verify(mt.root, len(elements), elements[i], i, p))
+
+    def test_accumulators(self):
+        instances = [
+            (SimpleAccumulatorFactory().create_accumulator(BLAKE2B), SimpleAccumulatorFactory().create_accumulator()),
+            (SmartAccumulatorFactory().create_accumulator(BLAKE2B), SmartAccumulatorFactory().create_accumulator()),
+            (
+                MultipointerAccumulatorFactory().create_accumulator(2, BLAKE2B),
+                MultipointerAccumulatorFactory().create_accumulator(2)
+            ),
+            (MultipointerLogLogFactory().create_accumulator(BLAKE2B), MultipointerLogLogFactory().create_accumulator()),
+        ]
+        for (acc, prover, verifier), (acc_sha256, _, verifier_sha256) in instances:
+            acc.add_many(elements)
+            acc_sha256.add_many(elements)
+            self.assertNotEqual(acc.get_root(), acc_sha256.get_root())
+
+            for j in range(1, len(elements) + 1):
+                w = prover.prove(j)
+                self.assertTrue(verifier.verify(acc.get_root(), len(acc), j, w, elements[j - 1]))
+                self.assertFalse(verifier_sha256.verify(acc.get_root(), len(acc), j, w, elements[j - 1]))
+
+    def test_default_roots_unchanged(self):
+        acc, _, __ = SimpleAccumulatorFactory().create_accumulator()
+        acc.add(elements[0])
+        acc.add(elements[1])
+        R_1 = H(elements[0] + NIL + NIL)
+        self.assertEqual(acc.get_root(), H(elements[1] + R_1 + NIL))
+        self.assertIs(SimpleVerifier().hash_backend, SHA256)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import unittest
+
+from accumulator.common import H, HashBackend, SHA256
+from accumulator import merkle, simple_accumulator
+from accumulator.instrumentation import Counters, instrument
+from accumulator.merkle import MerkleTree
+from accumulator.simple_accumulator import SimpleAccumulatorFactory, SimpleProver
+from accumulator.smart_accumulator import SmartAccumulatorFactory, SmartProver
+from accumulator.multipointer_loglog import MultipointerLogLogFactory
+
+plain_elements = ["some", "small", "list", "of", "distinct", "elements"]
+elements = [H(el) for el in plain_elements]
+
+
+class InstrumentationTestSuite(unittest.TestCase):
+    """Tests for the instrumentation of hashes and operations."""
+
+    def test_simple_accumulator(self):
+        acc, prover, verifier = SimpleAccumulatorFactory().create_accumulator()
+        acc.add_many(elements[:-1])
+
+        with instrument() as stats:
+            acc.add(elements[-1])
+            self.assertEqual(stats.last[0], "SimpleAccumulator.add")
+            self.assertEqual(stats.last[1].hashes, 1)
+            self.assertEqual(stats.last[1].bytes_hashed, 3 * 32)
+
+            w = prover.prove(1)
+            self.assertEqual(stats.last[0], "SimpleProver.prove")  # prove_from is not reported separately
+            self.assertEqual(stats.last[1].hashes, 0)
+            depth = stats.last[1].depth
+            self.assertGreater(depth, 0)
+
+            self.assertTrue(verifier.verify(acc.get_root(), len(acc), 1, w, elements[0]))
+            self.assertEqual(stats.last[0], "SimpleVerifier.verify")
+            self.assertEqual(stats.last[1].depth, depth)
+            self.assertEqual(stats.last[1].hashes, depth + 1)
+
+        self.assertEqual(stats.total.hashes, 1 + depth + 1)
+
+    def test_callback(self):
+        acc, prover, verifier = SmartAccumulatorFactory().create_accumulator()
+        reports = []
+        with instrument(lambda name, counters: reports.append((name, counters))):
+            acc.add_many(elements)
+            w = prover.prove(2)
+            verifier.verify(acc.get_root(), len(acc), 2, w, elements[1])
+
+        self.assertEqual([name for name, _ in reports], ["SmartAccumulator.add_many", "SmartProver.prove",
+                                                         "SmartVerifier.verify"])
+        add_counters, prove_counters, verify_counters = [counters for _, counters in reports]
+        self.assertGreaterEqual(add_counters.hashes, len(elements))
+        self.assertGreater(prove_counters.merkle_trees, 0)
+        self.assertEqual(prove_counters.depth, verify_counters.depth)
+
+    def test_merkle_trees(self):
+        acc, prover, verifier = MultipointerLogLogFactory().create_accumulator()
+        with instrument() as stats:
+            mt = MerkleTree(elements)
+            self.assertEqual(stats.total.merkle_trees, 1)
+            self.assertEqual(stats.total.hashes, len(elements) - 1)
+            self.assertIsNone(stats.last)  # not part of an operation
+
+            mt.set(0, elements[1])
+            self.assertEqual(stats.total.fix_ups, 1)
+
+            acc.add_many(elements)
+            self.assertEqual(stats.last[0], "GeneralizedAccumulator.add_many")
+            self.assertEqual(stats.last[1].merkle_trees, len(elements))  # one Merkle root for each element
+
+    def test_generalized_prove(self):
+        acc, prover, verifier = MultipointerLogLogFactory().create_accumulator()
+        acc.add_many([H(str(t)) for t in range(1, 21)])
+        with instrument() as stats:
+            # each level opens one Merkle tree, whose root M_i is stored: only the siblings are hashed
+            prover.prove(5)
+            self.assertEqual(stats.last[1].hashes, 0)
+            self.assertEqual((stats.last[1].merkle_trees, stats.last[1].depth), (7, 7))
+
+            # computing the shape of a proof does not traverse it
+            prover.plan(20, 5)
+            prover.proof_size(20, 5)
+            self.assertEqual(stats.total.depth, 7)
+
+    def test_reimported_functions(self):
+        acc, _, _ = SmartAccumulatorFactory().create_accumulator()
+        acc.add_many(elements)
+        prover = SmartProver(acc)  # created late: it only records the elements added after it
+        acc.add(H("new"))
+        with instrument() as stats:
+            # smart_accumulator.merkle_root, imported from merkle, is counted too
+            self.assertTrue(prover.check_record(len(elements) + 1))
+            self.assertEqual(stats.total.merkle_trees, 1)
+
+    def test_uninstall(self):
+        originals = (HashBackend.H, merkle.make_tree, MerkleTree.fix_up, SimpleProver.prove,
+                     simple_accumulator.get_next_index)
+        with instrument():
+            self.assertIsNot(HashBackend.H, originals[0])
+            with self.assertRaises(RuntimeError):
+                with instrument():
+                    pass
+        self.assertEqual((HashBackend.H, merkle.make_tree, MerkleTree.fix_up, SimpleProver.prove,
+                          simple_accumulator.get_next_index), originals)
+
+        with self.assertRaises(ValueError):
+            with instrument():
+                raise ValueError()
+        self.assertIs(HashBackend.H, originals[0])
+        self.assertEqual(SHA256.H(b"abc"), H(b"abc"))
+
+    def test_counters(self):
+        self.assertEqual(Counters(), Counters())
+        self.assertIn("hashes=0", repr(Counters()))
+
+
+if __name__ == '__main__':
+    unittest.main()
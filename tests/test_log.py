@@ -0,0 +1,137 @@
+import io
+import unittest
+
+from accumulator.common import H
+from accumulator.log import LogWriter, read_log
+from accumulator.generalized_accumulator import GeneralizedAccumulator, GeneralizedProver
+from accumulator.multipointer_loglog import get_representatives
+from accumulator.simple_accumulator import SimpleAccumulator, SimpleProver, SimpleVerifier
+from accumulator.smart_accumulator import SmartAccumulator, SmartProver, SmartVerifier
+
+elements = [H(str(t)) for t in range(1, 31)]
+
+
+def make_log(acc) -> io.BytesIO:
+    log = io.BytesIO()
+    LogWriter(log, acc)
+    acc.add_many(elements[:10])
+    for x in elements[10:]:
+        acc.add(x)
+    log.seek(0)
+    return log
+
+
+class LogTestSuite(unittest.TestCase):
+    """Tests for the logs of the added elements, and for their ingestion by the provers."""
+
+    def test_read_log(self):
+        acc = SimpleAccumulator()
+        log = make_log(acc)
+        records = [record for chunk in read_log(log, chunk_records=4) for record in chunk]
+        self.assertEqual([k for k, _, __ in records], list(range(1, 31)))
+        self.assertEqual([x for _, x, __ in records], elements)
+        self.assertEqual(records[-1][2], acc.get_root())
+
+        with self.assertRaisesRegex(ValueError, "Truncated"):
+            list(read_log(io.BytesIO(log.getvalue()[:-1])))
+
+    def corrupt(self, data: bytes, k: int) -> io.BytesIO:
+        """Flip a bit of the accumulator value in the k-th record of a log."""
+        pos = (k - 1) * 72 + 71
+        return io.BytesIO(data[:pos] + bytes([data[pos] ^ 1]) + data[pos + 1:])
+
+    def test_check_every(self):
+        acc = SimpleAccumulator()
+        data = make_log(acc).getvalue()
+
+        prover = SimpleProver(acc)
+        with self.assertRaisesRegex(ValueError, "index 7"):
+            prover.ingest_log(self.corrupt(data, 7), check_every=1)
+
+        # the corrupted record is not sampled
+        prover = SimpleProver(acc)
+        self.assertEqual(prover.ingest_log(self.corrupt(data, 7), check_every=4), len(elements))
+
+        # the last record is always compared with the current root
+        prover = SimpleProver(acc)
+        with self.assertRaisesRegex(ValueError, "index 30"):
+            prover.ingest_log(self.corrupt(data, 30))
+
+    def test_element_size(self):
+        acc = SimpleAccumulator()
+        log = io.BytesIO()
+        LogWriter(log, acc)
+        acc.add(elements[0])
+        with self.assertRaisesRegex(ValueError, "index 2: it has 31 bytes"):
+            acc.add(elements[1][:31])
+        with self.assertRaisesRegex(ValueError, "index 4: it has 33 bytes"):
+            acc.add_many([elements[2], elements[3] + b"x"])
+        self.assertEqual(log.getvalue(), make_log(SimpleAccumulator()).getvalue()[:72])  # only the first record
+
+    def test_rejected_chunk(self):
+        # the chunks before the one with a wrong record are recorded, the others are not
+        def make_generalized_prover(acc):
+            return GeneralizedProver(get_representatives, acc)
+
+        for acc, make_prover in [
+            (SimpleAccumulator(), SimpleProver),
+            (SmartAccumulator(), SmartProver),
+            (GeneralizedAccumulator(get_representatives), make_generalized_prover),
+        ]:
+            data = make_log(acc).getvalue()
+            prover = make_prover(acc)
+            with self.assertRaisesRegex(ValueError, "index 12"):
+                prover.ingest_log(self.corrupt(data, 12), check_every=1, chunk_records=5)
+            self.assertEqual([k for k in range(len(elements) + 1) if k in prover.R], list(range(11)))
+
+    def test_invalid_index(self):
+        acc = SimpleAccumulator()
+        log = make_log(acc)
+        acc2 = SimpleAccumulator()
+        acc2.add_many(elements[:20])
+        with self.assertRaisesRegex(ValueError, "Invalid index 21"):
+            SimpleProver(acc2).ingest_log(log)
+
+    def check_smart_prover_created_late(self, precompute: bool):
+        acc = SmartAccumulator()
+        log = io.BytesIO()
+        LogWriter(log, acc)
+        acc.add_many(elements[:13])
+        prover = SmartProver(acc, precompute=precompute)
+        acc.add_many(elements[13:])
+        self.assertEqual(prover.initial_k, 13)
+
+        log.seek(0)
+        self.assertEqual(prover.ingest_log(log, check_every=1), len(elements))
+        self.assertEqual(prover.initial_k, 0)
+
+        verifier = SmartVerifier()
+        for j in range(1, len(elements) + 1):
+            w = prover.prove(j)
+            self.assertTrue(verifier.verify(acc.get_root(), len(acc), j, w, elements[j - 1]))
+            for i in range(j, len(elements) + 1, 7):
+                self.assertEqual(prover.proof_size(i, j), len(prover.prove_from(i, j)))
+
+    def test_smart_prover_created_late(self):
+        self.check_smart_prover_created_late(False)
+
+    def test_smart_prover_created_late_precompute(self):
+        self.check_smart_prover_created_late(True)
+
+    def test_simple_prover_created_late(self):
+        acc = SimpleAccumulator()
+        log = io.BytesIO()
+        LogWriter(log, acc)
+        acc.add_many(elements[:13])
+        prover = SimpleProver(acc)
+        acc.add_many(elements[13:])
+
+        log.seek(0)
+        prover.ingest_log(log, check_every=2)
+        verifier = SimpleVerifier()
+        for j in range(1, len(elements) + 1):
+            self.assertTrue(verifier.verify(acc.get_root(), len(acc), j, prover.prove(j), elements[j - 1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
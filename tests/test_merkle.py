@@ -1,5 +1,21 @@
-from accumulator.common import H, NIL
-from accumulator.merkle import get_directions, MerkleTree, merkle_proof_verify
+from accumulator.common import H, NIL, largest_power_of_2_less_than
+from accumulator.merkle import (
+    get_directions,
+    get_multiproof_size,
+    get_proof_geometry,
+    get_proof_size,
+    make_tree,
+    MerkleTree,
+    Node,
+    PersistentMerkleTree,
+    merkle_proof_verify,
+    merkle_multiproof_verify,
+    merkle_root,
+    merkle_proof,
+    merkle_root_and_proof,
+)
+from accumulator.instrumentation import instrument
+from itertools import combinations
 
 import unittest
 
@@ -54,32 +70,33 @@ class Merkle2TestSuite(unittest.TestCase):
         assert get_directions(8, 6) == [True, True, False]
         assert get_directions(8, 7) == [True, True, True]
 
+    def test_get_proof_geometry(self):
+        for size in range(1, 70):
+            for index in range(size):
+                # directions computed by descending the tree from the root
+                expected = []
+                cur_size, cur_index = size, index
+                while cur_size > 1:
+                    lchild_size = largest_power_of_2_less_than(cur_size)
+                    expected.append(cur_index >= lchild_size)
+                    if cur_index >= lchild_size:
+                        cur_size, cur_index = cur_size - lchild_size, cur_index - lchild_size
+                    else:
+                        cur_size = lchild_size
+
+                proof_size, directions = get_proof_geometry(size, index)
+                self.assertEqual(proof_size, len(expected))
+                self.assertEqual(directions >> proof_size, 0)
+                self.assertEqual(get_directions(size, index), expected)
+                self.assertEqual(get_proof_size(size, index), len(expected))
+
     def assertMerkleTreesEqual(self, mt1, mt2):
         """Checks that `mt1` and `mt2` are identically equal MerkleTrees"""
-        self.assertEqual(len(mt1.leaves), len(mt2.leaves))
-        for j in range(len(mt1.leaves)):
-            self.assertEqual(mt1.leaves[j].value, mt2.leaves[j].value)
-
-        if mt1.root is None:
-            self.assertIsNone(mt2.root)
-        else:
-            self.assertIsNotNone(mt2.root)
-            self.assertEqual(mt1.root, mt2.root)
-
-            self.assertNodeEqual(mt1.root_node, mt2.root_node)
-
-    def assertNodeEqual(self, node1, node2):
-        if node1 is None:
-            self.assertIsNone(node2)
-        else:
-            self.assertEqual(node1.value, node2.value)
-            if node1.parent is None:
-                self.assertIsNone(node2.parent)
-
-            if node1.left is None:
-                self.assertIsNone(node2.left)
-            else:
-                self.assertNodeEqual(node1.left, node2.left)
+        self.assertEqual(len(mt1), len(mt2))
+        self.assertEqual(mt1.root, mt2.root)
+        for j in range(len(mt1)):
+            self.assertEqual(mt1.get(j), mt2.get(j))
+            self.assertEqual(mt1.prove_leaf(j), mt2.prove_leaf(j))
 
     def test_add_1(self):
         merkle_tree = MerkleTree()
@@ -116,6 +133,57 @@ class Merkle2TestSuite(unittest.TestCase):
             self.assertEqual(len(merkle_tree), i + 1)
             self.assertEqual(merkle_tree.get(i), elements[i])
 
+    def test_add_deep(self):
+        # adding to a tree whose rightmost path has several levels
+        leaves = [H(str(i)) for i in range(70)]
+        merkle_tree = MerkleTree()
+        for i, leaf in enumerate(leaves):
+            merkle_tree.add(leaf)
+            self.assertEqual(merkle_tree.root, MerkleTree(leaves[:i + 1]).root)
+
+    def test_same_as_pointer_tree(self):
+        # compare with the tree built out of Node objects, for all the sizes up to 70
+        leaves = [H(str(i)) for i in range(70)]
+        merkle_tree = MerkleTree()
+        for size in range(1, len(leaves) + 1):
+            merkle_tree.add(leaves[size - 1])
+            nodes = [Node(None, None, None, leaf) for leaf in leaves[:size]]
+            root_node = make_tree(nodes, 0, size)
+            self.assertEqual(merkle_tree.root, root_node.value)
+            for i in range(size):
+                proof = []
+                node = nodes[i]
+                while node.parent is not None:
+                    proof.append(node.sibling().value)
+                    node = node.parent
+                self.assertEqual(merkle_tree.prove_leaf(i), proof)
+                self.assertEqual(len(proof), get_proof_size(size, i))
+
+    def test_merkle_root_and_proof(self):
+        self.assertEqual(merkle_root([]), NIL)
+        leaves = [H(str(i)) for i in range(40)]
+        for size in range(1, len(leaves) + 1):
+            merkle_tree = MerkleTree(leaves[:size])
+            self.assertEqual(merkle_root(leaves[:size]), merkle_tree.root)
+            for i in range(size):
+                self.assertEqual(merkle_root_and_proof(leaves[:size], i), (merkle_tree.root, merkle_tree.prove_leaf(i)))
+                self.assertEqual(merkle_proof(leaves[:size], i), merkle_tree.prove_leaf(i))
+
+    def test_merkle_proof_hashes(self):
+        leaves = [H(str(i)) for i in range(13)]
+        for i in range(len(leaves)):
+            with instrument() as stats:
+                proof = merkle_proof(leaves, i)
+            self.assertEqual(stats.total.hashes, len(leaves) - 1 - len(proof))
+
+    def test_copy(self):
+        mt1 = MerkleTree(elements)
+        mt2 = mt1.copy()
+        self.assertMerkleTreesEqual(mt1, mt2)
+        mt2.set(0, elements[1])
+        self.assertEqual(mt1.get(0), elements[0])
+        self.assertNotEqual(mt1.root, mt2.root)
+
     def test_set_past_last(self):
         # tests that setting the k-th element has exactly the same effect as adding a new element
         mt1 = MerkleTree()
@@ -183,6 +251,106 @@ class Merkle2TestSuite(unittest.TestCase):
             for j in range(len(elements)):
                 self.assertEqual(merkle_proof_verify(merkle_tree.root, len(elements), elements[j], i, p), (i == j))
 
+    def test_prove_leaves_verify(self):
+        for size in range(1, len(elements) + 1):
+            merkle_tree = MerkleTree(elements[:size])
+            for n_leaves in range(1, size + 1):
+                for indices in combinations(range(size), n_leaves):
+                    leaves = {index: elements[index] for index in indices}
+                    p = merkle_tree.prove_leaves(indices)
+                    self.assertEqual(len(p), get_multiproof_size(size, indices))
+                    self.assertTrue(merkle_multiproof_verify(merkle_tree.root, size, leaves, p))
+
+                    self.assertFalse(merkle_multiproof_verify(merkle_tree.root, size, leaves, p + [NIL]))
+                    if len(p) > 0:
+                        self.assertFalse(merkle_multiproof_verify(merkle_tree.root, size, leaves, p[:-1]))
+
+                    wrong_leaves = dict(leaves)
+                    wrong_leaves[indices[-1]] = H("wrong")
+                    self.assertFalse(merkle_multiproof_verify(merkle_tree.root, size, wrong_leaves, p))
+
+    def test_prove_leaves_size(self):
+        merkle_tree = MerkleTree(elements)
+        for i in range(len(elements)):
+            # for a single leaf, the multiproof contains the same elements as the proof, from left to right
+            self.assertCountEqual(merkle_tree.prove_leaves([i]), merkle_tree.prove_leaf(i))
+            self.assertEqual(get_multiproof_size(len(elements), [i]), get_proof_size(len(elements), i))
+
+        # siblings shared by several leaves are not repeated
+        self.assertEqual(merkle_tree.prove_leaves([0, 1, 2, 3]), [H(elements[4] + elements[5])])
+
+    def test_extend(self):
+        leaves = [H(str(i)) for i in range(40)]
+        for size in range(len(leaves)):
+            for k in range(len(leaves) - size):
+                mt1 = MerkleTree(leaves[:size])
+                mt1.extend(leaves[size:size + k])
+                self.assertMerkleTreesEqual(mt1, MerkleTree(leaves[:size + k]))
+
+    def test_extend_hashes(self):
+        # each new internal node is computed once
+        merkle_tree = MerkleTree(elements[:3])
+        with instrument() as stats:
+            merkle_tree.extend(elements[3:])
+        # 3 new complete subtrees (leaves 2-3, 0-3 and 4-5), and the new root
+        self.assertEqual(stats.total.hashes, 4)
+
+    def test_set_many(self):
+        leaves = [H(str(i)) for i in range(23)]
+        new_leaves = [H("new " + str(i)) for i in range(23)]
+        for indices in [[0], [22], [3, 4], [0, 22], [5, 7, 16, 17, 21], list(range(23))]:
+            mt1 = MerkleTree(leaves)
+            mt1.set_many({i: new_leaves[i] for i in indices})
+            mt2 = MerkleTree(leaves)
+            for i in indices:
+                mt2.set(i, new_leaves[i])
+            self.assertMerkleTreesEqual(mt1, mt2)
+
+    def test_set_many_hashes(self):
+        merkle_tree = MerkleTree(elements)
+        new_el = H("new")
+        with instrument() as stats:
+            merkle_tree.set_many({i: new_el for i in range(len(elements))})
+        self.assertEqual(stats.total.hashes, len(elements) - 1)  # all the internal nodes, once
+
+        with instrument() as stats:
+            merkle_tree.set_many({0: elements[0], 1: elements[1]})
+        self.assertEqual(stats.total.hashes, 3)  # the parent of leaves 0 and 1, and its two ancestors
+
+
+class PersistentMerkleTreeTestSuite(unittest.TestCase):
+    """Persistent Merkle tree test cases."""
+
+    def assertSameTree(self, pmt, mt):
+        self.assertEqual(len(pmt), len(mt))
+        self.assertEqual(pmt.root, mt.root)
+        for i in range(len(mt)):
+            self.assertEqual(pmt.get(i), mt.get(i))
+            self.assertEqual(pmt.prove_leaf(i), mt.prove_leaf(i))
+
+    def test_construct(self):
+        for i in range(len(elements) + 1):
+            self.assertSameTree(PersistentMerkleTree(elements[:i]), MerkleTree(elements[:i]))
+
+    def test_add(self):
+        pmt = PersistentMerkleTree()
+        mt = MerkleTree()
+        for el in elements:
+            pmt = pmt.set(len(pmt), el)
+            mt.add(el)
+            self.assertSameTree(pmt, mt)
+
+    def test_set(self):
+        new_el = H("something new")
+        for i in range(len(elements)):
+            pmt = PersistentMerkleTree(elements)
+            pmt_new = pmt.set(i, new_el)
+            mt = MerkleTree(elements)
+            mt.set(i, new_el)
+
+            self.assertSameTree(pmt_new, mt)
+            self.assertSameTree(pmt, MerkleTree(elements))  # the original tree is unchanged
+
 
 if __name__ == '__main__':
     unittest.main()
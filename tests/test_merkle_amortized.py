@@ -1,5 +1,11 @@
 from accumulator.common import H, NIL
-from accumulator.merkle_amortized import MerkleTree, merkle_proof_verify
+from accumulator.merkle_amortized import (
+    get_multiproof_size,
+    MerkleTree,
+    merkle_proof_verify,
+    merkle_multiproof_verify,
+)
+from itertools import combinations
 
 import unittest
 
@@ -139,6 +145,35 @@ class MerkleTestSuite(unittest.TestCase):
             for j in range(len(elements)):
                 self.assertEqual(merkle_proof_verify(merkle_tree.root, len(merkle_tree), elements[j], i, p), (i == j))
 
+    def test_prove_leaves_verify(self):
+        for size in range(1, len(elements) + 1):
+            merkle_tree = MerkleTree(elements[:size])
+            for n_leaves in range(1, size + 1):
+                for indices in combinations(range(size), n_leaves):
+                    leaves = {index: elements[index] for index in indices}
+                    p = merkle_tree.prove_leaves(indices)
+                    self.assertEqual(len(p), get_multiproof_size(size, indices))
+                    self.assertTrue(merkle_multiproof_verify(merkle_tree.root, size, leaves, p))
+
+                    self.assertFalse(merkle_multiproof_verify(merkle_tree.root, size, leaves, p + [NIL]))
+                    if len(p) > 0:
+                        self.assertFalse(merkle_multiproof_verify(merkle_tree.root, size, leaves, p[:-1]))
+
+                    wrong_leaves = dict(leaves)
+                    wrong_leaves[indices[-1]] = H("wrong")
+                    self.assertFalse(merkle_multiproof_verify(merkle_tree.root, size, wrong_leaves, p))
+
+    def test_prove_leaves_size(self):
+        merkle_tree = MerkleTree(elements)
+        for i in range(len(elements)):
+            # for a single leaf, the multiproof contains the same elements as the proof, from left to right
+            self.assertCountEqual(merkle_tree.prove_leaves([i]), merkle_tree.prove_leaf(i))
+
+        # siblings shared by several leaves are not repeated
+        H67 = H(NIL + NIL)
+        self.assertEqual(merkle_tree.prove_leaves([0, 1, 2, 3]), [H(H(elements[4] + elements[5]) + H67)])
+        self.assertEqual(merkle_tree.prove_leaves([0, 2, 4]), [elements[1], elements[3], elements[5], H67])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,10 +1,10 @@
 import unittest
 from accumulator.multipointer_accumulator import get_representatives, MultipointerAccumulatorFactory
 
-from .base import BaseAccumulatorTestSuite
+from .base import BaseAccumulatorTestSuite, BaseMultiProofTestSuite
 
 
-class GeneralizedAccumulatorTestSuite(BaseAccumulatorTestSuite, unittest.TestCase):
+class GeneralizedAccumulatorTestSuite(BaseAccumulatorTestSuite, BaseMultiProofTestSuite, unittest.TestCase):
     """Generalized accumulator test cases."""
 
     def test_get_representatives(self):
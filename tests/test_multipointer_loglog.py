@@ -1,10 +1,13 @@
 import unittest
+from accumulator.common import H
+from accumulator.instrumentation import instrument
+from accumulator.merkle import merkle_root
 from accumulator.multipointer_loglog import get_representatives, MultipointerLogLogFactory
 
-from .base import BaseAccumulatorTestSuite
+from .base import BaseAccumulatorTestSuite, BaseMultiProofTestSuite
 
 
-class GeneralizedAccumulatorTestSuite(BaseAccumulatorTestSuite, unittest.TestCase):
+class GeneralizedAccumulatorTestSuite(BaseAccumulatorTestSuite, BaseMultiProofTestSuite, unittest.TestCase):
     """Generalized accumulator test cases."""
 
     def test_get_representatives(self):
@@ -37,6 +40,36 @@ class GeneralizedAccumulatorTestSuite(BaseAccumulatorTestSuite, unittest.TestCas
                 0b111001100100101000000000000000000000000000,
             ])
 
+    def test_add_info(self):
+        acc, prover, _ = self.get_instances()
+        events = []
+        acc.element_added.subscribe(lambda k, x, r, info: events.append((k, x, r, info)), with_info=True)
+        for t in range(1, 20):
+            acc.add(H(str(t)))
+
+        for k, x, r, info in events:
+            self.assertEqual(info.representatives, get_representatives(k))
+            self.assertEqual(info.M, merkle_root([prover.R[t] for t in info.representatives]))
+            self.assertEqual(r, H(x + info.M))
+            self.assertEqual(prover.M[k], info.M)
+
+    def test_prover_stored_roots(self):
+        acc, prover, _ = self.get_instances()
+        acc.add_many([H(str(t)) for t in range(1, 40)])
+
+        # the root of M_j is not recomputed for the last step of a proof
+        with instrument() as stats:
+            w = prover.prove(39)
+        self.assertEqual(stats.total.hashes, 0)
+
+        # same proofs if the roots are recomputed
+        proofs = [prover.prove(j) for j in range(1, 40)]
+        proof_many = prover.prove_many(39, [3, 17, 30])
+        prover.M.clear()
+        self.assertEqual(prover.prove(39), w)
+        self.assertEqual([prover.prove(j) for j in range(1, 40)], proofs)
+        self.assertEqual(prover.prove_many(39, [3, 17, 30]), proof_many)
+
     def get_instances(self):
         factory = MultipointerLogLogFactory()
         return factory.create_accumulator()
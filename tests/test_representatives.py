@@ -0,0 +1,60 @@
+import random
+import unittest
+
+from accumulator import multipointer_accumulator, multipointer_loglog
+from accumulator.generalized_accumulator import get_next_representative
+from accumulator.representatives import RepresentativeEngine
+
+
+class RepresentativeEngineTestSuite(unittest.TestCase):
+    """Tests for the computation of representatives with RepresentativeEngine."""
+
+    def test_multipointer(self):
+        for p in range(1, 5):
+            engine = RepresentativeEngine(lambda l: multipointer_accumulator.get_exponents(l, p))
+            for k in range(1, 3000):
+                self.assertEqual(engine(k), multipointer_accumulator.get_representatives(k, p))
+
+    def test_loglog(self):
+        engine = RepresentativeEngine(multipointer_loglog.get_exponents)
+        for k in range(1, 3000):
+            self.assertEqual(engine(k), multipointer_loglog.get_representatives(k))
+
+        k = 0b111001100100101110101001111001110011101010
+        self.assertEqual(engine(k), multipointer_loglog.get_representatives(k))
+
+    def test_random_order(self):
+        engine = RepresentativeEngine(multipointer_loglog.get_exponents, cache_size=16)
+        rng = random.Random(0)
+        for _ in range(2000):
+            k = rng.randint(1, 1 << 40) if rng.random() < 0.5 else rng.randint(1, 100)
+            self.assertEqual(engine(k), multipointer_loglog.get_representatives(k))
+            self.assertLessEqual(len(engine.cache), 16)
+
+    def test_cache(self):
+        engine = RepresentativeEngine(multipointer_loglog.get_exponents, cache_size=2)
+        engine(10)
+        engine(11)
+        engine(10)
+        self.assertEqual((engine.hits, engine.misses), (1, 2))
+        engine(12)  # evicts 11, the least recently used
+        self.assertEqual(list(engine.cache), [10, 12])
+
+        # the returned lists can be modified without affecting the cache
+        engine(12).append(1)
+        self.assertEqual(engine(12), multipointer_loglog.get_representatives(12))
+
+        engine.cache_clear()
+        self.assertEqual((len(engine.cache), engine.hits, engine.misses), (0, 0, 0))
+
+    def test_get_next_representative(self):
+        for k in range(2, 600):
+            representatives = multipointer_loglog.get_representatives(k)
+            for j in range(1, k):
+                # linear scan: the position of the smallest representative that is at least j
+                expected = max(pos for pos, rep in enumerate(representatives) if rep >= j)
+                self.assertEqual(get_next_representative(representatives, j), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,10 @@
 import unittest
 from accumulator.simple_accumulator import SimpleAccumulatorFactory
 
-from .base import BaseAccumulatorTestSuite
+from .base import BaseAccumulatorTestSuite, BaseMultiProofTestSuite
 
 
-class SimpleAccumulatorTestSuite(BaseAccumulatorTestSuite, unittest.TestCase):
+class SimpleAccumulatorTestSuite(BaseAccumulatorTestSuite, BaseMultiProofTestSuite, unittest.TestCase):
     """Simple accumulator test cases."""
 
     def get_instances(self):
@@ -1,6 +1,6 @@
 import unittest
 from accumulator.common import H
-from accumulator.smart_accumulator import SmartAccumulatorFactory, SmartProver
+from accumulator.smart_accumulator import SmartAccumulator, SmartAccumulatorFactory, SmartProver, SmartVerifier
 
 from .base import BaseAccumulatorTestSuite
 
@@ -45,6 +45,39 @@ class SmartAccumulatorTestSuite(BaseAccumulatorTestSuite, unittest.TestCase):
             t = prover.make_tree(i)
             self.assertEqual(t.root, roots[i])
 
+    def test_prover_created_late(self):
+        # A prover created after some elements were added can prove all the elements added later
+        acc, _, verifier = self.get_instances()
+        acc.add_many(elements[:3])
+        prover = self.make_prover(acc)
+        acc.add_many(elements[3:])
+
+        for j in range(4, len(elements) + 1):
+            w = prover.prove(j)
+            self.assertTrue(verifier.verify(acc.get_root(), len(acc), j, w, elements[j-1]))
+
+    def make_prover(self, acc):
+        return SmartProver(acc)
+
+
+class SmartAccumulatorPrecomputeTestSuite(SmartAccumulatorTestSuite):
+    """Smart accumulator test cases, with a prover that precomputes the Merkle trees."""
+
+    def get_instances(self):
+        acc = SmartAccumulator()
+        return acc, self.make_prover(acc), SmartVerifier()
+
+    def make_prover(self, acc):
+        return SmartProver(acc, precompute=True)
+
+    def test_same_proofs(self):
+        acc, prover, _ = self.get_instances()
+        plain_prover = SmartProver(acc)
+        acc.add_many(elements)
+        for i in range(1, len(elements) + 1):
+            for j in range(1, i + 1):
+                self.assertEqual(prover.prove_from(i, j), plain_prover.prove_from(i, j))
+
 
 if __name__ == '__main__':
     unittest.main()
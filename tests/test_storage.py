@@ -0,0 +1,151 @@
+import os
+import tempfile
+import unittest
+
+from accumulator.common import H, NIL
+from accumulator.storage import ArrayStore, DictStore, MmapStore
+from accumulator.simple_accumulator import SimpleAccumulator, SimpleProver, SimpleVerifier
+from accumulator.smart_accumulator import SmartAccumulator, SmartProver, SmartVerifier
+from accumulator.generalized_accumulator import GeneralizedAccumulator, GeneralizedProver, GeneralizedVerifier
+from accumulator.multipointer_loglog import get_representatives
+
+plain_elements = ["some", "small", "list", "of", "distinct", "elements"]
+elements = [H(el) for el in plain_elements]
+
+
+class MmapStoreTestSuite(unittest.TestCase):
+    """Tests for the memory-mapped store."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_set_get(self):
+        store = MmapStore(self.path("store"), initial_capacity=4)
+        self.assertNotIn(0, store)
+        store[0] = NIL
+        store[3] = elements[3]
+        self.assertIn(0, store)
+        self.assertNotIn(1, store)
+        self.assertIn(3, store)
+        self.assertEqual(store[0], NIL)
+        self.assertEqual(store[3], elements[3])
+        with self.assertRaises(KeyError):
+            store[1]
+        store.close()
+
+    def test_grow(self):
+        store = MmapStore(self.path("store"), initial_capacity=2)
+        for k, el in enumerate(elements):
+            store[k] = el
+        store[100] = elements[0]
+        self.assertGreaterEqual(store.capacity, 101)
+        for k, el in enumerate(elements):
+            self.assertEqual(store[k], el)
+        self.assertEqual(store[100], elements[0])
+        store.close()
+
+    def test_wrong_width(self):
+        store = MmapStore(self.path("store"), width=32)
+        with self.assertRaises(ValueError):
+            store[0] = b"short"
+        store.close()
+
+    def test_reopen(self):
+        store = MmapStore(self.path("store"))
+        for k, el in enumerate(elements):
+            store[k] = el
+        store.close()
+
+        store = MmapStore(self.path("store"))
+        for k, el in enumerate(elements):
+            self.assertEqual(store[k], el)
+        self.assertNotIn(len(elements), store)
+        store.close()
+
+    def test_provers(self):
+        check_provers(self, lambda name: MmapStore(self.path(name)))
+
+
+def check_provers(test_case, make_store):
+    """Check that all the provers produce valid proofs when using stores created with `make_store(name)`."""
+    accumulators = [
+        (SimpleAccumulator(), SimpleProver, SimpleVerifier()),
+        (SmartAccumulator(), SmartProver, SmartVerifier()),
+    ]
+    for acc, prover_class, verifier in accumulators:
+        name = prover_class.__name__
+        prover = prover_class(acc, make_store(name + ".x"), make_store(name + ".R"))
+        check_prover(test_case, acc, prover, verifier)
+
+    acc = GeneralizedAccumulator(get_representatives)
+    prover = GeneralizedProver(get_representatives, acc, make_store("generalized.x"), make_store("generalized.R"))
+    check_prover(test_case, acc, prover, GeneralizedVerifier(get_representatives))
+
+
+def check_prover(test_case, acc, prover, verifier):
+    acc.add_many(elements)
+    for j in range(1, len(elements) + 1):
+        w = prover.prove(j)
+        test_case.assertTrue(verifier.verify(acc.get_root(), len(acc), j, w, elements[j - 1]))
+
+
+class ArrayStoreTestSuite(unittest.TestCase):
+    """Tests for the in-memory contiguous store."""
+
+    def test_set_get(self):
+        store = ArrayStore(chunk_size=8)
+        self.assertNotIn(0, store)
+        store[0] = NIL
+        store[3] = elements[3]
+        store[20] = elements[5]
+        self.assertIn(0, store)
+        self.assertNotIn(1, store)
+        self.assertNotIn(9, store)
+        self.assertIn(3, store)
+        self.assertIn(20, store)
+        self.assertIsNone(store.chunks[1])  # chunks with no values are not allocated
+
+        self.assertIsInstance(store[3], memoryview)
+        self.assertEqual(store[0], NIL)
+        self.assertEqual(store[3], elements[3])
+        self.assertEqual(store[20], elements[5])
+        with self.assertRaises(KeyError):
+            store[1]
+        with self.assertRaises(KeyError):
+            store[100]
+
+    def test_write_while_reading(self):
+        # existing memoryviews must not prevent adding new values
+        store = ArrayStore(chunk_size=8)
+        views = []
+        for k, el in enumerate(elements * 3):
+            store[k] = el
+            views.append(store[k])
+        for k, el in enumerate(elements * 3):
+            self.assertEqual(views[k], el)
+
+    def test_wrong_width(self):
+        store = ArrayStore(width=32)
+        with self.assertRaises(ValueError):
+            store[0] = b"short"
+
+    def test_provers(self):
+        check_provers(self, lambda name: ArrayStore())
+
+
+class DictStoreTestSuite(unittest.TestCase):
+    def test_default_store(self):
+        acc = SimpleAccumulator()
+        prover = SimpleProver(acc)
+        self.assertIsInstance(prover.elements, DictStore)
+        self.assertIsInstance(prover.R, DictStore)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import random
+import unittest
+import warnings
+
+from accumulator.common import hook_index, pred, zeros
+
+try:
+    import numpy as np
+    from accumulator import vectorized
+except ImportError:
+    np = None
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class VectorizedTestSuite(unittest.TestCase):
+    """Tests for the NumPy versions of the functions in common."""
+
+    def setUp(self):
+        rng = random.Random(0)
+        self.values = list(range(0, 1000)) + [rng.randint(1, 2**64 - 1) for _ in range(1000)] + [2**63, 2**64 - 1]
+        self.array = np.array(self.values, dtype=np.uint64)
+
+    def test_pred(self):
+        self.assertEqual(vectorized.pred(self.array).tolist(), [pred(n) for n in self.values])
+
+    def test_zeros(self):
+        self.assertEqual(vectorized.zeros(self.array).tolist(), [zeros(n) for n in self.values])
+
+    def test_hook_index(self):
+        for t in [0, 1, 5, 40]:
+            values = [n for n in self.values if n >= 2**t]
+            result = vectorized.hook_index(np.array(values, dtype=np.uint64), t)
+            self.assertEqual(result.tolist(), [hook_index(n, t) for n in values])
+
+        # arrays of t are broadcast together with the indices
+        n = 0b11000101010100101001000
+        ts = np.arange(8, dtype=np.uint64)
+        self.assertEqual(vectorized.hook_index(n, ts).tolist(), [hook_index(n, t) for t in range(8)])
+
+    def test_scalars(self):
+        # the wrap-around of scalars must not warn, for both ints and numpy scalars
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            for n in [0, 1, 12, 2**63, 2**64 - 1]:
+                for value in [n, np.uint64(n)]:
+                    self.assertEqual(vectorized.pred(value), pred(n))
+                    self.assertEqual(vectorized.zeros(value), zeros(n))
+                    if n > 0:
+                        self.assertEqual(vectorized.hook_index(value, 0), hook_index(n, 0))
+                        self.assertEqual(vectorized.hook_index(value, zeros(n)), hook_index(n, zeros(n)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import unittest
+from unittest import mock
+
+from accumulator import generalized_accumulator, simple_accumulator, smart_accumulator, wire
+from accumulator.common import H, NIL
+from accumulator.wire import decode_witness, encode_witness, WitnessView
+from accumulator.simple_accumulator import SimpleAccumulatorFactory
+from accumulator.smart_accumulator import SmartAccumulatorFactory
+from accumulator.generalized_accumulator import GeneralizedAccumulatorFactory
+from accumulator.multipointer_accumulator import MultipointerAccumulatorFactory
+from accumulator.multipointer_loglog import MultipointerLogLogFactory, get_representatives
+
+plain_elements = ["some", "small", "list", "of", "distinct", "elements"]
+elements = [H(el) for el in plain_elements]
+
+
+class WireTestSuite(unittest.TestCase):
+    """Tests for the binary encoding of witnesses."""
+
+    def test_encode_decode(self):
+        buf = encode_witness(wire.MULTIPOINTER, 1000, 3, elements, param=2)
+        self.assertEqual(len(buf), wire.HEADER.size + 32 * len(elements))
+
+        header, view = decode_witness(buf)
+        self.assertEqual(header, wire.WitnessHeader(wire.MULTIPOINTER, 2, 1000, 3, len(elements)))
+        self.assertEqual(len(view), len(elements))
+        self.assertIsInstance(view[0], memoryview)
+        self.assertEqual(list(view), elements)
+        self.assertEqual(view[-1], elements[-1])
+        with self.assertRaises(IndexError):
+            view[len(elements)]
+
+        sub_view = view[2:5]
+        self.assertIsInstance(sub_view, WitnessView)
+        self.assertEqual(list(sub_view), elements[2:5])
+        self.assertEqual(list(sub_view[1:]), elements[3:5])
+        self.assertEqual(len(view[4:100]), 2)
+
+    def test_empty(self):
+        header, view = decode_witness(encode_witness(wire.SIMPLE, 0, 0, []))
+        self.assertEqual(header.count, 0)
+        self.assertEqual(list(view), [])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            encode_witness(wire.SIMPLE, 1, 1, [b"short"])
+
+        buf = encode_witness(wire.SIMPLE, 2, 1, elements)
+        with self.assertRaises(ValueError):
+            decode_witness(buf[:-1])
+        with self.assertRaises(ValueError):
+            decode_witness(buf + NIL)
+        with self.assertRaises(ValueError):
+            decode_witness(buf[:wire.HEADER.size - 1])
+
+    def test_verify_decoded(self):
+        constructions = [
+            (wire.SIMPLE, 0, SimpleAccumulatorFactory().create_accumulator()),
+            (wire.SMART, 0, SmartAccumulatorFactory().create_accumulator()),
+            (wire.GENERALIZED, 0, GeneralizedAccumulatorFactory().create_accumulator(get_representatives)),
+            (wire.MULTIPOINTER, 2, MultipointerAccumulatorFactory().create_accumulator(2)),
+            (wire.MULTIPOINTER_LOGLOG, 0, MultipointerLogLogFactory().create_accumulator()),
+        ]
+        for construction, param, (acc, prover, verifier) in constructions:
+            acc.add_many(elements)
+            i = len(acc)
+            proofs = []
+            for j in range(1, i + 1):
+                # decode from a writable buffer, like one that was received from the network
+                buf = bytearray(encode_witness(construction, i, j, prover.prove(j), param=param))
+                header, w = decode_witness(buf)
+                self.assertEqual((header.construction, header.param, header.i, header.j), (construction, param, i, j))
+                self.assertTrue(verifier.verify(acc.get_root(), header.i, header.j, w, elements[j - 1]))
+                self.assertFalse(verifier.verify(acc.get_root(), header.i, header.j, w, H("wrong")))
+                proofs.append((header.j, w, elements[j - 1]))
+
+            self.assertEqual(verifier.verify_batch(acc.get_root(), i, proofs), [True] * i)
+
+    def test_verify_without_copies(self):
+        # a single verification hashes and compares the memoryview items directly, without converting them to bytes
+        constructions = [
+            (wire.SIMPLE, simple_accumulator, SimpleAccumulatorFactory().create_accumulator()),
+            (wire.SMART, smart_accumulator, SmartAccumulatorFactory().create_accumulator()),
+            (wire.MULTIPOINTER_LOGLOG, generalized_accumulator, MultipointerLogLogFactory().create_accumulator()),
+        ]
+        for construction, module, (acc, prover, verifier) in constructions:
+            acc.add_many(elements)
+            i = len(acc)
+            for j in range(1, i + 1):
+                _, w = decode_witness(bytearray(encode_witness(construction, i, j, prover.prove(j))))
+                with mock.patch.object(module, "bytes", side_effect=AssertionError("copied"), create=True):
+                    self.assertTrue(verifier.verify(acc.get_root(), i, j, w, elements[j - 1]))
+                    self.assertFalse(verifier.verify(acc.get_root(), i, j, w, H("wrong")))
+
+
+if __name__ == '__main__':
+    unittest.main()